@@ -1,5 +1,5 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from contextlib import contextmanager
 import os
 from dotenv import load_dotenv
@@ -7,19 +7,39 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL not set in .env")
 
-engine = create_engine(
-    DATABASE_URL,
-    future=True,
-    pool_pre_ping=True 
-)
-
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+# Opt-in async mode: DB_ASYNC=1 switches the routers to AsyncSession handlers.
+ASYNC_DB = os.getenv("DB_ASYNC", "").strip().lower() in {"1", "true", "yes"}
 
 Base = declarative_base()
 
+_engine = None
+_SessionFactory = sessionmaker(autocommit=False, autoflush=False, future=True)
+
+def get_engine():
+    """Created on first use: importing the app neither needs DATABASE_URL nor connects."""
+    global _engine
+    if _engine is None:
+        if not DATABASE_URL:
+            raise RuntimeError("DATABASE_URL not set in .env")
+        _engine = create_engine(
+            DATABASE_URL,
+            future=True,
+            pool_pre_ping=True 
+        )
+        _SessionFactory.configure(bind=_engine)
+    return _engine
+
+def SessionLocal(**kwargs) -> Session:
+    get_engine()
+    return _SessionFactory(**kwargs)
+
+def __getattr__(name: str):
+    # `from app.db import engine` keeps working, creating the engine at that point
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 @contextmanager
 def session_scope():
     db = SessionLocal()
@@ -32,9 +52,60 @@ def session_scope():
     finally:
         db.close()
 
+def dialect_insert(db: Session):
+    """`insert` construct with ON CONFLICT support for the session's dialect."""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Upsert not supported on dialect {name!r}")
+    return insert
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# ----- async (opt-in)
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url() -> str:
+    """ASYNC_DATABASE_URL, or DATABASE_URL rewritten to its async driver (asyncpg / aiosqlite)."""
+    url = os.getenv("ASYNC_DATABASE_URL")
+    if url:
+        return url
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL not set in .env")
+    scheme, sep, rest = DATABASE_URL.partition("://")
+    if "+" in scheme:
+        scheme = scheme.split("+", 1)[0]
+    if scheme not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver known for {scheme!r}; set ASYNC_DATABASE_URL")
+    return f"{_ASYNC_DRIVERS[scheme]}{sep}{rest}"
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    """Created on first use so sync-only deployments never import the async driver."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        _async_engine = create_async_engine(async_database_url(), pool_pre_ping=True)
+        # expire_on_commit=False: attribute access after commit would need a lazy (sync) load
+        _AsyncSessionLocal = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
@@ -1,11 +1,43 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.db import Base, engine
-from app.router import plan, auth  
+from fastapi.middleware.gzip import GZipMiddleware
+import logging
+import os
+from app.db import SessionLocal, get_engine
+from app.router import plan, auth, meals
+from app.services.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_pool, instrument_sqlalchemy, render_metrics
+from app.services.passwords import shutdown_password_pool
+from app.services.query_budget import QueryBudgetMiddleware
+from app.services.warmup import readiness, warm_up, warm_up_async_engine
 
-Base.metadata.create_all(bind=engine)
+log = logging.getLogger(__name__)
 
-app = FastAPI(title="Fitness Backend")
+# PREGEN_IN_PROCESS=1 runs the off-peak plan pre-generator inside this worker
+PREGEN_IN_PROCESS = os.getenv("PREGEN_IN_PROCESS", "").strip().lower() in {"1", "true", "yes"}
+
+# No DB work at import: schema comes from Alembic, connections and catalogs are warmed here.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    instrument_pool(get_engine())
+    await run_in_threadpool(warm_up)
+    try:
+        await warm_up_async_engine()
+    except Exception as exc:
+        log.warning("async engine warm-up failed: %s", exc)
+    if PREGEN_IN_PROCESS:
+        from app.services.plan_pregen import start_background_pregen
+        start_background_pregen(SessionLocal)
+    try:
+        yield
+    finally:
+        if PREGEN_IN_PROCESS:
+            from app.services.plan_pregen import stop_background_pregen
+            stop_background_pregen()
+        shutdown_password_pool()
+
+app = FastAPI(title="Fitness Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,8 +47,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# compress bodies above GZIP_MIN_SIZE bytes for clients that send Accept-Encoding: gzip
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")),
+    compresslevel=int(os.getenv("GZIP_LEVEL", "6")),
+)
+
+# dev only: QUERY_BUDGET_MODE=warn|raise checks each request against its route's budget
+app.add_middleware(QueryBudgetMiddleware)
+
+# outermost, so request timings include compression
+app.add_middleware(MetricsMiddleware)
+instrument_sqlalchemy()
+
 app.include_router(auth.router)  
 app.include_router(plan.router)
+app.include_router(meals.router)
 
 @app.get("/")
 def root():
@@ -25,3 +72,19 @@ def root():
 @app.get("/health")
 def health():
     return {"ok": True}
+
+@app.get("/health/live")
+def health_live():
+    # process is up; never touches the database
+    return {"ok": True}
+
+@app.get("/health/ready")
+def health_ready(response: Response):
+    ok, state = readiness()
+    if not ok:
+        response.status_code = 503
+    return {"ok": ok, "warmup_ms": state["steps"], "error": state["error"]}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, String, Integer, Float, Text, Date, DateTime, JSON,
-    ForeignKey, UniqueConstraint, func
+    ForeignKey, Index, UniqueConstraint, func
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -36,6 +36,7 @@ class UserProfile(Base):
     diet_type = Column(Text)        
     fav_protein = Column(Text)
     experience_level = Column(Text) 
+    timezone = Column(Text)         # IANA name, e.g. "Asia/Kolkata"; NULL = UTC
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     user = relationship("User", back_populates="profile")
@@ -70,6 +71,7 @@ class MealLibrary(Base):
     __tablename__ = "meal_library"
 
     id = Column(UUID(as_uuid=False), primary_key=True, default=uuid_pk)
+    slug = Column(Text, nullable=True)                # natural key for catalog imports (upsert target)
     name = Column(Text, nullable=False)               
     category = Column(Text, nullable=False)          
     diet_type = Column(Text, nullable=False)        
@@ -78,6 +80,23 @@ class MealLibrary(Base):
     instructions = Column(Text)                       
     macros = Column(JSON, nullable=False)             
     tags = Column(JSON)                               
+    # GIN (goal_flags) and trigram (name, ingredients) indexes are PostgreSQL-only: see migration 5d8a1f3c9e42
+    __table_args__ = (
+        UniqueConstraint("slug", name="uq_meal_library_slug"),
+        Index("ix_meal_library_category_diet", "category", "diet_type", "name"),
+        Index("ix_meal_library_name_id", "name", "id"),
+    )
+
+class PlanArchetype(Base):
+    """A week's meals or workouts shared by every plan built from the same section inputs."""
+    __tablename__ = "plan_archetypes"
+    id = Column(Integer, primary_key=True)
+    week_start_date = Column(Date, nullable=False)
+    section = Column(Text, nullable=False)         # meals | workouts
+    key = Column(String(16), nullable=False)       # digest of the section inputs and catalog version
+    content = Column(JSON, nullable=False)         # the section's weekly_plans columns, e.g. {"week_workouts": ...}
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    __table_args__ = (UniqueConstraint("week_start_date", "section", "key", name="uq_plan_archetype"),)
 
 class WeeklyPlan(Base):
     __tablename__ = "weekly_plans"
@@ -85,11 +104,45 @@ class WeeklyPlan(Base):
     user_id = Column(UUID(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     week_start_date = Column(Date, nullable=False, index=True)
     daily_targets = Column(JSON, nullable=False)   
-    week_meals = Column(JSON, nullable=False)      
-    week_workouts = Column(JSON, nullable=False)   
-    grocery_list = Column(JSON, nullable=False)   
+    # meal/workout columns are NULL when the section comes from an archetype (see plan_archetypes)
+    week_meals = Column(JSON, nullable=True)       # {dow: [{label, meal_id}]}, hydrated from meal_library on read
+    week_workouts = Column(JSON, nullable=True)    # {dow: {focus, details, coachNote, blocks}} ({program, day} refs on old rows)
+    grocery_list = Column(JSON, nullable=True)     # [{item, quantity, unit, meals, text}] (plain strings on old rows)
+    meals_archetype_id = Column(Integer, ForeignKey("plan_archetypes.id", name="fk_weekly_plans_meals_archetype"),
+                                nullable=True)
+    workouts_archetype_id = Column(Integer, ForeignKey("plan_archetypes.id", name="fk_weekly_plans_workouts_archetype"),
+                                   nullable=True)
     goal = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True)   # sha256 of the plan JSON, used as ETag
+    input_fingerprints = Column(JSON, nullable=True)   # section -> digest of the profile inputs it was built from
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user = relationship("User", back_populates="plans")
     __table_args__ = (UniqueConstraint("user_id", "week_start_date", name="uq_user_week"),)
+
+class PlanDay(Base):
+    """One day of a weekly plan, so GET /plan/today reads a single small row (PLAN_DAY_ROWS=1)."""
+    __tablename__ = "plan_days"
+    user_id = Column(UUID(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    week_start_date = Column(Date, nullable=False)
+    daily_targets = Column(JSON, nullable=False)
+    meals = Column(JSON, nullable=False)           # that day's [{label, meal_id}], as in week_meals
+    workout = Column(JSON, nullable=False)         # that day's entry of week_workouts
+    program_slug = Column(Text, nullable=False)    # blocks for old rows whose workout has none compiled in
+    plan_hash = Column(String(64), nullable=False) # content_hash of the weekly plan it was cut from
+    input_fingerprints = Column(JSON, nullable=False)
+
+class PlanPregenJob(Base):
+    """Progress of pre-building one week's plans for one timezone bucket."""
+    __tablename__ = "plan_pregen_jobs"
+    id = Column(Integer, primary_key=True)
+    week_start_date = Column(Date, nullable=False)
+    tz_bucket = Column(Text, nullable=False)
+    status = Column(Text, nullable=False, default="pending")   # pending | running | done | expired
+    cursor_user_id = Column(UUID(as_uuid=False), nullable=True) # last user_id processed (keyset)
+    processed = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (UniqueConstraint("week_start_date", "tz_bucket", name="uq_pregen_week_tz"),)
@@ -76,3 +76,9 @@ class ProgramWeekTemplate(Base):
         UniqueConstraint("program_id", "weekday", name="uq_program_weekday"),
         CheckConstraint("weekday BETWEEN 1 AND 7", name="ck_weekday_1_7"),
     )
+
+class CatalogVersion(Base):
+    """Version stamp per catalog; seeders bump it so in-process caches reload."""
+    __tablename__ = "catalog_version"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
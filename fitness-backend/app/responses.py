@@ -0,0 +1,31 @@
+# app/responses.py
+from __future__ import annotations
+import time
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; pydantic-core's encoder is the fallback
+    orjson = None
+
+from pydantic_core import to_json
+
+from app.services.metrics import note_render
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered straight from plain dicts.
+
+    Handlers that return this skip FastAPI's jsonable_encoder pass; content must
+    already be JSON-shaped (dicts, lists, str/int/float/bool/None, dates).
+    """
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        if orjson is not None:
+            body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            body = to_json(content)
+        note_render(time.perf_counter() - started)
+        return body
@@ -2,10 +2,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
-import bcrypt
 
-from app.db import get_db
+from app.db import ASYNC_DB, get_async_db, get_db
 from app.models import User, UserProfile
+from app.services.passwords import PasswordPoolBusy, hash_password, hash_password_async
+from app.services.query_budget import route_query_budget
 from fastapi import Query
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -28,14 +29,16 @@ class ProfileReq(BaseModel):
     diet_type: str | None = None
     fav_protein: str | None = None
     experience_level: str | None = None
+    timezone: str | None = None     # IANA name; kept as-is when omitted
 
-@router.post("/signup")
-def signup(req: SignupReq, db: Session = Depends(get_db)):
-    exists = db.query(User).filter(User.email == req.email).one_or_none()
-    if exists:
-        raise HTTPException(status_code=400, detail="Email already registered")
+def _pool_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Too many sign-ups in progress, retry shortly",
+                         headers={"Retry-After": "1"})
 
-    pwd_hash = bcrypt.hashpw(req.password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(User).filter(User.email == email).one_or_none() is not None
+
+def _create_user(db: Session, req: SignupReq, pwd_hash: str) -> dict:
     user = User(
         first_name=req.first_name,
         last_name=req.last_name,
@@ -52,8 +55,7 @@ def signup(req: SignupReq, db: Session = Depends(get_db)):
 
     return {"userId": str(user.id)}
 
-@router.post("/profile/setup")
-def save_profile(req: ProfileReq, db: Session = Depends(get_db)):
+def _save_profile(db: Session, req: ProfileReq) -> dict:
     profile = db.query(UserProfile).filter(UserProfile.user_id == req.user_id).one_or_none()
     if not profile:
         # create if missing
@@ -71,15 +73,13 @@ def save_profile(req: ProfileReq, db: Session = Depends(get_db)):
     profile.diet_type = req.diet_type
     profile.fav_protein = req.fav_protein
     profile.experience_level = req.experience_level
+    if req.timezone:
+        profile.timezone = req.timezone
 
     db.commit()
     return {"ok": True}
 
-# --- READ-ONLY: get existing user profile ---
-@router.get("/profile")
-def get_profile(user_id: str = Query(..., description="User ID"),
-                db: Session = Depends(get_db)):
-    """Return stored profile for debugging."""
+def _profile_payload(db: Session, user_id: str) -> dict:
     profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -94,5 +94,59 @@ def get_profile(user_id: str = Query(..., description="User ID"),
         "sex": profile.sex,
         "fav_protein": profile.fav_protein,
         "experience_level": profile.experience_level,
+        "timezone": profile.timezone,
     }
 
+if not ASYNC_DB:
+    @router.post("/signup")
+    @route_query_budget(4)
+    def signup(req: SignupReq, db: Session = Depends(get_db)):
+        if _email_taken(db, req.email):
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+        try:
+            pwd_hash = hash_password(req.password)
+        except PasswordPoolBusy:
+            raise _pool_busy()
+        return _create_user(db, req, pwd_hash)
+
+    @router.post("/profile/setup")
+    @route_query_budget(3)
+    def save_profile(req: ProfileReq, db: Session = Depends(get_db)):
+        return _save_profile(db, req)
+
+    # --- READ-ONLY: get existing user profile ---
+    @router.get("/profile")
+    @route_query_budget(1)
+    def get_profile(user_id: str = Query(..., description="User ID"),
+                    db: Session = Depends(get_db)):
+        """Return stored profile for debugging."""
+        return _profile_payload(db, user_id)
+
+else:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    @router.post("/signup")
+    @route_query_budget(4)
+    async def signup(req: SignupReq, db: AsyncSession = Depends(get_async_db)):
+        if await db.run_sync(_email_taken, req.email):
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+        try:
+            pwd_hash = await hash_password_async(req.password)
+        except PasswordPoolBusy:
+            raise _pool_busy()
+        return await db.run_sync(_create_user, req, pwd_hash)
+
+    @router.post("/profile/setup")
+    @route_query_budget(3)
+    async def save_profile(req: ProfileReq, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(_save_profile, req)
+
+    @router.get("/profile")
+    @route_query_budget(1)
+    async def get_profile(user_id: str = Query(..., description="User ID"),
+                          db: AsyncSession = Depends(get_async_db)):
+        """Return stored profile for debugging."""
+        return await db.run_sync(_profile_payload, user_id)
+
@@ -0,0 +1,61 @@
+# app/routers/meals.py
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.db import ASYNC_DB, get_async_db, get_db
+from app.services.meal_search import MAX_LIMIT, InvalidCursor, search_meals
+from app.services.query_budget import route_query_budget
+from app.responses import FastJSONResponse
+
+router = APIRouter(prefix="/meals", tags=["meals"])
+
+# ----- Schemas
+class MealOut(BaseModel):
+    id: str
+    name: str
+    category: str
+    diet_type: str
+    goal_flags: List[str]
+    ingredients: List[Any]
+    instructions: str
+    macros: Dict[str, Any]
+    tags: List[Any]
+
+class MealSearchOut(BaseModel):
+    items: List[MealOut]
+    next_cursor: str | None   # pass back as `cursor` for the next page; None on the last page
+
+def _search(db: Session, params: Dict[str, Any]):
+    try:
+        items, next_cursor = search_meals(db, **params)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
+
+def _params(
+    q: str | None = Query(default=None, description="Text in the meal name or its ingredients"),
+    category: str | None = None,
+    diet_type: str | None = None,
+    goal: str | None = None,
+    tag: List[str] = Query(default=[], description="Repeat for several; all must match"),
+    limit: int = Query(default=20, ge=1, le=MAX_LIMIT),
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    return {"q": q, "category": category, "diet_type": diet_type, "goal": goal,
+            "tags": tag, "limit": limit, "cursor": cursor}
+
+if not ASYNC_DB:
+    @router.get("/search", response_model=MealSearchOut)
+    @route_query_budget(1)
+    def search(params: Dict[str, Any] = Depends(_params), db: Session = Depends(get_db)):
+        return _search(db, params)
+
+else:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    @router.get("/search", response_model=MealSearchOut)
+    @route_query_budget(1)
+    async def search(params: Dict[str, Any] = Depends(_params), db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(_search, params)
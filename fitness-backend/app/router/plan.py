@@ -1,70 +1,310 @@
 # app/routers/plan.py
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from datetime import date
 
-from app.db import get_db
-from app.services.plan_builder import get_or_build_current_week, slice_today
-from app.services.fitness_blocks import get_today_blocks
+from app.db import ASYNC_DB, get_async_db, get_db
+from app.services.plan_builder import (
+    get_current_week_and_profile, get_current_week_and_profile_async,
+    get_or_build_current_week, get_or_build_current_week_async, get_today, get_today_async, hydrate_day,
+    DOW_KEYS, day_blocks, hydrate_plan, load_plan_archetypes, plan_hash, program_slug_for, slice_today,
+)
+from app.services.meal_index import get_meal_index
+from app.services.program_catalog import get_program_catalog
+from app.services.query_budget import route_query_budget
+from app.services.response_cache import CachedResponse, plan_cache
 from app.models import UserProfile  # to read goal/experience for slug
+from app.responses import FastJSONResponse
 
 router = APIRouter(prefix="/plan", tags=["plan"])
 
-def _norm_goal(g: str | None) -> str:
-    g = (g or "").strip().lower()
-    if g in {"build muscle", "muscle_gain", "muscle", "bulk"}:
-        return "muscle_gain"
-    if g in {"lose fat", "fat_loss", "cut"}:
-        return "fat_loss"
-    if g in {"performance", "athletic"}:
-        return "performance"
-    return "recomp"
-
-def _norm_level(lv: str | None) -> str:
-    lv = (lv or "beginner").strip().lower()
-    return lv if lv in {"beginner","intermediate","advanced"} else "beginner"
-
-def _program_slug_for(db: Session, user_id: str) -> str:
-    prof = db.query(UserProfile).filter_by(user_id=user_id).one_or_none()
+# ----- Schemas (response contract / OpenAPI; handlers render plain dicts with FastJSONResponse)
+class DailyTargets(BaseModel):
+    calorieTarget: int
+    proteinTarget: int
+    carbsTarget: int
+    fatTarget: int
+
+class MealSlot(BaseModel):
+    label: str
+    meal: Dict[str, Any]    # name, category, ingredients, instructions, macros, tags ({} if none)
+    portion: float | None = None   # serving multiplier, sent only with MEAL_OPTIMIZER (absent: 1x); macros are per 1x
+
+class WorkoutDay(BaseModel):
+    focus: str
+    details: List[Any]
+    coachNote: str
+
+class GroceryItem(BaseModel):
+    item: str
+    quantity: float | None   # summed over the week, in `unit`; None for "to taste" items
+    unit: str | None         # g/kg, ml/l, a count unit like "slice", or "" for plain counts
+    meals: int | None        # servings over the week that use the item
+    text: str                # display line, same as the matching grocery_list entry
+
+class WeekPlanOut(BaseModel):
+    daily_targets: DailyTargets
+    week_meals: Dict[str, List[MealSlot]]
+    week_workouts: Dict[str, WorkoutDay]
+    grocery_list: List[str]
+    grocery_items: List[GroceryItem]
+    week_start_date: str
+
+class CurrentPlanOut(BaseModel):
+    daily_targets: DailyTargets
+    today_meals: List[MealSlot]
+    workout_today: WorkoutDay
+    week_meals: Dict[str, List[MealSlot]]
+    week_workouts: Dict[str, WorkoutDay]
+    grocery_list: List[str]
+    grocery_items: List[GroceryItem]
+    is_rest_day: bool
+    warmup: Dict[str, Any] | None
+    cooldown: Dict[str, Any] | None
+    rest_recovery: Dict[str, Any] | None
+    workout_title: str | None
+    workout_focus: str | None
+
+class TodayPlanOut(BaseModel):
+    date: str
+    daily_targets: DailyTargets
+    today_meals: List[MealSlot]
+    workout_today: WorkoutDay
+    is_rest_day: bool
+    warmup: Dict[str, Any] | None
+    cooldown: Dict[str, Any] | None
+    rest_recovery: Dict[str, Any] | None
+    workout_title: str | None
+    workout_focus: str | None
+
+def _program_slug_for(prof: UserProfile | None) -> str:
     if not prof:
         return "muscle_gain_beginner"  # safe default
-    g = _norm_goal(prof.goal)
-    lv = _norm_level(prof.experience_level)
     # this matches the slug seeded by app/seed_fitness.py, e.g. "muscle_gain_beginner"
-    return f"{g}_{lv}"
+    return program_slug_for(prof.goal, prof.experience_level)
+
+# Clients may cache but must revalidate with If-None-Match every time.
+CACHE_CONTROL = "private, no-cache"
+
+def _etag(*parts: object) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as RFC 9110 requires for If-None-Match
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return etag in tags
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
-@router.post("/generate-week")
-def generate_week(userId: str, db: Session = Depends(get_db)):
-    # get_or_build_current_week should internally call the updated workout engine
-    plan = get_or_build_current_week(db, userId, date.today())
+def _validators(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def _week_etag(plan, catalog, meal_index) -> str:
+    # stored plans reference catalog rows, so the catalog versions are part of the body
+    return _etag(plan_hash(plan), plan.week_start_date, catalog.version, meal_index.version)
+
+def _current_etag(plan, today: date, slug: str, catalog, meal_index) -> str:
+    # today's slice and the program blocks are part of the /current body
+    return _etag(plan_hash(plan), today, slug, catalog.version, meal_index.version)
+
+def _today_etag(day: dict, today: date, catalog, meal_index) -> str:
+    return _etag("today", day["plan_hash"], today, day["program_slug"], catalog.version, meal_index.version)
+
+def _catalogs(db: Session):
+    return get_program_catalog(db), get_meal_index(db)
+
+def _hydrate(db: Session, plan, catalog, meal_index):
+    return hydrate_plan(plan, catalog, meal_index, load_plan_archetypes(db, plan))
+
+def _week_payload(plan) -> dict:
     return {
         "daily_targets": plan.daily_targets,
         "week_meals": plan.week_meals,
         "week_workouts": plan.week_workouts,
         "grocery_list": plan.grocery_list,
+        "grocery_items": plan.grocery_items,
         "week_start_date": str(plan.week_start_date),
     }
 
-@router.get("/current")
-def current(
-    userId: str,
-    db: Session = Depends(get_db),
-    # allow override for debugging, but default to derived slug:
-    programSlug: str | None = None,
-):
-    today = date.today()
-    plan = get_or_build_current_week(db, userId, today)
-    payload = slice_today(plan, today)
+def _blocks_fields(blocks: dict) -> dict:
+    return {
+        "is_rest_day": blocks["is_rest"],
+        "warmup": blocks["warmup"],
+        "cooldown": blocks["cooldown"],
+        "rest_recovery": blocks["rest"],
+        "workout_title": blocks["title"],
+        "workout_focus": blocks["focus"],
+    }
 
-    # 🔑 derive the correct program slug from the user’s profile
-    slug = programSlug or _program_slug_for(db, userId)
-
-    # enrich with warmup/cooldown/rest using the RIGHT slug
-    blocks = get_today_blocks(db, slug, today)
-    payload["is_rest_day"] = blocks["is_rest"]
-    payload["warmup"] = blocks["warmup"]
-    payload["cooldown"] = blocks["cooldown"]
-    payload["rest_recovery"] = blocks["rest"]
-    payload["workout_title"] = blocks["title"]
-    payload["workout_focus"] = blocks["focus"]
+def _current_payload(plan, today: date, blocks: dict) -> dict:
+    payload = slice_today(plan, today)
+    payload.update(_blocks_fields(blocks))
     return payload
+
+def _current_blocks(view, today: date, slug: str, override: str | None, catalog) -> dict:
+    if override:
+        return catalog.today_blocks(override, today.isoweekday())
+    # the stored reference names the program the workout engine picked
+    return day_blocks(view.week_blocks.get(DOW_KEYS[today.weekday()]), catalog, slug, today.isoweekday())
+
+def _from_cache(hit: CachedResponse | None) -> Response | None:
+    if hit is None:
+        return None
+    return Response(hit.body, media_type="application/json", headers=_validators(hit.etag))
+
+def _today_response(day: dict, today: date, catalog, meal_index, if_none_match: str | None) -> Response:
+    etag = _today_etag(day, today, catalog, meal_index)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    meals, workout, blocks = hydrate_day(day, catalog, meal_index, today.isoweekday())
+    payload = {
+        "date": str(today),
+        "daily_targets": day["daily_targets"],
+        "today_meals": meals,
+        "workout_today": workout,
+        **_blocks_fields(blocks),
+    }
+    return FastJSONResponse(payload, headers=_validators(etag))
+
+# Query budgets (QUERY_BUDGET_MODE): a warm /plan request is one joined query; a
+# (re)build adds advisory lock, recheck, archetype lookup (plus insert and re-read for a
+# new archetype), upsert and reload, and archetypes not cached yet cost one read.
+# PLAN_DAY_ROWS adds the plan_days upsert (and its archetype read) to a build, and
+# /today's fallback to the weekly plan rewrites them. Catalog reloads are exempt.
+# With PLAN_CACHE, a repeat /current or /generate-week with an unchanged ETag runs only
+# the plan read (and no archetype reads).
+# The warm read itself has a budget of 2 (budgeted() on plan_builder._load_current, checked
+# in dev per QUERY_BUDGET_MODE and enforced by tests/test_plan_current.py).
+if not ASYNC_DB:
+    @router.post("/generate-week", response_model=WeekPlanOut)
+    @route_query_budget(11)
+    def generate_week(userId: str, db: Session = Depends(get_db)):
+        today = date.today()
+        catalog, meal_index = _catalogs(db)
+        # get_or_build_current_week should internally call the updated workout engine
+        plan = get_or_build_current_week(db, userId, today)
+        etag = _week_etag(plan, catalog, meal_index)
+        cache_key = plan_cache.key("generate-week", userId, etag)
+        cached = _from_cache(plan_cache.get("generate-week", cache_key))
+        if cached is not None:
+            return cached
+
+        view = _hydrate(db, plan, catalog, meal_index)
+        response = FastJSONResponse(_week_payload(view), headers=_validators(etag))
+        plan_cache.put(cache_key, response.body, etag)
+        return response
+
+    @router.get("/current", response_model=CurrentPlanOut)
+    @route_query_budget(11)
+    def current(
+        userId: str,
+        db: Session = Depends(get_db),
+        # debugging: show blocks of another program instead of the plan's own
+        programSlug: str | None = None,
+        if_none_match: str | None = Header(default=None),
+    ):
+        today = date.today()
+        catalog, meal_index = _catalogs(db)
+        # plan + profile come back from one joined query on the common path
+        plan, profile = get_current_week_and_profile(db, userId, today)
+
+        # plans built before workouts stored a blocks reference look their blocks up by this slug
+        slug = programSlug or _program_slug_for(profile)
+
+        etag = _current_etag(plan, today, slug, catalog, meal_index)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        # rendered bodies are cached by ETag; the debugging override bypasses it
+        cache_key = None if programSlug else plan_cache.key("current", userId, etag)
+        cached = _from_cache(plan_cache.get("current", cache_key))
+        if cached is not None:
+            return cached
+
+        view = _hydrate(db, plan, catalog, meal_index)
+        blocks = _current_blocks(view, today, slug, programSlug, catalog)
+        response = FastJSONResponse(_current_payload(view, today, blocks), headers=_validators(etag))
+        plan_cache.put(cache_key, response.body, etag)
+        return response
+
+    @router.get("/today", response_model=TodayPlanOut)
+    @route_query_budget(13)
+    def today_plan(
+        userId: str,
+        db: Session = Depends(get_db),
+        if_none_match: str | None = Header(default=None),
+    ):
+        today = date.today()
+        # with PLAN_DAY_ROWS, one small plan_days row joined to the profile
+        day = get_today(db, userId, today)
+        catalog, meal_index = _catalogs(db)
+        return _today_response(day, today, catalog, meal_index, if_none_match)
+
+else:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    @router.post("/generate-week", response_model=WeekPlanOut)
+    @route_query_budget(11)
+    async def generate_week(userId: str, db: AsyncSession = Depends(get_async_db)):
+        today = date.today()
+        catalog, meal_index = await db.run_sync(_catalogs)
+        plan = await get_or_build_current_week_async(db, userId, today)
+        etag = _week_etag(plan, catalog, meal_index)
+        cache_key = plan_cache.key("generate-week", userId, etag)
+        cached = _from_cache(await plan_cache.get_async("generate-week", cache_key))
+        if cached is not None:
+            return cached
+
+        view = await db.run_sync(_hydrate, plan, catalog, meal_index)
+        response = FastJSONResponse(_week_payload(view), headers=_validators(etag))
+        await plan_cache.put_async(cache_key, response.body, etag)
+        return response
+
+    @router.get("/current", response_model=CurrentPlanOut)
+    @route_query_budget(11)
+    async def current(
+        userId: str,
+        db: AsyncSession = Depends(get_async_db),
+        programSlug: str | None = None,
+        if_none_match: str | None = Header(default=None),
+    ):
+        today = date.today()
+        catalog, meal_index = await db.run_sync(_catalogs)
+        plan, profile = await get_current_week_and_profile_async(db, userId, today)
+        slug = programSlug or _program_slug_for(profile)
+
+        etag = _current_etag(plan, today, slug, catalog, meal_index)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        cache_key = None if programSlug else plan_cache.key("current", userId, etag)
+        cached = _from_cache(await plan_cache.get_async("current", cache_key))
+        if cached is not None:
+            return cached
+
+        view = await db.run_sync(_hydrate, plan, catalog, meal_index)
+        blocks = _current_blocks(view, today, slug, programSlug, catalog)
+        response = FastJSONResponse(_current_payload(view, today, blocks), headers=_validators(etag))
+        await plan_cache.put_async(cache_key, response.body, etag)
+        return response
+
+    @router.get("/today", response_model=TodayPlanOut)
+    @route_query_budget(13)
+    async def today_plan(
+        userId: str,
+        db: AsyncSession = Depends(get_async_db),
+        if_none_match: str | None = Header(default=None),
+    ):
+        today = date.today()
+        day = await get_today_async(db, userId, today)
+        catalog, meal_index = await db.run_sync(_catalogs)
+        return _today_response(day, today, catalog, meal_index, if_none_match)
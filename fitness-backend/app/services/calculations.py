@@ -1,5 +1,8 @@
 from __future__ import annotations
-from typing import Literal, Dict
+from typing import TYPE_CHECKING, Any, Dict, Literal, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
 
 Activity = Literal["Sedentary", "Light", "Moderate", "Intense"]
 Goal     = Literal["Lose Fat", "Build Muscle", "Maintain"]
@@ -81,3 +84,72 @@ def compute_daily_targets(
     b = mifflin_st_jeor(sex, age, height_cm, weight_kg)
     td = tdee(b, activity)
     return macro_targets(td, goal, weight_kg)
+
+def _column(values: Sequence[Any]):
+    """Numeric column as float64; None (or NaN) becomes NaN."""
+    import numpy as np
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+def _lookup(values: Sequence[Any], fn) -> "np.ndarray":
+    """Apply a scalar rule once per distinct value, then broadcast back to the column."""
+    import numpy as np
+    lut = {v: fn(v) for v in set(values)}
+    return np.fromiter((lut[v] for v in values), dtype=np.float64, count=len(values))
+
+def compute_daily_targets_batch(
+    sex: Sequence[str | None],
+    age: Sequence[int | None],
+    height_cm: Sequence[float | None],
+    weight_kg: Sequence[float | None],
+    activity: Sequence[Activity | str | None],
+    goal: Sequence[Goal | str | None],
+) -> Dict[str, "np.ndarray"]:
+    """
+    Columnar `compute_daily_targets` (NumPy). Every argument is a sequence of the
+    same length; returns int64 arrays under the same four keys.
+    Matches the scalar path value-for-value: incomplete rows get the 1700 kcal
+    BMR fallback, missing weight uses 70 kg, and rem_kcal keeps its 40% floor.
+    """
+    import numpy as np
+
+    n = len(sex)
+    if not all(len(c) == n for c in (age, height_cm, weight_kg, activity, goal)):
+        raise ValueError("all input columns must have the same length")
+
+    a = _column(age)
+    h = _column(height_cm)
+    w = _column(weight_kg)
+
+    # mifflin_st_jeor: any missing/zero input -> 1700.0
+    complete = np.isfinite(a) & np.isfinite(h) & np.isfinite(w) & (a != 0) & (h != 0) & (w != 0)
+    s = _lookup(sex, lambda v: 5 if (v or "").lower().startswith("m") else -161)
+    with np.errstate(invalid="ignore"):
+        bmr = np.where(complete, 10 * w + 6.25 * h - 5 * a + s, 1700.0)
+
+    # tdee
+    td = bmr * _lookup(activity, lambda v: ACTIVITY_MULT.get(str(v or "Light"), 1.375))
+
+    # macro_targets
+    g = [(v or "Maintain") for v in goal]
+    cal_mult = _lookup(g, lambda v: 0.85 if v == "Lose Fat" else 1.07 if v == "Build Muscle" else 1.0)
+    prot_per_kg = _lookup(g, lambda v: 2.1 if v == "Lose Fat" else 2.0 if v == "Build Muscle" else 1.8)
+    carb_share = _lookup(g, lambda v: 0.45 if v == "Lose Fat" else 0.50)
+    fat_share = _lookup(g, lambda v: 0.30 if v == "Lose Fat" else 0.25)
+
+    # the scalar path multiplies only for the two goal branches; x * 1.0 is exact
+    calories = np.rint(td * cal_mult).astype(np.int64)
+
+    w_or_default = np.where(np.isfinite(w) & (w != 0), w, 70.0)
+    protein_g = np.rint(w_or_default * prot_per_kg).astype(np.int64)
+
+    rem_kcal = np.maximum(calories - protein_g * 4, np.trunc(calories * 0.4).astype(np.int64))
+
+    carbs_kcal = np.trunc(rem_kcal * carb_share).astype(np.int64)
+    fat_kcal = np.trunc(rem_kcal * fat_share).astype(np.int64)
+
+    return {
+        "calorieTarget": calories,
+        "proteinTarget": protein_g,
+        "carbsTarget":   np.rint(carbs_kcal / 4).astype(np.int64),
+        "fatTarget":     np.rint(fat_kcal / 9).astype(np.int64),
+    }
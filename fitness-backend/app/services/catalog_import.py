@@ -0,0 +1,399 @@
+# app/services/catalog_import.py
+"""Bulk import of the program and meal catalogs.
+
+Sources are JSON (a list of rows, or `{kind: [rows]}`), JSON Lines, CSV or
+YAML files (YAML needs PyYAML). Rows are read lazily, validated a batch at a
+time, and written with one multi-row INSERT ... ON CONFLICT DO UPDATE per batch,
+keyed on each table's natural key (slugs, program + day/weekday). Every batch
+is its own transaction. Invalid rows are reported and skipped, and re-running
+an import updates rows in place.
+
+Program days and weeks refer to programs, warm-ups, cool-downs and rest days
+by slug. Kinds are imported in dependency order, so one file (or one run) can
+hold a whole program. Meals without a slug get one derived from name,
+category and diet, so re-imports update them instead of adding duplicates.
+"""
+from __future__ import annotations
+import csv
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models import MealLibrary, uuid_pk
+from app.models_fitness import (
+    CooldownBlock, ProgramDayTemplate, ProgramTemplate, ProgramWeekTemplate, RestDayTemplate, WarmupBlock,
+)
+from app.services.catalog_version import MEAL_CATALOG, PROGRAM_CATALOG, bump_catalog_version
+
+BATCH_SIZE = 1000
+
+# ----- row schemas
+
+class BlockRow(BaseModel):
+    slug: str
+    name: str
+    content: Dict[str, Any]
+
+class ProgramRow(BaseModel):
+    slug: str
+    name: str
+    goal: str
+    level: str
+    days_per_week: int = Field(ge=0, le=7)
+    duration_weeks: int = 4
+    is_active: bool = True
+
+class ProgramDayRow(BaseModel):
+    program: str                     # program slug
+    day_number: int = Field(ge=1)
+    name: str
+    focus: Optional[str] = ""
+    warmup: Optional[str] = None     # warm-up block slug
+    cooldown: Optional[str] = None   # cool-down block slug
+    coach_note: Optional[str] = None
+    details: List[Any] = []
+
+class ProgramWeekRow(BaseModel):
+    program: str                     # program slug
+    weekday: int = Field(ge=1, le=7)
+    day_number: Optional[int] = None
+    is_rest: bool = False
+    rest: Optional[str] = None       # rest day slug
+
+class MealRow(BaseModel):
+    slug: Optional[str] = None
+    name: str
+    category: str
+    diet_type: str
+    goal_flags: List[str]
+    ingredients: List[str] = []
+    instructions: Optional[str] = None
+    macros: Dict[str, Any]
+    tags: List[str] = []
+
+# ----- kinds
+
+Refs = Dict[str, Dict[str, int]]   # "program" / "warmup" / ... -> slug -> id
+
+class RowError(ValueError):
+    """A row that validated but cannot be written (e.g. an unknown slug)."""
+
+def _ref(refs: Refs, kind: str, slug: Optional[str]) -> Optional[int]:
+    if slug is None:
+        return None
+    try:
+        return refs[kind][slug]
+    except KeyError:
+        raise RowError(f"unknown {kind} {slug!r}") from None
+
+def _block_values(row: BlockRow, refs: Refs) -> Dict[str, Any]:
+    return row.model_dump()
+
+def _program_values(row: ProgramRow, refs: Refs) -> Dict[str, Any]:
+    return row.model_dump()
+
+def _day_values(row: ProgramDayRow, refs: Refs) -> Dict[str, Any]:
+    return {
+        "program_id": _ref(refs, "program", row.program),
+        "day_number": row.day_number,
+        "name": row.name,
+        "focus": row.focus,
+        "warmup_block_id": _ref(refs, "warmup", row.warmup),
+        "cooldown_block_id": _ref(refs, "cooldown", row.cooldown),
+        "coach_note": row.coach_note,
+        "details_json": row.details,
+    }
+
+def _week_values(row: ProgramWeekRow, refs: Refs) -> Dict[str, Any]:
+    if row.rest is not None:
+        _ref(refs, "rest", row.rest)
+    return {
+        "program_id": _ref(refs, "program", row.program),
+        "weekday": row.weekday,
+        "day_number": row.day_number,
+        "is_rest": row.is_rest,
+        "rest_slug": row.rest,
+    }
+
+def meal_slug(name: str, category: str, diet_type: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", f"{name} {category} {diet_type}".lower()).strip("-")
+
+def _meal_values(row: MealRow, refs: Refs) -> Dict[str, Any]:
+    values = row.model_dump()
+    values["slug"] = row.slug or meal_slug(row.name, row.category, row.diet_type)
+    values["id"] = uuid_pk()   # only used when the slug is new
+    return values
+
+@dataclass(frozen=True)
+class Kind:
+    name: str
+    model: Any
+    schema: Type[BaseModel]
+    key: Tuple[str, ...]                               # ON CONFLICT columns
+    values: Callable[[Any, Refs], Dict[str, Any]]
+    catalog: str
+    needs: Tuple[str, ...] = ()                        # refs loaded before writing
+    list_fields: Tuple[str, ...] = ()                  # CSV: "a|b|c" cells
+
+KINDS: Dict[str, Kind] = {k.name: k for k in [
+    Kind("warmups", WarmupBlock, BlockRow, ("slug",), _block_values, PROGRAM_CATALOG),
+    Kind("cooldowns", CooldownBlock, BlockRow, ("slug",), _block_values, PROGRAM_CATALOG),
+    Kind("rest_days", RestDayTemplate, BlockRow, ("slug",), _block_values, PROGRAM_CATALOG),
+    Kind("programs", ProgramTemplate, ProgramRow, ("slug",), _program_values, PROGRAM_CATALOG),
+    Kind("program_days", ProgramDayTemplate, ProgramDayRow, ("program_id", "day_number"), _day_values,
+         PROGRAM_CATALOG, needs=("program", "warmup", "cooldown"), list_fields=("details",)),
+    Kind("program_weeks", ProgramWeekTemplate, ProgramWeekRow, ("program_id", "weekday"), _week_values,
+         PROGRAM_CATALOG, needs=("program", "rest")),
+    Kind("meals", MealLibrary, MealRow, ("slug",), _meal_values, MEAL_CATALOG,
+         list_fields=("goal_flags", "ingredients", "tags")),
+]}
+ORDER = list(KINDS)
+
+REF_MODELS = {"program": ProgramTemplate, "warmup": WarmupBlock, "cooldown": CooldownBlock, "rest": RestDayTemplate}
+
+def _load_refs(db: Session, needs: Iterable[str]) -> Refs:
+    return {name: dict(db.query(REF_MODELS[name].slug, REF_MODELS[name].id).all()) for name in needs}
+
+# ----- reading
+
+Row = Tuple[str, Dict[str, Any]]   # (position for error messages, raw row)
+
+def _csv_cell(kind: Kind, column: str, value: str) -> Any:
+    value = value.strip()
+    if value == "":
+        return None
+    if value[0] in "[{":
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass   # plain text that happens to start with a bracket
+    if column in kind.list_fields:
+        return [part.strip() for part in value.split("|") if part.strip()]
+    return value
+
+def _read_csv(path: str, kind: Kind) -> Iterator[Row]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for n, raw in enumerate(csv.DictReader(f), start=2):   # line 1 is the header
+            row = {}
+            for column, value in raw.items():
+                if column is None or value is None:
+                    continue
+                cell = _csv_cell(kind, column, value)
+                if cell is not None:
+                    row[column] = cell
+            yield f"{path}:{n}", row
+
+def _read_jsonl(path: str) -> Iterator[Row]:
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if line.strip():
+                yield f"{path}:{n}", json.loads(line)
+
+def _documents(path: str) -> Iterator[Any]:
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("YAML catalogs need PyYAML (pip install pyyaml)") from None
+        with open(path, encoding="utf-8") as f:
+            yield from yaml.safe_load_all(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield json.load(f)
+
+def kind_for_path(path: str) -> Optional[str]:
+    """`meals.csv`, `program_days.jsonl`, ... -> the kind named by the file."""
+    stem = os.path.basename(path).split(".", 1)[0]
+    return stem if stem in KINDS else None
+
+def read_source(path: str, kind: Optional[str] = None) -> Dict[str, Iterator[Row]]:
+    """Lazy row streams per kind in one file.
+
+    CSV and JSON Lines files hold one kind, given by `kind` or the file name.
+    JSON/YAML documents are either a list of rows of that kind or a mapping of
+    kind -> rows (several YAML documents are read one after another).
+    """
+    kind = kind or kind_for_path(path)
+    if path.endswith((".csv", ".jsonl", ".ndjson")):
+        if kind is None:
+            raise ValueError(f"{path}: cannot tell the catalog kind; name the file <kind>.csv or pass a kind")
+        if path.endswith(".csv"):
+            return {kind: _read_csv(path, KINDS[kind])}
+        return {kind: _read_jsonl(path)}
+
+    streams: Dict[str, List[Row]] = {}
+    for d, doc in enumerate(_documents(path)):
+        if isinstance(doc, dict) and set(doc) <= set(KINDS):
+            sections = doc.items()
+        elif isinstance(doc, list) and kind is not None:
+            sections = [(kind, doc)]
+        elif doc is None:
+            continue
+        else:
+            raise ValueError(f"{path}: expected a list of {kind or '<kind>'} rows or a mapping of kind -> rows")
+        for name, rows in sections:
+            streams.setdefault(name, []).extend(
+                (f"{path}:{name}[{i}]" if d == 0 else f"{path}:{d}:{name}[{i}]", row)
+                for i, row in enumerate(rows or [])
+            )
+    return {name: iter(rows) for name, rows in streams.items()}
+
+# ----- writing
+
+@dataclass
+class KindStats:
+    read: int = 0
+    written: int = 0
+    invalid: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "read": self.read, "written": self.written, "invalid": self.invalid, "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "rows_per_s": round(self.written / self.seconds, 1) if self.seconds else None,
+        }
+
+@dataclass
+class ImportReport:
+    kinds: Dict[str, KindStats] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    max_errors: int = 100
+
+    def error(self, message: str) -> None:
+        if len(self.errors) < self.max_errors:
+            self.errors.append(message)
+
+    def as_dict(self) -> Dict[str, Any]:
+        written = sum(s.written for s in self.kinds.values())
+        return {
+            "kinds": {name: s.as_dict() for name, s in self.kinds.items()},
+            "written": written,
+            "invalid": sum(s.invalid for s in self.kinds.values()),
+            "seconds": round(self.seconds, 3),
+            "rows_per_s": round(written / self.seconds, 1) if self.seconds else None,
+            "errors": self.errors,
+        }
+
+def _validate(kind: Kind, batch: List[Row], report: ImportReport) -> List[Tuple[str, BaseModel]]:
+    """Validate the whole batch at once; only a failing batch is re-checked row by row."""
+    adapter = TypeAdapter(List[kind.schema])
+    try:
+        return list(zip([pos for pos, _ in batch], adapter.validate_python([row for _, row in batch])))
+    except ValidationError:
+        pass
+    valid = []
+    for pos, row in batch:
+        try:
+            valid.append((pos, kind.schema.model_validate(row)))
+        except ValidationError as exc:
+            first = exc.errors()[0]
+            report.error(f"{pos}: {'.'.join(map(str, first['loc']))}: {first['msg']}")
+    return valid
+
+def upsert_rows(db: Session, kind: Kind, values: List[Dict[str, Any]]) -> int:
+    """Multi-row INSERT ... ON CONFLICT (natural key) DO UPDATE in the caller's transaction.
+
+    The statement is compiled once and executed with the whole list; SQLAlchemy's
+    insertmanyvalues turns that into multi-row VALUES pages (psycopg2) or a plain
+    executemany (SQLite), instead of compiling one huge VALUES clause per batch.
+    """
+    if not values:
+        return 0
+    # ON CONFLICT cannot touch the same row twice in one statement: last one wins
+    values = list({tuple(v[k] for k in kind.key): v for v in values}.values())
+    insert = dialect_insert(db)
+    update = [c for c in values[0] if c not in kind.key and c != "id"]
+    stmt = insert(kind.model.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(kind.key),
+        set_={c: stmt.excluded[c] for c in update},
+    )
+    db.connection().execute(stmt, values)
+    return len(values)
+
+def _write(db: Session, kind: Kind, valid: List[Tuple[str, BaseModel]], report: ImportReport) -> Tuple[int, int]:
+    """(rows written, rows rejected for unknown references)."""
+    refs = _load_refs(db, kind.needs)
+    values = []
+    for pos, row in valid:
+        try:
+            values.append(kind.values(row, refs))
+        except RowError as exc:
+            report.error(f"{pos}: {exc}")
+    return upsert_rows(db, kind, values), len(valid) - len(values)
+
+def import_rows(db: Session, kind: str, rows: Iterable[Dict[str, Any]], report: Optional[ImportReport] = None) -> int:
+    """Validate and upsert in-memory rows in the caller's transaction (no commit, no version bump)."""
+    report = report or ImportReport()
+    k = KINDS[kind]
+    valid = _validate(k, [(f"{kind}[{i}]", r) for i, r in enumerate(rows)], report)
+    if not report.errors:
+        written, _ = _write(db, k, valid, report)
+    if report.errors:
+        raise ValueError("; ".join(report.errors))
+    return written
+
+def import_catalogs(
+    session_factory: Callable[[], Session],
+    sources: Iterable[Tuple[str, Optional[str]]],
+    batch_size: int = BATCH_SIZE,
+    dry_run: bool = False,
+) -> ImportReport:
+    """Stream `(path, kind or None)` sources into the database, one transaction per batch.
+
+    Kinds run in dependency order across all sources. The touched catalogs'
+    version stamps are bumped at the end, so API workers reload them.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+    streams: Dict[str, List[Iterator[Row]]] = {}
+    for path, kind in sources:
+        for name, rows in read_source(path, kind).items():
+            if name not in KINDS:
+                raise ValueError(f"{path}: unknown catalog kind {name!r} (known: {', '.join(ORDER)})")
+            streams.setdefault(name, []).append(rows)
+
+    touched = set()
+    try:
+        for name in ORDER:
+            kind = KINDS[name]
+            stats = report.kinds.setdefault(name, KindStats()) if name in streams else None
+            for rows in streams.get(name, []):
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    t0 = time.perf_counter()
+                    stats.read += len(batch)
+                    valid = _validate(kind, batch, report)
+                    with session_factory() as db:
+                        written, rejected = _write(db, kind, valid, report)
+                        if dry_run:
+                            db.rollback()
+                        else:
+                            db.commit()
+                    stats.written += written
+                    stats.invalid += len(batch) - len(valid) + rejected
+                    stats.batches += 1
+                    stats.seconds += time.perf_counter() - t0
+                    if written and not dry_run:
+                        touched.add(kind.catalog)
+    finally:
+        if touched:
+            with session_factory() as db:
+                for catalog in sorted(touched):
+                    bump_catalog_version(db, catalog)
+                db.commit()
+        report.seconds = time.perf_counter() - started
+    return report
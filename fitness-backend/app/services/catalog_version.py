@@ -0,0 +1,100 @@
+# app/services/catalog_version.py
+from __future__ import annotations
+import os
+import threading
+import time
+from itertools import chain
+from typing import Callable, Generic, Optional, TypeVar
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.models import MealLibrary
+from app.models_fitness import (
+    CatalogVersion, CooldownBlock, ProgramDayTemplate, ProgramTemplate, ProgramWeekTemplate, RestDayTemplate,
+    WarmupBlock,
+)
+from app.services.query_budget import exempt_queries
+
+PROGRAM_CATALOG = "program"
+MEAL_CATALOG = "meal"
+
+# How long a loaded catalog is trusted before the version stamp is re-read.
+VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "5"))
+
+T = TypeVar("T")
+
+def read_catalog_version(db: Session, name: str) -> int:
+    version = db.query(CatalogVersion.version).filter(CatalogVersion.name == name).scalar()
+    return int(version or 0)
+
+def bump_catalog_version(db: Session, name: str) -> None:
+    """Increment the stamp for `name` in the caller's transaction (creates it on first use)."""
+    res = db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == name)
+        .values(version=CatalogVersion.version + 1)
+    )
+    if res.rowcount == 0:
+        db.add(CatalogVersion(name=name, version=1))
+
+# Tables each catalog snapshot is built from. ORM writes to them bump the stamp on
+# flush (below); Core writes, like catalog_import's bulk upserts, must call
+# bump_catalog_version themselves.
+CATALOG_MODELS = {
+    MealLibrary: MEAL_CATALOG,
+    ProgramTemplate: PROGRAM_CATALOG,
+    ProgramDayTemplate: PROGRAM_CATALOG,
+    ProgramWeekTemplate: PROGRAM_CATALOG,
+    WarmupBlock: PROGRAM_CATALOG,
+    CooldownBlock: PROGRAM_CATALOG,
+    RestDayTemplate: PROGRAM_CATALOG,
+}
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_catalog_writes(session: Session, flush_context, instances) -> None:
+    touched = {CATALOG_MODELS[type(o)] for o in chain(session.new, session.deleted) if type(o) in CATALOG_MODELS}
+    touched |= {CATALOG_MODELS[type(o)] for o in session.dirty
+                if type(o) in CATALOG_MODELS and session.is_modified(o)}
+    for name in sorted(touched):
+        bump_catalog_version(session, name)
+
+class VersionedCache(Generic[T]):
+    """Process-local, read-through holder for one catalog snapshot.
+
+    `loader(db, version)` builds the snapshot; it is rebuilt when the stored
+    version stamp differs from the one it was loaded at.
+    """
+
+    def __init__(self, name: str, loader: Callable[[Session, int], T]) -> None:
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def _fresh(self) -> bool:
+        return self._value is not None and time.monotonic() - self._checked_at < VERSION_CHECK_SECONDS
+
+    def get(self, db: Session) -> T:
+        if self._fresh():
+            return self._value
+
+        with self._lock:
+            if self._fresh():
+                return self._value
+            # periodic and shared by every request in the process: not charged to request budgets
+            with exempt_queries():
+                version = read_catalog_version(db, self.name)
+                if self._value is None or self._version != version:
+                    self._value = self._loader(db, version)
+                    self._version = version
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._checked_at = 0.0
@@ -0,0 +1,211 @@
+# app/services/grocery.py
+"""Ingredient parsing and weekly grocery aggregation.
+
+`parse_ingredient` turns a free-text line ("150 g chicken breast, diced",
+"2 eggs", "1 1/2 cups oats", "salt to taste") into an `Ingredient` with mass
+in grams and volume in millilitres. The meal index parses each meal once at
+load; `aggregate_grocery` then only sums the cached records for the week.
+"""
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+MASS = "g"
+VOLUME = "ml"
+
+# unit word -> (base unit, factor to base)
+UNITS: Dict[str, Tuple[str, float]] = {
+    "mg": (MASS, 0.001),
+    "g": (MASS, 1.0), "gr": (MASS, 1.0), "gram": (MASS, 1.0), "grams": (MASS, 1.0),
+    "kg": (MASS, 1000.0), "kgs": (MASS, 1000.0), "kilogram": (MASS, 1000.0), "kilograms": (MASS, 1000.0),
+    "oz": (MASS, 28.3495), "ounce": (MASS, 28.3495), "ounces": (MASS, 28.3495),
+    "lb": (MASS, 453.592), "lbs": (MASS, 453.592), "pound": (MASS, 453.592), "pounds": (MASS, 453.592),
+    "ml": (VOLUME, 1.0), "milliliter": (VOLUME, 1.0), "milliliters": (VOLUME, 1.0),
+    "millilitre": (VOLUME, 1.0), "millilitres": (VOLUME, 1.0),
+    "l": (VOLUME, 1000.0), "liter": (VOLUME, 1000.0), "liters": (VOLUME, 1000.0),
+    "litre": (VOLUME, 1000.0), "litres": (VOLUME, 1000.0),
+    "tsp": (VOLUME, 4.92892), "teaspoon": (VOLUME, 4.92892), "teaspoons": (VOLUME, 4.92892),
+    "tbsp": (VOLUME, 14.7868), "tablespoon": (VOLUME, 14.7868), "tablespoons": (VOLUME, 14.7868),
+    "cup": (VOLUME, 240.0), "cups": (VOLUME, 240.0),
+}
+
+# countable units kept as-is: singular -> plural
+COUNT_UNITS: Dict[str, str] = {
+    "slice": "slices", "piece": "pieces", "scoop": "scoops", "clove": "cloves", "can": "cans",
+    "handful": "handfuls", "pinch": "pinches", "bunch": "bunches", "stick": "sticks",
+    "sprig": "sprigs", "fillet": "fillets", "leaf": "leaves", "packet": "packets", "pack": "packs",
+    "tin": "tins", "bowl": "bowls", "glass": "glasses",
+}
+_COUNT_SINGULAR = {plural: singular for singular, plural in COUNT_UNITS.items()}
+
+# plurals the suffix rules in _singular get wrong
+_IRREGULAR = {"leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife"}
+
+_FRACTIONS = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3}
+_NUM = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?|[½¼¾⅓⅔])"
+_LEADING = re.compile(rf"^(?P<qty>{_NUM})\s*(?P<rest>.*)$")
+_TRAILING = re.compile(rf"^(?P<item>.*?)[\s(]+(?P<qty>{_NUM})\s*(?P<unit>[a-z]+)?\)?$")
+
+class Ingredient(NamedTuple):
+    item: str                  # lowercased name, without quantity or preparation notes
+    quantity: Optional[float]  # in `unit`; None for "to taste" style lines
+    unit: str                  # "g", "ml", a count unit like "slice", or "" for plain counts
+    key: Tuple[str, str, bool] # aggregation key: (singular item, unit, unquantified)
+
+def _ingredient(item: str, quantity: Optional[float], unit: str) -> Ingredient:
+    return Ingredient(item, quantity, unit, (_singular(item), unit, quantity is None))
+
+def _number(raw: str) -> float:
+    raw = raw.strip()
+    if raw in _FRACTIONS:
+        return _FRACTIONS[raw]
+    if " " in raw:
+        whole, frac = raw.split(None, 1)
+        return float(whole) + _number(frac)
+    if "/" in raw:
+        num, den = raw.split("/", 1)
+        return float(num) / float(den) if float(den) else 0.0
+    return float(raw.replace(",", "."))
+
+_NOTES = re.compile(r"\s*\(?\b(to taste|as needed|optional)\)?\s*$")
+
+_PARENS = re.compile(r"\([^()]*\)")
+
+def _clean_item(text: str) -> str:
+    # "burrito bowl (beans, rice), diced": drop the parenthesised groups, then the
+    # preparation note after the first comma; unbalanced parentheses keep the whole line
+    stripped = _PARENS.sub(" ", text)
+    if "(" not in stripped and ")" not in stripped:
+        text = stripped.split(",", 1)[0]
+    text = re.sub(r"^of\s+", "", text.strip())
+    text = _NOTES.sub("", text)
+    return " ".join(text.strip(" .-").split())
+
+def _singular(word: str) -> str:
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+def _unit(word: str) -> Optional[Tuple[str, float]]:
+    w = word.rstrip(".")
+    if w in UNITS:
+        return UNITS[w]
+    if w in COUNT_UNITS:
+        return w, 1.0
+    if w in _COUNT_SINGULAR:
+        return _COUNT_SINGULAR[w], 1.0
+    return None
+
+@lru_cache(maxsize=4096)
+def parse_ingredient(text: str) -> Ingredient:
+    line = " ".join(str(text).lower().split())
+
+    m = _LEADING.match(line)
+    if m:
+        qty = _number(m.group("qty"))
+        rest = m.group("rest")
+        # "200ml milk" and "200 ml milk" both land here
+        word, _, tail = rest.partition(" ")
+        unit = _unit(word)
+        if unit and tail:
+            return _ingredient(_clean_item(tail), qty * unit[1], unit[0])
+        return _ingredient(_clean_item(rest), qty, "")
+
+    m = _TRAILING.match(line)
+    if m and m.group("item"):
+        qty = _number(m.group("qty"))
+        unit = _unit(m.group("unit") or "")
+        if unit:
+            return _ingredient(_clean_item(m.group("item")), qty * unit[1], unit[0])
+        if not m.group("unit"):
+            return _ingredient(_clean_item(m.group("item")), qty, "")
+
+    return _ingredient(_clean_item(line) or line, None, "")
+
+def parse_ingredients(lines: Iterable[Any]) -> Tuple[Ingredient, ...]:
+    return tuple(parse_ingredient(str(line)) for line in lines or [] if str(line).strip())
+
+def _amount(quantity: float, unit: str) -> Tuple[float, str]:
+    if unit == MASS and quantity >= 1000:
+        return quantity / 1000, "kg"
+    if unit == VOLUME and quantity >= 1000:
+        return quantity / 1000, "l"
+    return quantity, unit
+
+def _fmt(x: float) -> str:
+    return f"{round(x, 2):g}"
+
+def _text(item: str, quantity: Optional[float], unit: str) -> str:
+    if quantity is None:
+        return item
+    if not unit:
+        return f"{_fmt(quantity)} {item}"
+    if unit in COUNT_UNITS and quantity != 1:
+        return f"{_fmt(quantity)} {COUNT_UNITS[unit]} {item}"
+    return f"{_fmt(quantity)} {unit} {item}"
+
+def aggregate_grocery(meals: Iterable[Tuple[Tuple[Ingredient, ...], int, float]]) -> List[Dict[str, Any]]:
+    """Sum `(parsed ingredients, servings, portions)` triples into one row per item and unit.
+
+    `portions` is the servings weighted by portion size (equal to `servings` at 1x).
+
+    Rows are `{item, quantity, unit, meals, text}` sorted by item; `meals` is how
+    many servings over the week use the item, `text` the display line.
+    """
+    totals: Dict[Tuple[str, str, bool], List[Any]] = {}   # key -> [display name, quantity, servings]
+    for ingredients, servings, portions in meals:
+        for ing in ingredients:
+            row = totals.get(ing.key)
+            if row is None:
+                row = totals[ing.key] = [ing.item, 0.0, 0]
+            if ing.quantity is not None:
+                row[1] += ing.quantity * portions
+            row[2] += servings
+
+    out: List[Dict[str, Any]] = []
+    for (_, unit, unquantified), (name, quantity, servings) in totals.items():
+        if unquantified:
+            qty, shown = None, None
+        else:
+            qty, shown = _amount(quantity, unit)
+            qty = round(qty, 2)
+        out.append({
+            "item": name,
+            "quantity": qty,
+            "unit": shown,
+            "meals": servings,
+            "text": _text(name, qty, shown or ""),
+        })
+    out.sort(key=lambda r: (r["item"], r["unit"] or ""))
+    return out
+
+def count_meals(week_meals: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Tuple[int, float]]:
+    """meal_id -> (servings, portion-weighted servings) over the stored week."""
+    out: Dict[str, Tuple[int, float]] = {}
+    for slots in week_meals.values():
+        for slot in slots:
+            meal_id = slot.get("meal_id")
+            if "meal" in slot or not meal_id:
+                continue
+            servings, amount = out.get(meal_id, (0, 0.0))
+            out[meal_id] = (servings + 1, amount + slot.get("portion", 1.0))
+    return out
+
+def grocery_lines(grocery_list: List[Any]) -> List[str]:
+    """Display strings for a stored grocery_list (structured rows, or legacy plain strings)."""
+    return [row["text"] if isinstance(row, dict) else str(row) for row in grocery_list or []]
+
+def grocery_rows(grocery_list: List[Any]) -> List[Dict[str, Any]]:
+    """Structured rows for a stored grocery_list; legacy strings become unparsed rows."""
+    return [
+        row if isinstance(row, dict)
+        else {"item": str(row), "quantity": None, "unit": None, "meals": None, "text": str(row)}
+        for row in grocery_list or []
+    ]
@@ -1,4 +1,8 @@
 from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Dict, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
 
 def compute_daily_targets(
     sex: str,
@@ -71,3 +75,76 @@ def compute_daily_targets(
         "carbsTarget": carbs_g,
         "fatTarget": fat_g,
     }
+
+def _norm(v: Any) -> str:
+    return (v or "").strip().lower()
+
+def _activity_multiplier(a: str) -> float:
+    return {"sedentary": 1.2, "light": 1.375, "moderate": 1.55, "intense": 1.75}.get(a, 1.375)
+
+def _calorie_adjustment(g: str) -> float:
+    if g in {"build muscle", "muscle_gain", "bulk"}:
+        return 350
+    if g in {"lose fat", "fat_loss", "cut"}:
+        return -300
+    if g in {"performance", "athletic"}:
+        return 150
+    return 0
+
+def _protein_per_kg(g: str) -> float:
+    if g in {"build muscle", "muscle_gain"}:
+        return 1.7
+    if g in {"lose fat", "fat_loss"}:
+        return 1.9
+    return 1.5
+
+def compute_daily_targets_batch(
+    sex: Sequence[str],
+    age: Sequence[int],
+    height_cm: Sequence[float],
+    weight_kg: Sequence[float],
+    activity: Sequence[str],
+    goal: Sequence[str],
+) -> Dict[str, "np.ndarray"]:
+    """
+    Columnar `compute_daily_targets` (NumPy): same-length sequences in, int64
+    arrays out under the same keys. Like the scalar version, age/height/weight
+    must be present for every row.
+    """
+    import numpy as np
+
+    n = len(sex)
+    if not all(len(c) == n for c in (age, height_cm, weight_kg, activity, goal)):
+        raise ValueError("all input columns must have the same length")
+    if any(v is None for c in (age, height_cm, weight_kg) for v in c):
+        raise ValueError("age, height_cm and weight_kg are required for every row")
+
+    a = np.asarray(age, dtype=np.float64)
+    h = np.asarray(height_cm, dtype=np.float64)
+    w = np.asarray(weight_kg, dtype=np.float64)
+
+    def lookup(values: Sequence[Any], fn) -> "np.ndarray":
+        lut = {v: fn(_norm(v)) for v in set(values)}
+        return np.fromiter((lut[v] for v in values), dtype=np.float64, count=n)
+
+    s = lookup(sex, lambda v: 5 if v in {"male", "m"} else -161)
+    bmr = 10 * w + 6.25 * h - 5 * a + s
+
+    tdee = bmr * lookup(activity, _activity_multiplier)
+
+    calories = np.rint(tdee + lookup(goal, _calorie_adjustment)).astype(np.int64)
+    protein_g = np.rint(lookup(goal, _protein_per_kg) * w).astype(np.int64)
+
+    # Fat = ~25% of calories
+    fat_g = np.rint((0.25 * calories) / 9).astype(np.int64)
+
+    # Carbs = rest of calories
+    carbs_kcal = calories - (protein_g * 4 + fat_g * 9)
+    carbs_g = np.maximum(0, np.rint(carbs_kcal / 4).astype(np.int64))
+
+    return {
+        "calorieTarget": calories,
+        "proteinTarget": protein_g,
+        "carbsTarget": carbs_g,
+        "fatTarget": fat_g,
+    }
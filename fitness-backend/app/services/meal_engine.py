@@ -1,8 +1,13 @@
 # app/services/meal_engine.py
 from __future__ import annotations
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 from sqlalchemy.orm import Session
-from app.models import MealLibrary
+from app.services.grocery import aggregate_grocery, count_meals, parse_ingredients
+from app.services.meal_index import MealIndex, get_meal_index
+from app.services.meal_optimizer import MEAL_OPTIMIZER, optimize_week_meals
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 DOW = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
 
@@ -27,111 +32,50 @@ def _normalize_diet(diet: str | None) -> str:
 
     return "veg"
 
-def _pick_breakfast(db: Session, goal: str, diet: str, fav: str | None = None) -> dict | None:
+def _pick_breakfast(index: MealIndex, goal: str, diet: str, fav: str | None = None) -> str | None:
     fav = (fav or "").strip().lower()
-    rows = (
-        db.query(MealLibrary)
-        .filter(
-            MealLibrary.category == "breakfast",
-            MealLibrary.diet_type == diet,
-            MealLibrary.goal_flags.contains([goal]),
-            MealLibrary.name.ilike("%egg%")
-        )
-        .all()
-    )
-    return _meal_to_json(rows[0]) if rows else None
-
-def _pick_lunch(db: Session, goal: str, diet: str, fav: str | None = None) -> tuple[dict, dict]:
+    ids = index.candidate_ids("breakfast", diet, goal, name_contains="egg")
+    return ids[0] if ids else None
+
+def _pick_lunch(index: MealIndex, goal: str, diet: str, fav: str | None = None) -> tuple[str, str]:
     """
-    Return 2 lunch meals:
+    Return 2 lunch meal ids:
     - lunchA → first 3 days
     - lunchB → next 4 days
     If only 1 lunch exists → use it for both.
     """
 
-    rows = (
-        db.query(MealLibrary)
-        .filter(
-            MealLibrary.category == "lunch",
-            MealLibrary.diet_type == diet,
-            MealLibrary.goal_flags.contains([goal]),
-        )
-        .all()
-    )
-
-    if not rows:
+    ids = index.candidate_ids("lunch", diet, goal)
+
+    if not ids:
         return None, None
 
-    if len(rows) == 1:
-        one = _meal_to_json(rows[0])
+    if len(ids) == 1:
+        one = ids[0]
         return one, one
 
     # Use first 2 lunches
-    lunchA = _meal_to_json(rows[0])
-    lunchB = _meal_to_json(rows[1])
+    lunchA = ids[0]
+    lunchB = ids[1]
     return lunchA, lunchB
 
-def _pick_snack(db: Session, goal: str, diet: str) -> dict | None:
-    rows = (
-        db.query(MealLibrary)
-        .filter(
-            MealLibrary.category == "snack",
-            MealLibrary.diet_type == diet,
-            MealLibrary.goal_flags.contains([goal]),
-        )
-        .all()
-    )
-    return _meal_to_json(rows[0]) if rows else None
+def _pick_snack(index: MealIndex, goal: str, diet: str) -> str | None:
+    ids = index.candidate_ids("snack", diet, goal)
+    return ids[0] if ids else None
 
 
-def _pick_dinners_week(db: Session, goal: str, diet: str, fav: str | None = None) -> List[dict]:
-    fav = (fav or "").strip().lower()
-
-    if fav:
-        fav_dinners = (
-            db.query(MealLibrary)
-            .filter(
-                MealLibrary.category == "dinner",
-                MealLibrary.diet_type == diet,
-                MealLibrary.goal_flags.contains([goal]),
-            )
-            .all()
-        )
-        if fav_dinners:
-            out = []
-            total = len(fav_dinners)
-            for i in range(7):
-                out.append(_meal_to_json(fav_dinners[i % total]))
-            return out
-    dinners = (
-        db.query(MealLibrary)
-        .filter(
-            MealLibrary.category == "dinner",
-            MealLibrary.diet_type == diet,
-            MealLibrary.goal_flags.contains([goal])
-        )
-        .all()
-    )
+def _pick_dinners_week(index: MealIndex, goal: str, diet: str, fav: str | None = None) -> List[str | None]:
+    dinners = index.candidate_ids("dinner", diet, goal)
     if not dinners:
-        return [{} for _ in range(7)]
+        return [None for _ in range(7)]
 
     out = []
     total = len(dinners)
     for i in range(7):
-        out.append(_meal_to_json(dinners[i % total]))
+        out.append(dinners[i % total])
 
     return out
 
-def _meal_to_json(m: MealLibrary) -> dict:
-    return {
-        "name": m.name,
-        "category": m.category,
-        "ingredients": m.ingredients or [],
-        "instructions": m.instructions or "",
-        "macros": m.macros or {},
-        "tags": m.tags or [],
-    }
-
 def build_week_meals(db: Session, goal: str | None, diet_type: str | None, fav_protein: str | None = None):
     """
     Returns structure:
@@ -140,16 +84,38 @@ def build_week_meals(db: Session, goal: str | None, diet_type: str | None, fav_p
         tue: [...],
         ...
     }
+    Candidates come from the cached meal index, so this makes no meal queries.
+    """
+    return compose_week_meals(get_meal_index(db), goal, diet_type, fav_protein)
+
+async def build_week_meals_async(db: AsyncSession, goal: str | None, diet_type: str | None, fav_protein: str | None = None):
+    return compose_week_meals(await db.run_sync(get_meal_index), goal, diet_type, fav_protein)
+
+def compose_week_meals(index: MealIndex, goal: str | None, diet_type: str | None, fav_protein: str | None = None):
+    """Pure variant of `build_week_meals` over an already-loaded meal index."""
+    return hydrate_week_meals(compose_week_meal_refs(index, goal, diet_type, fav_protein), index)
+
+def compose_week_meal_refs(
+    index: MealIndex,
+    goal: str | None,
+    diet_type: str | None,
+    fav_protein: str | None = None,
+    targets: Dict | None = None,
+):
+    """The week as stored on WeeklyPlan: `{mon: [{label, meal_id}, ...], ...}` (meal_id None if no match).
+
+    With MEAL_OPTIMIZER on and `targets` given, meals and `portion`s are re-picked
+    to fit the daily macro targets (see meal_optimizer).
     """
     g = _normalize_goal(goal)
     d = _normalize_diet(diet_type)
     fav = (fav_protein or "").strip().lower()   
 
 
-    breakfast = _pick_breakfast(db, g, d, fav)
-    lunchA, lunchB = _pick_lunch(db, g, d, fav) 
-    snack = _pick_snack(db, g, d)
-    dinners_7 = _pick_dinners_week(db, g, d, fav)
+    breakfast = _pick_breakfast(index, g, d, fav)
+    lunchA, lunchB = _pick_lunch(index, g, d, fav) 
+    snack = _pick_snack(index, g, d)
+    dinners_7 = _pick_dinners_week(index, g, d, fav)
 
     if not (breakfast and lunchA and snack):
         return {k: [] for k in DOW}
@@ -159,21 +125,59 @@ def build_week_meals(db: Session, goal: str | None, diet_type: str | None, fav_p
         lunch_for_day = lunchA if i < 3 else lunchB
 
         week[dow] = [
-            {"label": "Breakfast", "meal": breakfast},
-            {"label": "Lunch", "meal": lunch_for_day},
-            {"label": "Snack", "meal": snack},
-            {"label": "Dinner", "meal": dinners_7[i]},
+            {"label": "Breakfast", "meal_id": breakfast},
+            {"label": "Lunch", "meal_id": lunch_for_day},
+            {"label": "Snack", "meal_id": snack},
+            {"label": "Dinner", "meal_id": dinners_7[i]},
         ]
+
+    if targets and MEAL_OPTIMIZER:
+        week = optimize_week_meals(index, week, _slot_pools(g, d), targets)
     return week
 
+def _slot_pools(goal: str, diet: str) -> Dict[str, tuple]:
+    """Optimizer candidates per slot label: the same filters the pickers use."""
+    return {
+        "Breakfast": ("breakfast", diet, goal, "egg"),
+        "Lunch": ("lunch", diet, goal, None),
+        "Snack": ("snack", diet, goal, None),
+        "Dinner": ("dinner", diet, goal, None),
+    }
+
+def _hydrate_slot(slot: Dict, index: MealIndex) -> Dict:
+    out = {"label": slot["label"], "meal": index.records.get(slot.get("meal_id"), {})}
+    if "portion" in slot:
+        out["portion"] = slot["portion"]
+    return out
+
+def hydrate_week_meals(week: Dict[str, List[Dict]], index: MealIndex) -> Dict[str, List[Dict]]:
+    """Resolve stored `meal_id` slots to `{label, meal}` from the index.
 
-def build_grocery_list(week_meals: Dict[str, List[Dict]]) -> List[str]:
-    items = set()
+    Slots that already carry an inline `meal` (per-plan overrides, or rows the
+    backfill could not match to the library) are returned as they are. Meal
+    dicts are the index's shared records: read-only.
+    """
+    out: Dict[str, List[Dict]] = {}
+    for dow, slots in week.items():
+        out[dow] = [
+            slot if "meal" in slot
+            else _hydrate_slot(slot, index)
+            for slot in slots
+        ]
+    return out
 
-    for day in week_meals.values():
-        for entry in day:
-            meal = entry.get("meal", {})
-            for ing in meal.get("ingredients", []):
-                items.add(ing.lower())
 
-    return sorted(items)
+def build_grocery_list(week_meals: Dict[str, List[Dict]], index: MealIndex) -> List[Dict]:
+    """Aggregated grocery rows (see grocery.aggregate_grocery) for a stored week.
+
+    Referenced meals use the index's pre-parsed ingredients; inline meals are parsed here.
+    """
+    served = [
+        (index.ingredients.get(meal_id, ()), servings, amount)
+        for meal_id, (servings, amount) in count_meals(week_meals).items()
+    ]
+    for slots in week_meals.values():
+        for slot in slots:
+            if "meal" in slot:
+                served.append((parse_ingredients(slot["meal"].get("ingredients", [])), 1, slot.get("portion", 1.0)))
+    return aggregate_grocery(served)
@@ -0,0 +1,128 @@
+# app/services/meal_index.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import MealLibrary
+from app.services.catalog_version import MEAL_CATALOG, VersionedCache, read_catalog_version
+from app.services.grocery import Ingredient, parse_ingredients
+
+BucketKey = Tuple[str, str, str]  # (category, diet_type, goal)
+
+def meal_to_json(m: MealLibrary) -> dict:
+    return {
+        "name": m.name,
+        "category": m.category,
+        "ingredients": m.ingredients or [],
+        "instructions": m.instructions or "",
+        "macros": m.macros or {},
+        "tags": m.tags or [],
+    }
+
+def _macro(macros: Dict[str, Any], *keys: str) -> float:
+    for k in keys:
+        v = macros.get(k)
+        if isinstance(v, (int, float)):
+            return float(v)
+    return 0.0
+
+def macro_vector(meal: dict) -> Tuple[float, float, float, float]:
+    """(calories, protein, carbs, fat) per serving; missing values count as 0."""
+    m = meal["macros"] or {}
+    return (
+        _macro(m, "calories", "kcal"),
+        _macro(m, "protein", "protein_g"),
+        _macro(m, "carbs", "carbs_g"),
+        _macro(m, "fat", "fat_g"),
+    )
+
+def _tokens(text: str | None) -> List[str]:
+    return (text or "").lower().split()
+
+@dataclass
+class MealIndex:
+    """In-memory view of `meal_library` for plan building.
+
+    `records` holds the serialized meal dict once per id; buckets keep library
+    order so "first match" picks stay the same as the old per-query pickers.
+    Records are shared between plans, so callers must treat them as read-only.
+    """
+    version: int
+    records: Dict[str, dict] = field(default_factory=dict)                 # id -> meal json
+    buckets: Dict[BucketKey, List[str]] = field(default_factory=dict)      # (category, diet, goal) -> ids
+    name_tokens: Dict[str, Set[str]] = field(default_factory=dict)         # lowercased name word -> ids
+    tags: Dict[str, Set[str]] = field(default_factory=dict)                # lowercased tag -> ids
+    position: Dict[str, int] = field(default_factory=dict)                 # id -> library order
+    ingredients: Dict[str, Tuple[Ingredient, ...]] = field(default_factory=dict)  # id -> parsed ingredients
+    macros: Dict[str, Tuple[float, float, float, float]] = field(default_factory=dict)  # id -> macro vector
+    pools: Dict[Any, Any] = field(default_factory=dict, repr=False)        # meal_optimizer's per-slot arrays
+
+    def add(self, meal_id: str, meal: dict, diet_type: str, goal_flags: Any) -> None:
+        self.position[meal_id] = len(self.position)
+        self.records[meal_id] = meal
+        self.ingredients[meal_id] = parse_ingredients(meal["ingredients"])
+        self.macros[meal_id] = macro_vector(meal)
+        for goal in goal_flags or []:
+            if isinstance(goal, str):
+                self.buckets.setdefault((meal["category"], diet_type, goal), []).append(meal_id)
+        for tok in _tokens(meal["name"]):
+            self.name_tokens.setdefault(tok, set()).add(meal_id)
+        for tag in meal["tags"]:
+            if isinstance(tag, str):
+                self.tags.setdefault(tag.lower(), set()).add(meal_id)
+
+    def ids_with_name_containing(self, fragment: str) -> Set[str]:
+        """Same matches as `name ILIKE '%fragment%'` for a fragment without whitespace."""
+        frag = fragment.lower()
+        out: Set[str] = set()
+        for tok, ids in self.name_tokens.items():
+            if frag in tok:
+                out |= ids
+        return out
+
+    def candidates(
+        self,
+        category: str,
+        diet_type: str,
+        goal: str,
+        name_contains: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[dict]:
+        return [self.records[i] for i in self.candidate_ids(category, diet_type, goal, name_contains, tag)]
+
+    def candidate_ids(
+        self,
+        category: str,
+        diet_type: str,
+        goal: str,
+        name_contains: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[str]:
+        ids = self.buckets.get((category, diet_type, goal), [])
+        if name_contains:
+            hits = self.ids_with_name_containing(name_contains)
+            ids = [i for i in ids if i in hits]
+        if tag:
+            hits = self.tags.get(tag.lower(), set())
+            ids = [i for i in ids if i in hits]
+        return ids
+
+def load_meal_index(db: Session, version: Optional[int] = None) -> MealIndex:
+    """Read `meal_library` once and bucket it; one query regardless of library size."""
+    if version is None:
+        version = read_catalog_version(db, MEAL_CATALOG)
+    index = MealIndex(version=version)
+    for m in db.query(MealLibrary).all():
+        index.add(str(m.id), meal_to_json(m), m.diet_type, m.goal_flags)
+    return index
+
+_cache: VersionedCache[MealIndex] = VersionedCache(MEAL_CATALOG, load_meal_index)
+
+def get_meal_index(db: Session) -> MealIndex:
+    """Process-local meal index; reloads when the `meal` catalog stamp moves."""
+    return _cache.get(db)
+
+def invalidate_meal_index() -> None:
+    _cache.invalidate()
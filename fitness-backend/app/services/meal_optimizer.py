@@ -0,0 +1,122 @@
+# app/services/meal_optimizer.py
+"""Macro-fitting meal selection (MEAL_OPTIMIZER=1).
+
+For each day, coordinate descent over the four slots: every pass re-picks one
+slot's (meal, portion) so the day's totals land as close as possible to
+`daily_targets` (weighted squared relative error), scoring all candidates and
+portions of that slot at once with numpy. A small penalty per earlier use in
+the week keeps the same meal from winning every day.
+
+The search starts from the default picker's week, so whatever the time budget
+cuts off simply stays on the default picks; without numpy or usable targets the
+default week is returned unchanged.
+"""
+from __future__ import annotations
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.services.meal_index import MealIndex
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MEAL_OPTIMIZER = os.getenv("MEAL_OPTIMIZER", "").strip().lower() in {"1", "true", "yes"}
+# wall-clock budget for optimizing one week
+MEAL_OPTIMIZER_BUDGET_MS = float(os.getenv("MEAL_OPTIMIZER_BUDGET_MS", "25"))
+
+PORTIONS = (0.5, 0.75, 1.0, 1.25, 1.5, 2.0)
+TARGET_KEYS = ("calorieTarget", "proteinTarget", "carbsTarget", "fatTarget")
+WEIGHTS = (1.0, 1.0, 0.5, 0.5)   # calories, protein, carbs, fat
+VARIETY_PENALTY = 0.02           # added per earlier use of the same meal this week
+MAX_PASSES = 4
+
+# slot label -> candidate key (category, diet, goal, name_contains) as in meal_engine's pickers
+PoolKey = Tuple[str, str, str, Optional[str]]
+
+class _Pool:
+    """Candidates for one slot, expanded to one row per (meal, portion)."""
+
+    def __init__(self, index: MealIndex, key: PoolKey) -> None:
+        import numpy as np
+
+        category, diet, goal, name_contains = key
+        self.ids = index.candidate_ids(category, diet, goal, name_contains=name_contains)
+        self.pos = {meal_id: i for i, meal_id in enumerate(self.ids)}
+        base = np.array([index.macros[i] for i in self.ids], dtype=np.float64).reshape(-1, 4)
+        portions = np.array(PORTIONS, dtype=np.float64)
+        self.rows = (base[:, None, :] * portions[None, :, None]).reshape(-1, 4)
+
+def _pool(index: MealIndex, key: PoolKey) -> _Pool:
+    # built once per meal index; a reload of the index starts a fresh cache
+    pool = index.pools.get(key)
+    if pool is None:
+        pool = index.pools[key] = _Pool(index, key)
+    return pool
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def optimize_week_meals(
+    index: MealIndex,
+    week: Dict[str, List[Dict[str, Any]]],
+    pools: Dict[str, PoolKey],
+    targets: Dict[str, Any],
+    budget_ms: Optional[float] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Re-pick `week`'s (default) meal refs to fit `targets`; slots gain a `portion`."""
+    np = _numpy()
+    if np is None or not any(week.values()):
+        return week
+
+    target = np.array([float(targets.get(k) or 0) for k in TARGET_KEYS])
+    if not (target > 0).all():
+        return week
+
+    deadline = time.perf_counter() + (MEAL_OPTIMIZER_BUDGET_MS if budget_ms is None else budget_ms) / 1000
+    weights = np.array(WEIGHTS)
+    k = len(PORTIONS)
+    unit = PORTIONS.index(1.0)
+    loaded = {label: _pool(index, key) for label, key in pools.items()}
+    uses = {label: np.zeros(len(p.ids)) for label, p in loaded.items()}
+
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for dow, day in week.items():
+        if time.perf_counter() > deadline:
+            out[dow] = day
+            continue
+
+        # (pool, row) per optimizable slot, starting from the default pick at portion 1
+        slots: List[Tuple[int, _Pool, np.ndarray, int]] = []
+        for i, slot in enumerate(day):
+            pool = loaded.get(slot["label"])
+            if pool is None or slot.get("meal_id") not in pool.pos:
+                continue
+            slots.append((i, pool, np.repeat(uses[slot["label"]], k) * VARIETY_PENALTY,
+                          pool.pos[slot["meal_id"]] * k + unit))
+
+        total = sum((pool.rows[row] for _, pool, _, row in slots), np.zeros(4))
+        for _ in range(MAX_PASSES):
+            improved = False
+            for n, (i, pool, penalty, row) in enumerate(slots):
+                rest = total - pool.rows[row]
+                err = ((((rest + pool.rows) - target) / target) ** 2) @ weights + penalty
+                best = int(err.argmin())
+                if err[best] < err[row] - 1e-12:
+                    slots[n] = (i, pool, penalty, best)
+                    total = rest + pool.rows[best]
+                    improved = True
+            if not improved:
+                break
+
+        new_day = [dict(slot) for slot in day]
+        for i, pool, _, row in slots:
+            meal_pos, portion = divmod(row, k)
+            new_day[i] = {"label": day[i]["label"], "meal_id": pool.ids[meal_pos], "portion": PORTIONS[portion]}
+            uses[day[i]["label"]][meal_pos] += 1
+        out[dow] = new_day
+    return out
@@ -0,0 +1,108 @@
+# app/services/meal_search.py
+"""Meal library browsing for GET /meals/search, straight from `meal_library`.
+
+Filters map onto the indexes from migration 5d8a1f3c9e42 on PostgreSQL:
+- `q` becomes name ILIKE / ingredients ILIKE, using the pg_trgm GIN indexes.
+- `goal` becomes goal_flags @> '["goal"]', using the jsonb_path_ops GIN index.
+- category/diet_type use the (category, diet_type, name) btree.
+Pages are keyset-paginated on (name, id): the cursor is the last row's sort key,
+so deep pages cost the same as the first and inserts never shift results.
+
+SQLite has none of those operators, so there the JSON filters match the stored text.
+That is fine for dev and the bench scripts.
+"""
+from __future__ import annotations
+import base64
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Text, cast, literal, or_, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Query, Session
+
+from app.models import MealLibrary
+from app.services.meal_index import meal_to_json
+
+MAX_LIMIT = 100
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(name: str, meal_id: str) -> str:
+    raw = json.dumps([name, meal_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name, meal_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("invalid cursor") from None
+    if not isinstance(name, str) or not isinstance(meal_id, str):
+        raise InvalidCursor("invalid cursor")
+    try:
+        uuid.UUID(meal_id)
+    except ValueError:
+        raise InvalidCursor("invalid cursor") from None
+    return name, meal_id
+
+def _like_pattern(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _json_contains(db: Session, column, value: str, jsonb_column: bool):
+    if db.get_bind().dialect.name == "postgresql":
+        target = column if jsonb_column else cast(column, JSONB)
+        # @> '["value"]'::jsonb - the form the jsonb_path_ops GIN index answers
+        return target.contains(cast(literal(json.dumps([value])), JSONB))
+    # stored as JSON text elsewhere: match the quoted element
+    return cast(column, Text).like(_like_pattern(json.dumps(value)), escape="\\")
+
+def meal_search_json(m: MealLibrary) -> Dict[str, Any]:
+    return {
+        "id": str(m.id),
+        "diet_type": m.diet_type,
+        "goal_flags": m.goal_flags or [],
+        **meal_to_json(m),
+    }
+
+def meal_search_query(
+    db: Session,
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    diet_type: Optional[str] = None,
+    goal: Optional[str] = None,
+    tags: Sequence[str] = (),
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Query:
+    """The page query: filters, keyset position, order by (name, id), `limit` + 1 rows."""
+    query = db.query(MealLibrary)
+    if category:
+        query = query.filter(MealLibrary.category == category)
+    if diet_type:
+        query = query.filter(MealLibrary.diet_type == diet_type)
+    if goal:
+        query = query.filter(_json_contains(db, MealLibrary.goal_flags, goal, jsonb_column=True))
+    for tag in tags:
+        query = query.filter(_json_contains(db, MealLibrary.tags, tag, jsonb_column=False))
+    if q and q.strip():
+        pattern = _like_pattern(q.strip())
+        query = query.filter(or_(
+            MealLibrary.name.ilike(pattern, escape="\\"),
+            cast(MealLibrary.ingredients, Text).ilike(pattern, escape="\\"),
+        ))
+    if cursor:
+        name, meal_id = decode_cursor(cursor)
+        query = query.filter(tuple_(MealLibrary.name, MealLibrary.id) > (name, meal_id))
+    # one extra row tells whether another page exists
+    return query.order_by(MealLibrary.name.asc(), MealLibrary.id.asc()).limit(limit + 1)
+
+def search_meals(db: Session, limit: int = 20, **filters: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of matches ordered by (name, id), plus the cursor for the next page."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    rows = meal_search_query(db, limit=limit, **filters).all()
+    items = [meal_search_json(m) for m in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1].name, str(rows[limit - 1].id)) if len(rows) > limit else None
+    return items, next_cursor
@@ -0,0 +1,304 @@
+# app/services/metrics.py
+"""Process-local request/DB metrics rendered in the Prometheus text format.
+
+`MetricsMiddleware` times every request and, through a context variable, collects
+what happened inside it: SQL statements and their time (engine events), and JSON
+render time (FastJSONResponse). Per route that splits a slow request into DB,
+serialization and everything else (handler code, threadpool wait). Scrape
+`GET /metrics`; each worker process reports its own numbers.
+"""
+from __future__ import annotations
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _fmt_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+class Gauge(_Metric):
+    """Set/inc/dec gauge, or read at scrape time from `collect` ({labels: value})."""
+    kind = "gauge"
+
+    def __init__(self, *args, collect: Optional[Callable[[], Dict[Labels, float]]] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+        self._collect = collect
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def render(self) -> List[str]:
+        if self._collect is not None:
+            items = sorted(self._collect().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Labels, List[float]] = {}   # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, labels: Labels, value: float) -> None:
+        i = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        out = self.header()
+        for labels, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += n
+                le = 'le="%s"' % _num(bound)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {_num(row[-1])}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {cumulative}")
+        return out
+
+class Collector(_Metric):
+    """Renders lines computed at scrape time from another component's own stats."""
+
+    def __init__(self, name: str, lines: Callable[[], List[str]]) -> None:
+        super().__init__(name, "")
+        self._lines = lines
+
+    def render(self) -> List[str]:
+        return self._lines()
+
+REGISTRY: List[_Metric] = []
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ----- request / DB metrics
+
+ROUTE_LABELS = ("method", "route")
+
+REQUESTS = Counter("http_requests_total", "HTTP requests served.", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time from request start to last body byte.", ROUTE_LABELS)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled.")
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per request.", ROUTE_LABELS,
+                            buckets=QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent executing SQL per request.", ROUTE_LABELS)
+REQUEST_RENDER_SECONDS = Histogram("http_request_render_seconds", "Time spent encoding the JSON body per request.",
+                                   ROUTE_LABELS)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed (all callers, incl. background jobs).")
+DB_SECONDS = Counter("db_query_seconds_total", "Time spent executing SQL.")
+POOL_WAIT_SECONDS = Histogram("db_pool_checkout_seconds", "Time to obtain a pooled connection (wait + connect).")
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    render_seconds: float = 0.0
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+def note_render(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.render_seconds += seconds
+
+# Other per-statement consumers (query budgets) hook in here instead of adding their own
+# engine listeners, so each statement is timed once: fn(statement, parameters, seconds).
+StatementListener = Callable[[str, Any, float], None]
+_statement_listeners: List[StatementListener] = []
+
+def add_statement_listener(fn: StatementListener) -> None:
+    if fn not in _statement_listeners:
+        _statement_listeners.append(fn)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("_query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    DB_QUERIES.inc()
+    DB_SECONDS.inc(amount=elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    for listener in _statement_listeners:
+        listener(statement, parameters, elapsed)
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("_query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+_instrumented = False
+
+def instrument_sqlalchemy() -> None:
+    """Count statements and DB time for every Engine (sync, and async via its sync_engine)."""
+    global _instrumented
+    if _instrumented:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _instrumented = True
+
+def instrument_pool(engine: Engine) -> None:
+    """Time `pool.connect()` (queueing for a slot plus any new connection) and export pool gauges."""
+    pool = engine.pool
+    if getattr(pool, "_metrics_timed", False):
+        return
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_WAIT_SECONDS.observe((), time.perf_counter() - started)
+
+    pool.connect = timed_connect
+    pool._metrics_timed = True
+
+    def collect(attr: str) -> Callable[[], Dict[Labels, float]]:
+        def read() -> Dict[Labels, float]:
+            fn = getattr(engine.pool, attr, None)
+            return {(): float(fn())} if callable(fn) else {}
+        return read
+
+    Gauge("db_pool_size", "Configured pool size.", collect=collect("size"))
+    Gauge("db_pool_checked_out", "Connections currently checked out.", collect=collect("checkedout"))
+    Gauge("db_pool_checked_in", "Idle connections in the pool.", collect=collect("checkedin"))
+    Gauge("db_pool_overflow", "Connections opened beyond pool_size (negative: unused capacity).",
+          collect=collect("overflow"))
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware: keeps streaming and contextvars intact)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _current.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", None) or "unmatched")
+            REQUESTS.inc(labels + (str(status["code"]),))
+            REQUEST_SECONDS.observe(labels, elapsed)
+            REQUEST_QUERIES.observe(labels, stats.queries)
+            REQUEST_DB_SECONDS.observe(labels, stats.db_seconds)
+            REQUEST_RENDER_SECONDS.observe(labels, stats.render_seconds)
+
+def _password_pool_lines() -> List[str]:
+    from app.services.passwords import password_pool_stats
+
+    stats = password_pool_stats()
+    out = [
+        "# HELP bcrypt_pool_pending Hash/verify jobs queued or running.",
+        "# TYPE bcrypt_pool_pending gauge",
+        f"bcrypt_pool_pending {stats['pending']}",
+        "# HELP bcrypt_pool_rejected_total Jobs refused because the pool was full (HTTP 503).",
+        "# TYPE bcrypt_pool_rejected_total counter",
+        f"bcrypt_pool_rejected_total {stats['rejected']}",
+        "# HELP bcrypt_job_seconds Hash/verify latency including queueing.",
+        "# TYPE bcrypt_job_seconds histogram",
+    ]
+    for op, s in stats["ops"].items():
+        for bound, n in s["buckets"].items():
+            out.append(f'bcrypt_job_seconds_bucket{{op="{op}",le="{bound}"}} {n}')
+        out.append(f'bcrypt_job_seconds_sum{{op="{op}"}} {_num(s["seconds_total"])}')
+        out.append(f'bcrypt_job_seconds_count{{op="{op}"}} {s["count"]}')
+    return out
+
+Collector("bcrypt_pool", _password_pool_lines)
@@ -0,0 +1,195 @@
+# app/services/passwords.py
+from __future__ import annotations
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+import bcrypt
+
+# bcrypt cost factor (log2 rounds) for new hashes; verification uses the hash's own cost.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# worker processes dedicated to hashing
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+# hash/verify jobs allowed in flight (queued + running) before callers get 503
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class PasswordPoolBusy(Exception):
+    """Too many hash/verify jobs pending; the caller should shed load (HTTP 503)."""
+
+# ----- executed in the worker processes
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+def _verify(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+def _noop() -> None:
+    return None
+
+# ----- pool + metrics (parent process)
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.count = {"hash": 0, "verify": 0}
+        self.seconds = {"hash": 0.0, "verify": 0.0}
+        self.buckets = {op: [0] * (len(LATENCY_BUCKETS) + 1) for op in ("hash", "verify")}
+
+    def observe(self, op: str, elapsed: float) -> None:
+        with self.lock:
+            self.count[op] += 1
+            self.seconds[op] += elapsed
+            i = next((i for i, b in enumerate(LATENCY_BUCKETS) if elapsed <= b), len(LATENCY_BUCKETS))
+            self.buckets[op][i] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "rounds": BCRYPT_ROUNDS,
+                "workers": BCRYPT_WORKERS,
+                "max_pending": BCRYPT_MAX_PENDING,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "ops": {
+                    op: {
+                        "count": self.count[op],
+                        "seconds_total": round(self.seconds[op], 6),
+                        # cumulative counts per upper bound, last entry is +Inf
+                        "buckets": dict(zip(
+                            [str(b) for b in LATENCY_BUCKETS] + ["+Inf"],
+                            [sum(self.buckets[op][:i + 1]) for i in range(len(self.buckets[op]))],
+                        )),
+                    }
+                    for op in ("hash", "verify")
+                },
+            }
+
+_stats = _Stats()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_dummy_hash: Optional[bytes] = None
+
+def _mp_context():
+    # never fork the API process: children would inherit its open DB sockets
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=BCRYPT_WORKERS, mp_context=_mp_context())
+    return _pool
+
+def _unknown_account_hash() -> bytes:
+    """A hash at BCRYPT_ROUNDS to verify against when the email is unknown (made once per process)."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        with _pool_lock:
+            if _dummy_hash is None:
+                _dummy_hash = bcrypt.hashpw(os.urandom(16), bcrypt.gensalt(BCRYPT_ROUNDS))
+    return _dummy_hash
+
+def _discard_pool(broken: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a worker died, or could not start); the next call makes a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def _submit(op: str, pool: ProcessPoolExecutor, fn, *args) -> Future:
+    with _stats.lock:
+        if _stats.pending >= BCRYPT_MAX_PENDING:
+            _stats.rejected += 1
+            raise PasswordPoolBusy()
+        _stats.pending += 1
+
+    started = time.perf_counter()
+    try:
+        fut = pool.submit(fn, *args)
+    except Exception:
+        with _stats.lock:
+            _stats.pending -= 1
+        raise
+
+    def _done(_: Future) -> None:
+        with _stats.lock:
+            _stats.pending -= 1
+        _stats.observe(op, time.perf_counter() - started)
+
+    fut.add_done_callback(_done)
+    return fut
+
+# A BrokenProcessPool is retried once on a fresh pool; if that breaks too, callers
+# get PasswordPoolBusy (503) rather than a 500 on every request until restart.
+
+def _run(op: str, fn, *args) -> Any:
+    for _ in range(2):
+        pool = _get_pool()
+        try:
+            return _submit(op, pool, fn, *args).result()
+        except BrokenProcessPool:
+            _discard_pool(pool)
+    raise PasswordPoolBusy()
+
+async def _run_async(op: str, fn, *args) -> Any:
+    for _ in range(2):
+        pool = _get_pool()
+        try:
+            return await asyncio.wrap_future(_submit(op, pool, fn, *args))
+        except BrokenProcessPool:
+            _discard_pool(pool)
+    raise PasswordPoolBusy()
+
+def hash_password(password: str) -> str:
+    """Hash in the bcrypt pool; blocks the calling thread (not the GIL) until done."""
+    return _run("hash", _hash, password.encode("utf-8"), BCRYPT_ROUNDS).decode("utf-8")
+
+def _verify_args(password: str, hashed: Optional[str]) -> tuple:
+    target = hashed.encode("utf-8") if hashed is not None else _unknown_account_hash()
+    return password.encode("utf-8"), target
+
+def verify_password(password: str, hashed: Optional[str]) -> bool:
+    """Check `password` against `hashed` in the bcrypt pool.
+
+    Pass None for an unknown account: it still costs one verification (and is
+    always False), so response timing does not tell which emails exist.
+    """
+    ok = _run("verify", _verify, *_verify_args(password, hashed))
+    return ok and hashed is not None
+
+async def hash_password_async(password: str) -> str:
+    return (await _run_async("hash", _hash, password.encode("utf-8"), BCRYPT_ROUNDS)).decode("utf-8")
+
+async def verify_password_async(password: str, hashed: Optional[str]) -> bool:
+    ok = await _run_async("verify", _verify, *_verify_args(password, hashed))
+    return ok and hashed is not None
+
+def password_pool_stats() -> Dict[str, Any]:
+    return _stats.snapshot()
+
+def start_password_pool() -> None:
+    """Spawn the hashing processes (and the unknown-account hash) now rather than on first use."""
+    _unknown_account_hash()
+    pool = _get_pool()
+    for fut in [pool.submit(_noop) for _ in range(BCRYPT_WORKERS)]:
+        fut.result()
+
+def shutdown_password_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
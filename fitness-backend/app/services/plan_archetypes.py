@@ -0,0 +1,138 @@
+# app/services/plan_archetypes.py
+"""Plan sections shared by every user with the same planning inputs.
+
+Meals depend only on (goal, diet_type, fav_protein) and workouts only on (goal,
+experience), so each distinct combination is composed once per week, stored as a
+`plan_archetypes` row, and referenced from `weekly_plans` by id. Only the targets
+stay per user. What makes up an archetype key lives in plan_builder; this module
+stores and caches the rows.
+
+Rows are immutable once written, so both caches below never need invalidating.
+They only hold rows known to be committed: a rolled-back insert must not leave an
+id behind that SQLite could hand to a different row.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models import PlanArchetype
+
+PLAN_ARCHETYPES = os.getenv("PLAN_ARCHETYPES", "1").strip().lower() in {"1", "true", "yes"}
+# entries per process-local cache (ids by key, content by id)
+PLAN_ARCHETYPE_CACHE = int(os.getenv("PLAN_ARCHETYPE_CACHE", "4096"))
+
+ArchetypeKey = Tuple[str, str]   # (section, key)
+
+class _LRU:
+    """Shared by threadpool handlers, run_sync workers and the pregen thread."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+_ids = _LRU(PLAN_ARCHETYPE_CACHE)        # (week_start, section, key) -> id
+_content = _LRU(PLAN_ARCHETYPE_CACHE)    # id -> content
+
+def clear_archetype_caches() -> None:
+    _ids.clear()
+    _content.clear()
+
+def _written(db: Session) -> set:
+    # ids this session inserted; they may still roll back, so they are never cached
+    return db.info.setdefault("plan_archetypes_written", set())
+
+def _select_ids(db: Session, week_start: date, keys: Iterable[ArchetypeKey]) -> Dict[ArchetypeKey, int]:
+    rows = (
+        db.query(PlanArchetype.id, PlanArchetype.section, PlanArchetype.key)
+        .filter(
+            PlanArchetype.week_start_date == week_start,
+            tuple_(PlanArchetype.section, PlanArchetype.key).in_(list(keys)),
+        )
+        .all()
+    )
+    return {(section, key): archetype_id for archetype_id, section, key in rows}
+
+def ensure_archetypes(
+    db: Session,
+    week_start: date,
+    builders: Dict[ArchetypeKey, Callable[[], Dict[str, Any]]],
+) -> Dict[ArchetypeKey, int]:
+    """Ids of the week's archetypes for `builders`' keys, composing and inserting missing ones.
+
+    Each builder runs at most once, and only when no row exists yet. Concurrent
+    writers race on uq_plan_archetype; the loser reads the winner's row. Caller commits.
+    """
+    ids: Dict[ArchetypeKey, int] = {}
+    missing = []
+    for section, key in builders:
+        cached = _ids.get((week_start, section, key))
+        if cached is not None:
+            ids[(section, key)] = cached
+        else:
+            missing.append((section, key))
+    if not missing:
+        return ids
+
+    written = _written(db)
+    for ak, archetype_id in _select_ids(db, week_start, missing).items():
+        ids[ak] = archetype_id
+        if archetype_id not in written:
+            _ids.put((week_start, *ak), archetype_id)
+
+    todo = [ak for ak in missing if ak not in ids]
+    if todo:
+        insert = dialect_insert(db)
+        stmt = insert(PlanArchetype).values([
+            {"week_start_date": week_start, "section": section, "key": key, "content": builders[(section, key)]()}
+            for section, key in todo
+        ]).on_conflict_do_nothing(index_elements=["week_start_date", "section", "key"])
+        db.execute(stmt)
+        found = _select_ids(db, week_start, todo)
+        written.update(found.values())
+        ids.update(found)
+    return ids
+
+def load_archetypes(db: Session, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """Archetype content by id; only ids not in the process cache are read."""
+    out: Dict[int, Dict[str, Any]] = {}
+    missing = []
+    for archetype_id in set(ids):
+        content = _content.get(archetype_id)
+        if content is not None:
+            out[archetype_id] = content
+        else:
+            missing.append(archetype_id)
+    if missing:
+        written = _written(db)
+        rows = db.query(PlanArchetype.id, PlanArchetype.content).filter(PlanArchetype.id.in_(missing)).all()
+        for archetype_id, content in rows:
+            out[archetype_id] = content
+            if archetype_id not in written:
+                _content.put(archetype_id, content)
+    return out
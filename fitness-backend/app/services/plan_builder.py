@@ -1,16 +1,35 @@
 from __future__ import annotations
+import hashlib
+import json
+from dataclasses import dataclass
 from datetime import date, timedelta
+from functools import partial
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
 
-from app.models import User, UserProfile, WeeklyPlan
-from app.models_fitness import ProgramTemplate
-from app.services.calculations import compute_daily_targets
-from app.services.workout_engine import build_week_workouts
-from app.services.meal_engine import build_week_meals, build_grocery_list
+from app.models import PlanDay, UserProfile, WeeklyPlan
+from app.services.calculations import compute_daily_targets, compute_daily_targets_batch
+from app.services.program_catalog import ProgramCatalog, get_program_catalog
+from app.services.meal_index import MealIndex, get_meal_index
+from app.services.meal_optimizer import MEAL_OPTIMIZER
+from app.services.workout_engine import compile_week_workouts, hydrate_week_workouts
+from app.services.meal_engine import compose_week_meal_refs, hydrate_week_meals, build_grocery_list
+from app.services.grocery import grocery_lines, grocery_rows
+from app.services.plan_archetypes import PLAN_ARCHETYPES, ensure_archetypes, load_archetypes
+from app.services.plan_store import PLAN_DAY_ROWS, upsert_plan_days, upsert_weekly_plans
+from app.services.query_budget import budgeted
+from app.services.single_flight import AsyncKeyedLocks, KeyedLocks, advisory_xact_lock
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 DOW_KEYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
 
+# Columns whose content the plan's ETag covers.
+HASHED_COLUMNS = ["daily_targets", "week_meals", "week_workouts", "grocery_list", "goal",
+                  "meals_archetype_id", "workouts_archetype_id"]
+
 def _monday(d: date) -> date:
     return d - timedelta(days=d.weekday())
 
@@ -28,103 +47,575 @@ def _safe_diet(diet: str | None) -> str:
     d = (diet or "nonveg").strip().lower()
     return d
 
-def _resolve_experience(db: Session, goal: str, exp: str) -> str:
-    slug = f"{goal}_{exp}"
-    exists = db.query(ProgramTemplate.id).filter(ProgramTemplate.slug == slug).first()
-    if exists:
+def _safe_level(level: str | None) -> str:
+    lv = (level or "beginner").strip().lower()
+    return lv if lv in {"beginner", "intermediate", "advanced"} else "beginner"
+
+def program_slug_for(goal: str | None, experience: str | None) -> str:
+    """Program whose warmup/cooldown/rest blocks go with today's workout, e.g. "muscle_gain_beginner"."""
+    return f"{_safe_goal(goal)}_{_safe_level(experience)}"
+
+def _resolve_experience(catalog: ProgramCatalog, goal: str, exp: str) -> str:
+    if f"{goal}_{exp}" in catalog.programs:
         return exp
 
-    beg_slug = f"{goal}_beginner"
-    beg_exists = db.query(ProgramTemplate.id).filter(ProgramTemplate.slug == beg_slug).first()
-    if beg_exists:
+    if f"{goal}_beginner" in catalog.programs:
         return "beginner"
 
     return exp
 
-def build_week_using_engines(db: Session, user_id: str, today: date) -> WeeklyPlan:
-    user: User = db.query(User).filter_by(id=user_id).one()
-    profile: UserProfile = db.query(UserProfile).filter_by(user_id=user_id).one()
+def plan_content_hash(values: Dict[str, Any]) -> str:
+    """sha256 over canonical JSON of the plan content columns."""
+    blob = json.dumps(
+        {k: values.get(k) for k in HASHED_COLUMNS},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
 
-    goal = _safe_goal(profile.goal)
-    diet_type = _safe_diet(profile.diet_type)
-    exp_raw = (profile.experience_level or "beginner").strip().lower()
-    experience = _resolve_experience(db, goal, exp_raw)
+def plan_hash(plan: WeeklyPlan) -> str:
+    """Stored content hash, computed on the fly for rows written before it existed."""
+    if plan.content_hash:
+        return plan.content_hash
+    return plan_content_hash({k: getattr(plan, k, None) for k in HASHED_COLUMNS})
 
-    week_start = _monday(today)
+def profile_inputs(profile: UserProfile) -> Dict[str, Any]:
+    """The profile fields plan building reads, as plain (picklable) values."""
+    return {
+        "user_id": str(profile.user_id),
+        "sex": profile.sex,
+        "age": profile.age,
+        "height_cm": profile.height_cm,
+        "weight_kg": profile.weight_kg,
+        "activity_level": profile.activity_level,
+        "goal": profile.goal,
+        "diet_type": profile.diet_type,
+        "fav_protein": profile.fav_protein,
+        "experience_level": profile.experience_level,
+    }
 
-    targets: Dict[str, Any] = compute_daily_targets(
-        sex=profile.sex,
-        age=profile.age,
-        height_cm=profile.height_cm,
-        weight_kg=profile.weight_kg,
-        activity=profile.activity_level,
-        goal=goal,
+# Plan sections, the columns each one owns, and (see section_fingerprints) the inputs it reads.
+SECTION_COLUMNS: Dict[str, List[str]] = {
+    "targets": ["daily_targets"],
+    "meals": ["week_meals", "grocery_list", "meals_archetype_id"],
+    "workouts": ["week_workouts", "workouts_archetype_id"],
+}
+SECTIONS = list(SECTION_COLUMNS)
+
+# Sections that can live in a shared plan_archetypes row instead of the user's plan.
+# Optimized meals are fitted to each user's targets, so they stay per user.
+ARCHETYPE_COLUMNS: Dict[str, str] = {"meals": "meals_archetype_id", "workouts": "workouts_archetype_id"}
+ARCHETYPE_SECTIONS = [s for s in ARCHETYPE_COLUMNS if PLAN_ARCHETYPES and not (s == "meals" and MEAL_OPTIMIZER)]
+# Part of every archetype key: bump when a section's stored layout changes, so builds
+# stop reusing the week's archetypes in the old layout.
+ARCHETYPE_FORMAT = 3
+
+def _fingerprint(*parts: Any) -> str:
+    blob = json.dumps(parts, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+def section_fingerprints(inputs: Dict[str, Any]) -> Dict[str, str]:
+    """Per-section digest of exactly the (normalized) profile inputs that section reads."""
+    goal = _safe_goal(inputs["goal"])
+    targets = _fingerprint(
+        goal, inputs["sex"], inputs["age"], inputs["height_cm"],
+        inputs["weight_kg"], inputs["activity_level"],
     )
+    meals = [goal, _safe_diet(inputs["diet_type"]), inputs["fav_protein"]]
+    if MEAL_OPTIMIZER:
+        meals.append(targets)  # optimized meals are fitted to the targets
+    return {
+        "targets": targets,
+        "meals": _fingerprint(*meals),
+        "workouts": _fingerprint(goal, (inputs["experience_level"] or "beginner").strip().lower()),
+    }
+
+def stale_sections(plan: WeeklyPlan | None, profile: UserProfile) -> List[str]:
+    """Sections of `plan` whose inputs changed since it was built (all of them if no plan)."""
+    if plan is None:
+        return SECTIONS
+    stored = plan.input_fingerprints
+    if not stored:
+        # written before fingerprints existed: only a goal change is detectable
+        return [] if plan.goal == _safe_goal(profile.goal) else SECTIONS
+    current = section_fingerprints(profile_inputs(profile))
+    return [s for s in SECTIONS if stored.get(s) != current[s]]
+
+def plan_values(plan: WeeklyPlan) -> Dict[str, Any]:
+    """A stored plan's section columns and fingerprints, for `compose_week_plan(previous=...)`."""
+    values = {c: getattr(plan, c) for cols in SECTION_COLUMNS.values() for c in cols}
+    values["input_fingerprints"] = plan.input_fingerprints or {}
+    return values
+
+def _kept_sections(fingerprints: Dict[str, str], previous: Dict[str, Any] | None) -> List[str]:
+    kept = (previous or {}).get("input_fingerprints") or {}
+    return [s for s in SECTIONS if kept.get(s) == fingerprints[s]]
+
+def compose_section(
+    section: str,
+    inputs: Dict[str, Any],
+    catalog: ProgramCatalog,
+    meal_index: MealIndex,
+    targets: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """The meals or workouts section's columns (catalog references; see hydrate_plan)."""
+    goal = _safe_goal(inputs["goal"])
+    if section == "workouts":
+        exp_raw = (inputs["experience_level"] or "beginner").strip().lower()
+        return {"week_workouts": compile_week_workouts(
+            catalog,
+            goal=goal,
+            experience=_resolve_experience(catalog, goal, exp_raw),
+        )}
 
-    week_workouts: Dict[str, Any] = build_week_workouts(
-        db=db,
+    week_meals: Dict[str, Any] = compose_week_meal_refs(
+        meal_index,
         goal=goal,
-        experience=experience,
+        diet_type=_safe_diet(inputs["diet_type"]),
+        fav_protein=inputs["fav_protein"],
+        targets=targets,
     )
+    return {"week_meals": week_meals, "grocery_list": build_grocery_list(week_meals, meal_index)}
 
-    week_meals: Dict[str, Any] = build_week_meals(
-        db=db,
-        goal=goal,
-        diet_type=diet_type,
-        fav_protein=profile.fav_protein
+def archetype_keys(inputs: Dict[str, Any], catalog: ProgramCatalog, meal_index: MealIndex) -> Dict[str, str]:
+    """Per shareable section, the key of the archetype these inputs map to.
+
+    The catalog version is part of the key, so plans built after a catalog change
+    get freshly composed archetypes.
+    """
+    fingerprints = section_fingerprints(inputs)
+    versions = {"meals": meal_index.version, "workouts": catalog.version}
+    return {s: _fingerprint(fingerprints[s], versions[s], ARCHETYPE_FORMAT) for s in ARCHETYPE_SECTIONS}
+
+def resolve_archetypes(
+    db: Session,
+    week_start: date,
+    inputs: List[Dict[str, Any]],
+    catalog: ProgramCatalog,
+    meal_index: MealIndex,
+    previous: List[Dict[str, Any] | None] | None = None,
+) -> List[Dict[str, int]]:
+    """Archetype ids for each profile's shareable sections, for `compose_week_plan(archetype_ids=...)`.
+
+    Every distinct archetype is composed at most once, so a batch costs O(archetypes)
+    instead of O(users). Sections that `previous` lets compose_week_plan keep are skipped.
+    Caller commits.
+    """
+    previous = previous or [None] * len(inputs)
+    wanted: List[Dict[str, str]] = []
+    builders = {}
+    for i, prev in zip(inputs, previous):
+        kept = _kept_sections(section_fingerprints(i), prev)
+        keys = {s: k for s, k in archetype_keys(i, catalog, meal_index).items() if s not in kept}
+        for section, key in keys.items():
+            builders.setdefault((section, key), partial(compose_section, section, i, catalog, meal_index))
+        wanted.append(keys)
+    if not builders:
+        return [{} for _ in inputs]
+    ids = ensure_archetypes(db, week_start, builders)
+    return [{s: ids[(s, k)] for s, k in keys.items()} for keys in wanted]
+
+def daily_targets_batch(inputs: List[Dict[str, Any]]) -> List[Dict[str, int]]:
+    """compute_daily_targets for many profile_inputs at once (one NumPy pass), as
+    compose_week_plan would compute them one by one."""
+    if not inputs:
+        return []
+    columns = compute_daily_targets_batch(
+        sex=[i["sex"] for i in inputs],
+        age=[i["age"] for i in inputs],
+        height_cm=[i["height_cm"] for i in inputs],
+        weight_kg=[i["weight_kg"] for i in inputs],
+        activity=[i["activity_level"] for i in inputs],
+        goal=[_safe_goal(i["goal"]) for i in inputs],
     )
+    return [dict(zip(columns, map(int, row))) for row in zip(*columns.values())]
 
-    grocery = build_grocery_list(week_meals)
+def compose_week_plan(
+    inputs: Dict[str, Any],
+    week_start: date,
+    catalog: ProgramCatalog,
+    meal_index: MealIndex,
+    previous: Dict[str, Any] | None = None,
+    archetype_ids: Dict[str, int] | None = None,
+    targets: Dict[str, int] | None = None,
+) -> Dict[str, Any]:
+    """Compute a WeeklyPlan's column values from profile inputs and catalog snapshots (no DB).
 
-    plan = WeeklyPlan(
-        user_id=user_id,
-        week_start_date=week_start,
-        daily_targets=targets,
-        week_meals=week_meals,
-        week_workouts=week_workouts,
-        grocery_list=grocery,
-        goal=goal, 
+    With `previous` (see plan_values), sections whose input fingerprint is unchanged
+    are copied over instead of recomputed. Sections in `archetype_ids` (see
+    resolve_archetypes) are stored as that archetype's id, with their columns NULL.
+    `targets`, if given, are this user's daily targets already computed in bulk
+    (see daily_targets_batch).
+    """
+    goal = _safe_goal(inputs["goal"])
+
+    fingerprints = section_fingerprints(inputs)
+    values: Dict[str, Any] = {
+        "user_id": inputs["user_id"],
+        "week_start_date": week_start,
+        "goal": goal,
+        "input_fingerprints": fingerprints,
+    }
+    done = _kept_sections(fingerprints, previous)
+    for section in done:
+        # plans written before archetypes existed have no id columns
+        values.update({c: previous.get(c) for c in SECTION_COLUMNS[section]})
+    for section, archetype_id in (archetype_ids or {}).items():
+        if section not in done:
+            values.update(dict.fromkeys(SECTION_COLUMNS[section]))
+            values[ARCHETYPE_COLUMNS[section]] = archetype_id
+            done.append(section)
+
+    if "targets" not in done and targets is not None:
+        values["daily_targets"] = targets
+    elif "targets" not in done:
+        values["daily_targets"] = compute_daily_targets(
+            sex=inputs["sex"],
+            age=inputs["age"],
+            height_cm=inputs["height_cm"],
+            weight_kg=inputs["weight_kg"],
+            activity=inputs["activity_level"],
+            goal=goal,
+        )
+
+    for section, column in ARCHETYPE_COLUMNS.items():
+        if section not in done:
+            values.update(compose_section(section, inputs, catalog, meal_index, targets=values["daily_targets"]))
+            values[column] = None
+
+    values["content_hash"] = plan_content_hash(values)
+    return values
+
+@dataclass
+class PlanView:
+    """A WeeklyPlan with its meal and workout references resolved, ready to render."""
+    week_start_date: date
+    goal: str | None
+    daily_targets: Dict[str, Any]
+    week_meals: Dict[str, Any]
+    week_workouts: Dict[str, Any]
+    grocery_list: List[str]
+    grocery_items: List[Dict[str, Any]]
+    content_hash: str
+    week_blocks: Dict[str, Dict[str, Any] | None]   # dow -> stored blocks reference; see day_blocks
+
+def _get(plan: WeeklyPlan | Dict[str, Any], column: str) -> Any:
+    # a stored plan, or compose_week_plan values
+    return plan.get(column) if isinstance(plan, dict) else getattr(plan, column, None)
+
+def plan_archetype_ids(plan: WeeklyPlan | Dict[str, Any]) -> List[int]:
+    return [i for i in (_get(plan, c) for c in ARCHETYPE_COLUMNS.values()) if i is not None]
+
+def load_plan_archetypes(db: Session, plan: WeeklyPlan) -> Dict[int, Dict[str, Any]]:
+    """The archetypes `plan` refers to, for hydrate_plan (no query once cached)."""
+    ids = plan_archetype_ids(plan)
+    return load_archetypes(db, ids) if ids else {}
+
+def plan_sections(plan: WeeklyPlan | Dict[str, Any], archetypes: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """The plan's meal and workout columns, read through its archetype references."""
+    values = {c: _get(plan, c) for c in ("week_meals", "grocery_list", "week_workouts")}
+    for column in ARCHETYPE_COLUMNS.values():
+        archetype_id = _get(plan, column)
+        if archetype_id is not None:
+            values.update(archetypes[archetype_id])
+    return values
+
+def hydrate_plan(
+    plan: WeeklyPlan,
+    catalog: ProgramCatalog,
+    meal_index: MealIndex,
+    archetypes: Dict[int, Dict[str, Any]] | None = None,
+) -> PlanView:
+    """Expand a stored plan against catalog snapshots (no DB).
+
+    `archetypes` must hold every archetype the plan refers to (load_plan_archetypes).
+    The result shares the snapshots' dicts, so treat it as read-only. Its
+    content_hash covers the stored references only; ETags must also include
+    the catalog versions.
+    """
+    sections = plan_sections(plan, archetypes or {})
+    return PlanView(
+        week_start_date=plan.week_start_date,
+        goal=plan.goal,
+        daily_targets=plan.daily_targets,
+        week_meals=hydrate_week_meals(sections["week_meals"], meal_index),
+        week_workouts=hydrate_week_workouts(sections["week_workouts"], catalog),
+        grocery_list=grocery_lines(sections["grocery_list"]),
+        grocery_items=grocery_rows(sections["grocery_list"]),
+        content_hash=plan_hash(plan),
+        week_blocks={k: slot.get("blocks") for k, slot in sections["week_workouts"].items()},
     )
-    db.add(plan)
-    db.commit()
-    db.refresh(plan)
-    return plan
 
+def day_blocks(blocks: Dict[str, Any] | None, catalog: ProgramCatalog, program_slug: str, weekday: int) -> Dict[str, Any]:
+    """A day's warmup/cooldown/rest blocks, from a stored day's `blocks`.
 
-def get_or_build_current_week(db: Session, user_id: str, today: date) -> WeeklyPlan:
-    week_start = _monday(today)
+    That is a `{program, weekday}` reference into the catalog (see compile_week_workouts).
+    Plans built before it hold the compiled blocks themselves, or nothing; the latter
+    look theirs up by `program_slug`.
+    """
+    if blocks is None:
+        return catalog.today_blocks(program_slug, weekday)
+    if "is_rest" in blocks:
+        return blocks
+    return catalog.today_blocks(blocks["program"], blocks["weekday"])
+
+# workout_today for a day the plan has no entry for
+TODAY_REST = {"focus": "Rest", "details": [], "coachNote": "Rest up."}
+
+def plan_days(
+    plan: WeeklyPlan | Dict[str, Any],
+    archetypes: Dict[int, Dict[str, Any]],
+    program_slug: str,
+) -> List[Dict[str, Any]]:
+    """`plan` cut into seven plan_days rows (meals still catalog references; see hydrate_day)."""
+    sections = plan_sections(plan, archetypes)
+    week_start = _get(plan, "week_start_date")
+    content_hash = _get(plan, "content_hash") if isinstance(plan, dict) else plan_hash(plan)
+    return [
+        {
+            "user_id": str(_get(plan, "user_id")),
+            "day": week_start + timedelta(days=i),
+            "week_start_date": week_start,
+            "daily_targets": _get(plan, "daily_targets"),
+            "meals": sections["week_meals"].get(key, []),
+            "workout": sections["week_workouts"].get(key, TODAY_REST),
+            "program_slug": program_slug,
+            "plan_hash": content_hash,
+            "input_fingerprints": _get(plan, "input_fingerprints") or {},
+        }
+        for i, key in enumerate(DOW_KEYS)
+    ]
 
-    plan = (
+def store_plan_days(db: Session, plans: List[Tuple[WeeklyPlan | Dict[str, Any], str]]) -> int:
+    """Upsert the plan_days rows of (plan, program_slug) pairs. Caller commits."""
+    archetypes = load_archetypes(db, [i for plan, _ in plans for i in plan_archetype_ids(plan)])
+    return upsert_plan_days(db, [row for plan, slug in plans for row in plan_days(plan, archetypes, slug)])
+
+def hydrate_day(
+    day: Dict[str, Any], catalog: ProgramCatalog, meal_index: MealIndex, weekday: int,
+) -> Tuple[List[Dict], Dict[str, Any], Dict[str, Any]]:
+    """A plan_days row's meals, workout card and blocks, expanded against catalog snapshots (no DB)."""
+    meals = hydrate_week_meals({"day": day["meals"]}, meal_index)["day"]
+    workout = hydrate_week_workouts({"day": day["workout"]}, catalog)["day"]
+    blocks = day_blocks(day["workout"].get("blocks"), catalog, day["program_slug"], weekday)
+    return meals, workout, blocks
+
+def _load_plan(db: Session, user_id: str, week_start: date) -> WeeklyPlan | None:
+    return (
         db.query(WeeklyPlan)
         .filter(WeeklyPlan.user_id == user_id, WeeklyPlan.week_start_date == week_start)
+        .populate_existing()
+        .one_or_none()
+    )
+
+
+def build_week_using_engines(
+    db: Session,
+    user_id: str,
+    today: date,
+    profile: UserProfile | None = None,
+    previous: WeeklyPlan | None = None,
+) -> WeeklyPlan:
+    """Compute the week and write it with INSERT ... ON CONFLICT (uq_user_week) DO UPDATE.
+
+    Pass the stored plan as `previous` to recompute only its stale sections.
+    """
+    if profile is None:
+        profile = db.query(UserProfile).filter_by(user_id=user_id).one()
+
+    week_start = _monday(today)
+    inputs = profile_inputs(profile)
+    prev = plan_values(previous) if previous is not None else None
+    catalog, meal_index = get_program_catalog(db), get_meal_index(db)
+    [archetype_ids] = resolve_archetypes(db, week_start, [inputs], catalog, meal_index, previous=[prev])
+    values = compose_week_plan(inputs, week_start, catalog, meal_index, previous=prev, archetype_ids=archetype_ids)
+
+    upsert_weekly_plans(db, [values])
+    if PLAN_DAY_ROWS:
+        store_plan_days(db, [(values, program_slug_for(profile.goal, profile.experience_level))])
+    db.commit()
+    return _load_plan(db, user_id, week_start)
+
+
+def load_week_and_profile(
+    db: Session, user_id: str, week_start: date
+) -> Tuple[WeeklyPlan | None, UserProfile | None]:
+    """Fetch the profile and that week's plan (if any) in a single joined query."""
+    row = (
+        db.query(UserProfile, WeeklyPlan)
+        .outerjoin(
+            WeeklyPlan,
+            and_(
+                WeeklyPlan.user_id == UserProfile.user_id,
+                WeeklyPlan.week_start_date == week_start,
+            ),
+        )
+        .filter(UserProfile.user_id == user_id)
         .one_or_none()
     )
+    if row is None:
+        return None, None
+    profile, plan = row
+    return plan, profile
+
 
-    if plan:
-        profile: UserProfile = db.query(UserProfile).filter_by(user_id=user_id).one()
-        current_goal = _safe_goal(profile.goal)
+def _usable(plan: WeeklyPlan | None, profile: UserProfile) -> bool:
+    return plan is not None and not stale_sections(plan, profile)
 
-        if plan.goal != current_goal:
-            db.delete(plan)
-            db.commit()
-            plan = None
 
-    if plan:
+# the read path on its own: one joined query, two when the profile row is missing.
+# Builds are counted by the route budget, not here.
+@budgeted(2, "plan current read")
+def _load_current(db: Session, user_id: str, today: date) -> Tuple[WeeklyPlan | None, UserProfile]:
+    plan, profile = load_week_and_profile(db, user_id, _monday(today))
+    if profile is None:
+        # no profile -> nothing to build from (raises NoResultFound like before)
+        profile = db.query(UserProfile).filter_by(user_id=user_id).one()
+    return plan, profile
+
+
+def _build_exclusive(db: Session, user_id: str, today: date, profile: UserProfile) -> WeeklyPlan:
+    """Build under the cross-worker lock, unless a concurrent caller already did."""
+    week_start = _monday(today)
+    advisory_xact_lock(db, f"weekly_plan:{user_id}:{week_start}")
+
+    plan = _load_plan(db, user_id, week_start)
+    if _usable(plan, profile):
+        db.commit()  # releases the advisory lock
         return plan
 
-    return build_week_using_engines(db, user_id, today)
+    # missing, or some sections built from outdated inputs: recompute just those in place
+    return build_week_using_engines(db, user_id, today, profile=profile, previous=plan)
+
+
+# Per-process single-flight: concurrent callers for the same user/week wait on one build.
+_building = KeyedLocks()
+_building_async = AsyncKeyedLocks()
+
+
+def get_current_week_and_profile(
+    db: Session, user_id: str, today: date
+) -> Tuple[WeeklyPlan, UserProfile]:
+    """Current week's plan plus the profile it was checked against.
+
+    When the plan exists and none of its sections are stale, this is one round-trip.
+    """
+    plan, profile, _ = _current_week(db, user_id, today)
+    return plan, profile
+
+def _current_week(db: Session, user_id: str, today: date) -> Tuple[WeeklyPlan, UserProfile, bool]:
+    """get_current_week_and_profile, plus whether this call had to take the build path."""
+    plan, profile = _load_current(db, user_id, today)
+    if _usable(plan, profile):
+        return plan, profile, False
+
+    with _building.hold((user_id, _monday(today))):
+        plan = _build_exclusive(db, user_id, today, profile)
+    return plan, profile, True
+
+
+def get_or_build_current_week(db: Session, user_id: str, today: date) -> WeeklyPlan:
+    plan, _ = get_current_week_and_profile(db, user_id, today)
+    return plan
+
+
+async def get_current_week_and_profile_async(
+    db: AsyncSession, user_id: str, today: date
+) -> Tuple[WeeklyPlan, UserProfile]:
+    """AsyncSession variant; the sync builder runs on the async connection via run_sync.
+
+    Waiting happens on an asyncio lock, never a thread lock, so the loop stays free.
+    """
+    plan, profile, _ = await _current_week_async(db, user_id, today)
+    return plan, profile
+
+async def _current_week_async(db: AsyncSession, user_id: str, today: date) -> Tuple[WeeklyPlan, UserProfile, bool]:
+    plan, profile = await db.run_sync(_load_current, user_id, today)
+    if _usable(plan, profile):
+        return plan, profile, False
+
+    async with _building_async.hold((user_id, _monday(today))):
+        plan = await db.run_sync(_build_exclusive, user_id, today, profile)
+    return plan, profile, True
+
+
+async def get_or_build_current_week_async(db: AsyncSession, user_id: str, today: date) -> WeeklyPlan:
+    plan, _ = await get_current_week_and_profile_async(db, user_id, today)
+    return plan
+
+
+DayRow = Dict[str, Any]   # plan_days columns: daily_targets, meals, workout, program_slug, plan_hash
+
+def _day_row(day: PlanDay) -> DayRow:
+    return {
+        "daily_targets": day.daily_targets,
+        "meals": day.meals,
+        "workout": day.workout,
+        "program_slug": day.program_slug,
+        "plan_hash": day.plan_hash,
+    }
+
+def load_day_and_profile(db: Session, user_id: str, day: date) -> Tuple[PlanDay | None, UserProfile]:
+    """The profile and that day's plan_days row (if any) in a single joined query."""
+    row = (
+        db.query(UserProfile, PlanDay)
+        .outerjoin(PlanDay, and_(PlanDay.user_id == UserProfile.user_id, PlanDay.day == day))
+        .filter(UserProfile.user_id == user_id)
+        .one_or_none()
+    )
+    if row is None:
+        # no profile -> nothing to build from (raises NoResultFound like _load_current)
+        return None, db.query(UserProfile).filter_by(user_id=user_id).one()
+    profile, plan_day = row
+    return plan_day, profile
+
+def _day_usable(day: PlanDay | None, profile: UserProfile) -> bool:
+    return day is not None and day.input_fingerprints == section_fingerprints(profile_inputs(profile))
+
+def _day_from_plan(db: Session, plan: WeeklyPlan, profile: UserProfile, today: date, built: bool) -> DayRow:
+    """Today's row cut from the weekly plan.
+
+    A build already wrote the week's plan_days rows. Otherwise the plan was current
+    but its rows were missing (built before PLAN_DAY_ROWS was on): they are written
+    once, and only if they will pass _day_usable, so a legacy plan without
+    fingerprints is cut from on every read instead of rewritten on every read.
+    """
+    archetypes = load_plan_archetypes(db, plan)
+    rows = plan_days(plan, archetypes, program_slug_for(profile.goal, profile.experience_level))
+    if PLAN_DAY_ROWS and not built and plan.input_fingerprints == section_fingerprints(profile_inputs(profile)):
+        upsert_plan_days(db, rows)
+        db.commit()
+    return rows[today.weekday()]
+
+def get_today(db: Session, user_id: str, today: date) -> DayRow:
+    """Today's plan_days row: one small joined read when it is stored and current.
+
+    Otherwise (or with PLAN_DAY_ROWS off) falls back to the weekly plan (building stale sections as /plan/current
+    does) and cuts today out of it; see _day_from_plan for when the rows are stored.
+    """
+    if PLAN_DAY_ROWS:
+        day, profile = load_day_and_profile(db, user_id, today)
+        if _day_usable(day, profile):
+            return _day_row(day)
+    plan, profile, built = _current_week(db, user_id, today)
+    return _day_from_plan(db, plan, profile, today, built)
+
+async def get_today_async(db: AsyncSession, user_id: str, today: date) -> DayRow:
+    if PLAN_DAY_ROWS:
+        day, profile = await db.run_sync(load_day_and_profile, user_id, today)
+        if _day_usable(day, profile):
+            return _day_row(day)
+    plan, profile, built = await _current_week_async(db, user_id, today)
+    return await db.run_sync(_day_from_plan, plan, profile, today, built)
 
 
-def slice_today(plan: WeeklyPlan, today: date):
+def slice_today(plan: PlanView, today: date):
     key = DOW_KEYS[today.weekday()]
     return {
         "daily_targets": plan.daily_targets,
         "today_meals": plan.week_meals.get(key, []),
-        "workout_today": plan.week_workouts.get(
-            key,
-            {"focus": "Rest", "details": [], "coachNote": "Rest up."},
-        ),
+        "workout_today": plan.week_workouts.get(key, TODAY_REST),
         "week_meals": plan.week_meals,
         "week_workouts": plan.week_workouts,
         "grocery_list": plan.grocery_list,
+        "grocery_items": plan.grocery_items,
     }
@@ -0,0 +1,244 @@
+# app/services/plan_pregen.py
+"""Off-peak pre-generation of next week's plans, one job per timezone bucket.
+
+Jobs live in `plan_pregen_jobs`; each batch advances the job's keyset cursor in
+the same transaction that upserts the plans, so a crashed or stopped worker
+resumes where it left off. Run it in-process (PREGEN_IN_PROCESS=1) or with
+`python -m scripts.pregenerate_plans`.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Callable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.models import PlanPregenJob, UserProfile, WeeklyPlan
+from app.services.meal_index import get_meal_index
+from app.services.plan_builder import (
+    compose_week_plan, profile_inputs, program_slug_for, resolve_archetypes, store_plan_days,
+)
+from app.services.plan_store import PLAN_DAY_ROWS, upsert_weekly_plans
+from app.services.program_catalog import get_program_catalog
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TZ = "UTC"
+# users/s ceiling for one worker, so pre-generation never competes with API traffic
+PREGEN_RATE = float(os.getenv("PREGEN_RATE", "50"))
+PREGEN_BATCH = int(os.getenv("PREGEN_BATCH", "200"))
+# local off-peak window and the local weekdays it applies on (mon=0 .. sun=6)
+PREGEN_WINDOW = os.getenv("PREGEN_WINDOW", "01:00-05:00")
+PREGEN_WEEKDAYS = os.getenv("PREGEN_WEEKDAYS", "sat,sun")
+PREGEN_POLL_SECONDS = float(os.getenv("PREGEN_POLL_SECONDS", "60"))
+
+_DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+def _parse_window(spec: str) -> Tuple[dtime, dtime]:
+    start, end = spec.split("-", 1)
+    return dtime.fromisoformat(start.strip()), dtime.fromisoformat(end.strip())
+
+def _parse_weekdays(spec: str) -> set[int]:
+    return {_DAY_NAMES.index(d.strip().lower()[:3]) for d in spec.split(",") if d.strip()}
+
+WINDOW = _parse_window(PREGEN_WINDOW)
+WEEKDAYS = _parse_weekdays(PREGEN_WEEKDAYS)
+
+class RateLimiter:
+    """Token bucket: `acquire(n)` sleeps until n tokens are available."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def acquire(self, n: int) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= n or self.tokens >= self.capacity:
+                self.tokens -= n
+                return
+            time.sleep((min(n, self.capacity) - self.tokens) / self.rate)
+
+def _zone(bucket: str):
+    try:
+        return ZoneInfo(bucket)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+def local_now(bucket: str, now_utc: datetime) -> datetime:
+    return now_utc.astimezone(_zone(bucket))
+
+def in_off_peak(local: datetime) -> bool:
+    if local.weekday() not in WEEKDAYS:
+        return False
+    start, end = WINDOW
+    t = local.time()
+    return start <= t < end if start <= end else (t >= start or t < end)
+
+def upcoming_week(local: datetime) -> date:
+    """Monday following the bucket's local date."""
+    d = local.date()
+    return d + timedelta(days=7 - d.weekday())
+
+def _bucket_expr():
+    return func.coalesce(UserProfile.timezone, DEFAULT_TZ)
+
+def tz_buckets(db: Session) -> List[str]:
+    return [b for (b,) in db.query(_bucket_expr()).distinct().all()]
+
+def schedule_jobs(db: Session, now_utc: datetime) -> int:
+    """Create jobs for buckets currently inside their off-peak window; expire stale ones."""
+    today_utc = now_utc.date()
+    created = 0
+    for bucket in tz_buckets(db):
+        local = local_now(bucket, now_utc)
+        if not in_off_peak(local):
+            continue
+        week = upcoming_week(local)
+        exists = db.query(PlanPregenJob.id).filter_by(week_start_date=week, tz_bucket=bucket).first()
+        if not exists:
+            db.add(PlanPregenJob(week_start_date=week, tz_bucket=bucket, status="pending", processed=0))
+            created += 1
+
+    # a week that has started is served by the lazy path; stop pre-building it
+    db.query(PlanPregenJob).filter(
+        PlanPregenJob.status.in_(["pending", "running"]),
+        PlanPregenJob.week_start_date <= today_utc,
+    ).update({"status": "expired"}, synchronize_session=False)
+    db.commit()
+    return created
+
+def _claim_job(db: Session, now_utc: datetime) -> Optional[PlanPregenJob]:
+    """Lock one runnable job whose bucket is in its window (SKIP LOCKED lets workers share)."""
+    candidates = (
+        db.query(PlanPregenJob.id, PlanPregenJob.tz_bucket)
+        .filter(PlanPregenJob.status.in_(["pending", "running"]))
+        .order_by(PlanPregenJob.id.asc())
+        .all()
+    )
+    for job_id, bucket in candidates:
+        if not in_off_peak(local_now(bucket, now_utc)):
+            continue
+        job = (
+            db.query(PlanPregenJob)
+            .filter(PlanPregenJob.id == job_id, PlanPregenJob.status.in_(["pending", "running"]))
+            .with_for_update(skip_locked=True)
+            .one_or_none()
+        )
+        if job is not None:
+            return job
+    return None
+
+def process_batch(db: Session, job: PlanPregenJob, limit: int) -> int:
+    """Build up to `limit` missing plans for the job's bucket and advance its cursor."""
+    q = (
+        db.query(UserProfile)
+        .outerjoin(
+            WeeklyPlan,
+            and_(
+                WeeklyPlan.user_id == UserProfile.user_id,
+                WeeklyPlan.week_start_date == job.week_start_date,
+            ),
+        )
+        .filter(_bucket_expr() == job.tz_bucket, WeeklyPlan.id.is_(None))
+        .order_by(UserProfile.user_id.asc())
+    )
+    if job.cursor_user_id:
+        q = q.filter(UserProfile.user_id > job.cursor_user_id)
+    profiles = q.limit(limit).all()
+
+    if not profiles:
+        job.status = "done"
+        job.finished_at = datetime.now(timezone.utc)
+        return 0
+
+    catalog = get_program_catalog(db)
+    meal_index = get_meal_index(db)
+    inputs = [profile_inputs(p) for p in profiles]
+    # meals/workouts are composed once per distinct archetype in the batch, not per user
+    archetype_ids = resolve_archetypes(db, job.week_start_date, inputs, catalog, meal_index)
+    rows = [
+        compose_week_plan(i, job.week_start_date, catalog, meal_index, archetype_ids=a)
+        for i, a in zip(inputs, archetype_ids)
+    ]
+    upsert_weekly_plans(db, rows)
+    if PLAN_DAY_ROWS:
+        store_plan_days(db, [(r, program_slug_for(i["goal"], i["experience_level"])) for r, i in zip(rows, inputs)])
+
+    job.status = "running"
+    job.cursor_user_id = rows[-1]["user_id"]
+    job.processed = (job.processed or 0) + len(rows)
+    return len(rows)
+
+def run_once(
+    session_factory: Callable[[], Session],
+    now_utc: Optional[datetime] = None,
+    limiter: Optional[RateLimiter] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Schedule due jobs, then work through them batch by batch. Returns plans written.
+
+    `now_utc` pins the clock (tests, backfills); by default it is re-read per batch
+    so a long run stops when its window closes.
+    """
+    clock = (lambda: now_utc) if now_utc else (lambda: datetime.now(timezone.utc))
+    limiter = limiter or RateLimiter(PREGEN_RATE)
+
+    with session_factory() as db:
+        schedule_jobs(db, clock())
+
+    written = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        limiter.acquire(PREGEN_BATCH)
+        with session_factory() as db:
+            job = _claim_job(db, clock())
+            if job is None:
+                break
+            n = process_batch(db, job, PREGEN_BATCH)
+            db.commit()
+        written += n
+        batches += 1
+    return written
+
+def run_forever(session_factory: Callable[[], Session], stop: threading.Event) -> None:
+    limiter = RateLimiter(PREGEN_RATE)
+    while not stop.is_set():
+        try:
+            n = run_once(session_factory, limiter=limiter)
+            if n:
+                log.info("pre-generated %d weekly plans", n)
+        except Exception:
+            log.exception("plan pre-generation tick failed")
+        stop.wait(PREGEN_POLL_SECONDS)
+
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+def start_background_pregen(session_factory: Callable[[], Session]) -> None:
+    """In-process mode: a daemon thread in this worker polls for due jobs."""
+    global _thread
+    if _thread is not None:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=run_forever, args=(session_factory, _stop),
+                               name="plan-pregen", daemon=True)
+    _thread.start()
+
+def stop_background_pregen() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
@@ -0,0 +1,54 @@
+# app/services/plan_store.py
+from __future__ import annotations
+import os
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.models import PlanDay, WeeklyPlan, uuid_pk
+
+# Also store every plan as seven plan_days rows, for GET /plan/today.
+PLAN_DAY_ROWS = os.getenv("PLAN_DAY_ROWS", "").strip().lower() in {"1", "true", "yes"}
+
+# Columns rewritten when a (user_id, week_start_date) row already exists.
+PLAN_UPDATE_COLUMNS = ["daily_targets", "week_meals", "week_workouts", "grocery_list", "goal", "content_hash",
+                       "input_fingerprints", "meals_archetype_id", "workouts_archetype_id"]
+
+def upsert_weekly_plans(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """INSERT ... ON CONFLICT (uq_user_week) DO UPDATE for every row. Caller commits.
+
+    Executed with the row list like catalog_import.upsert_rows, so insertmanyvalues
+    pages the VALUES clause under the driver's bind-parameter limit however many
+    plans a rebuild chunk holds.
+    """
+    if not rows:
+        return 0
+
+    insert = dialect_insert(db)
+    values = [{"id": uuid_pk(), **r} for r in rows]
+    stmt = insert(WeeklyPlan.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "week_start_date"],
+        set_={c: stmt.excluded[c] for c in PLAN_UPDATE_COLUMNS},
+    )
+    db.connection().execute(stmt, values)
+    return len(values)
+
+PLAN_DAY_UPDATE_COLUMNS = ["week_start_date", "daily_targets", "meals", "workout", "program_slug", "plan_hash",
+                           "input_fingerprints"]
+
+def upsert_plan_days(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """INSERT ... ON CONFLICT (user_id, day) DO UPDATE for every row, paged like
+    upsert_weekly_plans. Caller commits."""
+    if not rows:
+        return 0
+
+    insert = dialect_insert(db)
+    stmt = insert(PlanDay.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day"],
+        set_={c: stmt.excluded[c] for c in PLAN_DAY_UPDATE_COLUMNS},
+    )
+    db.connection().execute(stmt, rows)
+    return len(rows)
@@ -0,0 +1,99 @@
+# app/services/program_catalog.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models_fitness import (
+    ProgramTemplate, ProgramWeekTemplate, ProgramDayTemplate,
+    WarmupBlock, CooldownBlock, RestDayTemplate
+)
+from app.services.catalog_version import PROGRAM_CATALOG, VersionedCache, read_catalog_version
+
+EMPTY_BLOCKS: Dict[str, Any] = {
+    "is_rest": False, "title": None, "focus": None,
+    "warmup": None, "cooldown": None, "rest": None,
+}
+
+@dataclass
+class ProgramCatalog:
+    """Plain-dict snapshot of the program tables (safe to pickle and share read-only)."""
+    version: int
+    programs: Dict[str, Dict[str, Any]] = field(default_factory=dict)           # slug -> program
+    week: Dict[int, Dict[int, Dict[str, Any]]] = field(default_factory=dict)    # program_id -> weekday -> slot
+    days: Dict[Tuple[int, int], Dict[str, Any]] = field(default_factory=dict)   # (program_id, day_number) -> day
+    blocks: Dict[Tuple[str, int], Dict[str, Any]] = field(default_factory=dict) # (slug, isoweekday) -> today blocks
+
+    def today_blocks(self, program_slug: str, weekday: int) -> Dict[str, Any]:
+        return dict(self.blocks.get((program_slug, weekday), EMPTY_BLOCKS))
+
+def _compile_blocks(cat: ProgramCatalog, rest_by_slug: Dict[str, Any],
+                    prog: Dict[str, Any], weekday: int) -> Dict[str, Any]:
+    wt = cat.week.get(prog["id"], {}).get(weekday)
+    if not wt:
+        return dict(EMPTY_BLOCKS)
+
+    if wt["is_rest"]:
+        return {"is_rest": True, "title": "Rest / Active Recovery", "focus": None,
+                "warmup": None, "cooldown": None, "rest": rest_by_slug.get(wt["rest_slug"])}
+
+    day = cat.days.get((prog["id"], wt["day_number"]))
+    if not day:
+        return dict(EMPTY_BLOCKS)
+
+    return {
+        "is_rest": False,
+        "title": day["name"],
+        "focus": day["focus"],
+        "warmup": day["warmup"],
+        "cooldown": day["cooldown"],
+        "rest": None
+    }
+
+def load_program_catalog(db: Session, version: Optional[int] = None) -> ProgramCatalog:
+    """Read the whole program/warmup/cooldown/rest catalog in one pass (six queries)."""
+    if version is None:
+        version = read_catalog_version(db, PROGRAM_CATALOG)
+    cat = ProgramCatalog(version=version)
+
+    warmups = {w.id: w.content for w in db.query(WarmupBlock).all()}
+    cooldowns = {c.id: c.content for c in db.query(CooldownBlock).all()}
+    rest_by_slug = {r.slug: r.content for r in db.query(RestDayTemplate).all()}
+
+    for p in db.query(ProgramTemplate).order_by(ProgramTemplate.id.asc()).all():
+        cat.programs[p.slug] = {
+            "id": p.id, "slug": p.slug, "name": p.name, "goal": p.goal,
+            "level": p.level, "is_active": bool(p.is_active),
+        }
+
+    for w in db.query(ProgramWeekTemplate).all():
+        cat.week.setdefault(w.program_id, {})[w.weekday] = {
+            "weekday": w.weekday, "day_number": w.day_number,
+            "is_rest": bool(w.is_rest), "rest_slug": w.rest_slug,
+        }
+
+    for d in db.query(ProgramDayTemplate).all():
+        cat.days[(d.program_id, d.day_number)] = {
+            "name": d.name,
+            "focus": d.focus,
+            "coach_note": d.coach_note,
+            "details": d.details_json or [],
+            "warmup": warmups.get(d.warmup_block_id) if d.warmup_block_id else None,
+            "cooldown": cooldowns.get(d.cooldown_block_id) if d.cooldown_block_id else None,
+        }
+
+    for slug, prog in cat.programs.items():
+        for weekday in range(1, 8):
+            cat.blocks[(slug, weekday)] = _compile_blocks(cat, rest_by_slug, prog, weekday)
+
+    return cat
+
+_cache: VersionedCache[ProgramCatalog] = VersionedCache(PROGRAM_CATALOG, load_program_catalog)
+
+def get_program_catalog(db: Session) -> ProgramCatalog:
+    """Process-local, read-through catalog; reloads when the version stamp moves."""
+    return _cache.get(db)
+
+def invalidate_program_catalog() -> None:
+    _cache.invalidate()
@@ -0,0 +1,233 @@
+# app/services/query_budget.py
+"""Query budgets and N+1 detection on top of the metrics module's statement hook.
+
+In code and tests:
+
+    with query_budget(2, label="plan current"):
+        get_current_week_and_profile(db, user_id, today)
+
+raises QueryBudgetExceeded (with every statement) when more than 2 statements
+run inside the block. A statement that runs N_PLUS_ONE_THRESHOLD or more times
+with different parameters is reported as a likely N+1 even within budget.
+
+Routes declare their budget with `@route_query_budget(n)`; with
+QUERY_BUDGET_MODE=warn|raise, QueryBudgetMiddleware checks every request against
+it (dev only - off by default). Recording follows the request's context, so
+concurrent requests do not see each other's statements. Tests that drive the app
+through TestClient (which runs it on another thread) use `all_threads=True`.
+"""
+from __future__ import annotations
+import functools
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.services.metrics import add_statement_listener, instrument_sqlalchemy
+
+log = logging.getLogger(__name__)
+
+# off | warn | raise
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").strip().lower()
+# budget for routes without @route_query_budget (unset = unchecked)
+_default = os.getenv("QUERY_BUDGET_DEFAULT", "").strip()
+QUERY_BUDGET_DEFAULT: Optional[int] = int(_default) if _default else None
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "3"))
+
+_PLACEHOLDER_RUN = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+|\$\d+))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+def normalize_sql(statement: str) -> str:
+    """Statement shape: whitespace collapsed, expanded IN (...) lists folded to one placeholder."""
+    return _PLACEHOLDER_RUN.sub("(?)", _SPACE.sub(" ", statement).strip())
+
+@dataclass
+class RecordedQuery:
+    statement: str
+    parameters: Any
+    seconds: float
+
+@dataclass
+class QueryReport:
+    label: str
+    budget: Optional[int]
+    queries: List[RecordedQuery] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statements run `threshold`+ times with more than one distinct parameter set."""
+        groups: Dict[str, List[RecordedQuery]] = {}
+        for q in self.queries:
+            groups.setdefault(normalize_sql(q.statement), []).append(q)
+        out = []
+        for sql, runs in groups.items():
+            if len(runs) >= threshold and len({repr(r.parameters) for r in runs}) > 1:
+                out.append((sql, len(runs)))
+        return sorted(out, key=lambda x: -x[1])
+
+    def format(self) -> str:
+        head = f"{self.label}: {self.count} queries"
+        if self.budget is not None:
+            head += f" (budget {self.budget})"
+        lines = [head]
+        for sql, n in self.repeated():
+            lines.append(f"  possible N+1, {n}x: {sql}")
+        for i, q in enumerate(self.queries, 1):
+            lines.append(f"  [{i}] {q.seconds * 1000:.2f} ms  {normalize_sql(q.statement)}  {q.parameters!r}")
+        return "\n".join(lines)
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, report: QueryReport) -> None:
+        super().__init__(report.format())
+        self.report = report
+
+# ----- recording
+
+_context_reports: ContextVar[Tuple[QueryReport, ...]] = ContextVar("query_reports", default=())
+_exempt: ContextVar[bool] = ContextVar("query_budget_exempt", default=False)
+_global_reports: List[QueryReport] = []
+_global_lock = threading.Lock()
+_installed = False
+
+def _record(statement: str, parameters: Any, seconds: float) -> None:
+    if _exempt.get():
+        return
+    reports = _context_reports.get()
+    if _global_reports:
+        with _global_lock:
+            reports = reports + tuple(_global_reports)
+    if reports:
+        q = RecordedQuery(statement, parameters, seconds)
+        for report in reports:
+            report.queries.append(q)
+
+def _install() -> None:
+    # statements are timed by the metrics engine listener, which hands each one to _record
+    global _installed
+    if not _installed:
+        instrument_sqlalchemy()
+        add_statement_listener(_record)
+        _installed = True
+
+@contextmanager
+def record_queries(label: str = "block", budget: Optional[int] = None, all_threads: bool = False) -> Iterator[QueryReport]:
+    """Collect the statements executed inside the block (this context, or every thread)."""
+    _install()
+    report = QueryReport(label=label, budget=budget)
+    if all_threads:
+        with _global_lock:
+            _global_reports.append(report)
+        try:
+            yield report
+        finally:
+            with _global_lock:
+                _global_reports.remove(report)
+    else:
+        token = _context_reports.set(_context_reports.get() + (report,))
+        try:
+            yield report
+        finally:
+            _context_reports.reset(token)
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block", all_threads: bool = False) -> Iterator[QueryReport]:
+    """Raise QueryBudgetExceeded if the block runs more than `max_queries` statements."""
+    with record_queries(label, max_queries, all_threads) as report:
+        yield report
+    if report.over_budget:
+        raise QueryBudgetExceeded(report)
+
+@contextmanager
+def exempt_queries() -> Iterator[None]:
+    """Statements inside are not counted (e.g. catalog reloads, amortized over many requests)."""
+    token = _exempt.set(True)
+    try:
+        yield
+    finally:
+        _exempt.reset(token)
+
+def route_query_budget(max_queries: int) -> Callable:
+    """Declare the most statements one request to this endpoint may run."""
+    def decorate(fn: Callable) -> Callable:
+        fn.__query_budget__ = max_queries
+        return fn
+    return decorate
+
+def budgeted(max_queries: int, label: Optional[str] = None) -> Callable:
+    """Decorator form of `query_budget` for service functions (sync only).
+
+    Follows QUERY_BUDGET_MODE like the middleware: off runs the function
+    unchecked, warn logs an overrun, and only raise raises. Tests that must
+    enforce a budget wrap the call in `query_budget` themselves.
+    """
+    def decorate(fn: Callable) -> Callable:
+        name = label or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if QUERY_BUDGET_MODE == "raise":
+                with query_budget(max_queries, name):
+                    return fn(*args, **kwargs)
+            if QUERY_BUDGET_MODE != "warn":
+                return fn(*args, **kwargs)
+            with record_queries(name, max_queries) as report:
+                result = fn(*args, **kwargs)
+            if report.over_budget or report.repeated():
+                log.warning("query budget: %s", report.format())
+            return result
+        return wrapper
+    return decorate
+
+class QueryBudgetMiddleware:
+    """Dev-mode check of each request against its route's declared budget.
+
+    warn: log the report (over budget, or any likely N+1). raise: additionally
+    raise QueryBudgetExceeded once the response is done - the client already has
+    it, but the server logs an error and TestClient re-raises it into the test.
+    Every checked response carries X-Query-Count.
+    """
+
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE) -> None:
+        self.app = app
+        self.mode = mode
+        if mode in {"warn", "raise"}:
+            _install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode not in {"warn", "raise"}:
+            await self.app(scope, receive, send)
+            return
+
+        report = QueryReport(label=f"{scope['method']} {scope['path']}", budget=None)
+        token = _context_reports.set(_context_reports.get() + (report,))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(report.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _context_reports.reset(token)
+
+        endpoint = getattr(scope.get("route"), "endpoint", None)
+        # 0 is a real budget (a route that must not touch the database)
+        report.budget = getattr(endpoint, "__query_budget__", QUERY_BUDGET_DEFAULT)
+        if report.over_budget or report.repeated():
+            log.warning("query budget: %s", report.format())
+        if report.over_budget and self.mode == "raise":
+            raise QueryBudgetExceeded(report)
@@ -0,0 +1,218 @@
+# app/services/response_cache.py
+"""Rendered /plan response bodies, keyed by the response's ETag (PLAN_CACHE=1).
+
+Two tiers: a process-local LRU bounded by TTL and total bytes, and optionally a
+shared tier (PLAN_CACHE_SHARED) that every worker reads. A shared tier is anything
+with get/set on bytes; `SQLiteCache` is the one shipped here, for a single host or
+tests. A Redis or memcached client wrapped in the same two methods drops in.
+
+Nothing is ever invalidated. The handler reads the stored plan first (one query),
+and the ETag it derives covers the plan's content_hash and the catalog versions,
+so a plan rebuilt by any worker, a profile save or rebuild_plans gets a new key and
+old entries just age out. What a hit saves is hydration and rendering. The shared
+tier only lets workers reuse each other's renders; it is not needed for freshness.
+"""
+from __future__ import annotations
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.services.metrics import Counter
+
+log = logging.getLogger(__name__)
+
+PLAN_CACHE = os.getenv("PLAN_CACHE", "0").strip().lower() in {"1", "true", "yes"}
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "600"))
+# budget for bodies held by each process (the local tier)
+PLAN_CACHE_MAX_BYTES = int(os.getenv("PLAN_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# e.g. sqlite:////var/cache/fitness/plan_cache.db; empty: local tier only
+PLAN_CACHE_SHARED = os.getenv("PLAN_CACHE_SHARED", "").strip()
+
+LOOKUPS = Counter("plan_cache_lookups_total", "Rendered plan response cache lookups.", ("route", "result"))
+
+class CacheTier:
+    """Byte values with a per-entry TTL. Implementations must be thread-safe."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+class LocalCache(CacheTier):
+    """In-process LRU; evicts expired entries first, then least recently used past `max_bytes`."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data: OrderedDict[str, Tuple[bytes, float]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _drop(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (_, expires) in self._data.items() if expires <= now]:
+            self._drop(key)
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._data)))
+
+class SQLiteCache(CacheTier):
+    """Shared tier in a SQLite file, for workers on one host (and tests)."""
+
+    PURGE_EVERY = 256   # writes between sweeps of expired rows
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)", (key, value, now + ttl))
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+
+def shared_tier(url: str) -> Optional[CacheTier]:
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteCache(url[len("sqlite:///"):])
+    raise ValueError(f"unsupported PLAN_CACHE_SHARED: {url!r}")
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+
+    def encode(self) -> bytes:
+        return self.etag.encode("ascii") + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> "CachedResponse":
+        etag, body = value.split(b"\n", 1)
+        return cls(body=body, etag=etag.decode("ascii"))
+
+class ResponseCache:
+    """Local tier in front of an optional shared one; see the module docstring."""
+
+    def __init__(
+        self,
+        enabled: bool,
+        ttl: float,
+        max_bytes: int,
+        shared: Optional[CacheTier] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.ttl = ttl
+        self.local = LocalCache(max_bytes)
+        self.shared = shared
+
+    def key(self, route: str, user_id: str, etag: str) -> Optional[str]:
+        """Cache key for a response whose ETag is `etag`, or None when caching is off."""
+        if not self.enabled:
+            return None
+        return "|".join([route, user_id, etag])
+
+    def get(self, route: str, key: Optional[str]) -> Optional[CachedResponse]:
+        if key is None:
+            return None
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as exc:
+                log.warning("plan cache read failed: %s", exc)
+            if value is not None:
+                self.local.set(key, value, self.ttl)
+        LOOKUPS.inc((route, "hit" if value is not None else "miss"))
+        return CachedResponse.decode(value) if value is not None else None
+
+    def put(self, key: Optional[str], body: bytes, etag: str) -> None:
+        if key is None:
+            return
+        value = CachedResponse(body=body, etag=etag).encode()
+        self.local.set(key, value, self.ttl)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, self.ttl)
+            except Exception as exc:
+                log.warning("plan cache write failed: %s", exc)
+
+    # async handlers: the shared tier does blocking I/O, so it runs in the threadpool
+    # (never inside db.run_sync, which would hold a DB connection meanwhile)
+    async def get_async(self, route: str, key: Optional[str]) -> Optional[CachedResponse]:
+        if self.shared is None or key is None:
+            return self.get(route, key)
+        return await run_in_threadpool(self.get, route, key)
+
+    async def put_async(self, key: Optional[str], body: bytes, etag: str) -> None:
+        if self.shared is None or key is None:
+            self.put(key, body, etag)
+        else:
+            await run_in_threadpool(self.put, key, body, etag)
+
+plan_cache = ResponseCache(
+    enabled=PLAN_CACHE,
+    ttl=PLAN_CACHE_TTL,
+    max_bytes=PLAN_CACHE_MAX_BYTES,
+    shared=shared_tier(PLAN_CACHE_SHARED) if PLAN_CACHE else None,
+)
@@ -0,0 +1,65 @@
+# app/services/single_flight.py
+from __future__ import annotations
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Hashable, Iterator, AsyncIterator, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+class KeyedLocks:
+    """One threading.Lock per key, dropped again once nobody holds or waits on it."""
+
+    def __init__(self) -> None:
+        self._guard = threading.Lock()
+        self._locks: Dict[Hashable, Tuple[threading.Lock, int]] = {}
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        with self._guard:
+            lock, users = self._locks.get(key, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._guard:
+                lock, users = self._locks[key]
+                if users == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, users - 1)
+
+class AsyncKeyedLocks:
+    """asyncio counterpart of KeyedLocks for handlers running on the event loop."""
+
+    def __init__(self) -> None:
+        self._locks: Dict[Hashable, Tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+def advisory_xact_lock(db: Session, key: str) -> None:
+    """Cross-worker mutex held until the current transaction ends (PostgreSQL only).
+
+    Other dialects have no equivalent; there the in-process lock plus the
+    ON CONFLICT write keeps concurrent builders from failing.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
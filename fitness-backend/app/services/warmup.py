@@ -0,0 +1,127 @@
+# app/services/warmup.py
+"""Startup warm-up and readiness for the API workers.
+
+Importing the app touches neither the database nor the schema: the engine is
+created and connected from the lifespan hook, which opens DB_WARMUP_CONNECTIONS
+pooled connections and loads the program catalog and meal index. With
+BCRYPT_WARMUP=1 it first starts the bcrypt pool, before any connection exists;
+otherwise the pool starts on the first sign-up. Schema changes belong to Alembic (`alembic upgrade head`);
+DB_CREATE_ALL=1 restores the old create_all for throwaway dev databases.
+
+`/health/live` only says the process is up. `/health/ready` says 503 until
+warm-up has finished and the database answers, so new workers take traffic
+once they are warm. A failed warm-up (database not up yet) is retried by the
+next readiness probe.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import text
+
+from app.db import ASYNC_DB, Base, SessionLocal, get_async_engine, get_engine
+
+log = logging.getLogger(__name__)
+
+# dev only: create missing tables at startup instead of running migrations
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "").strip().lower() in {"1", "true", "yes"}
+# pooled connections opened before the worker reports ready (capped at the pool size)
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", "2"))
+PRELOAD_CATALOGS = os.getenv("PRELOAD_CATALOGS", "1").strip().lower() in {"1", "true", "yes"}
+# also spawn the bcrypt worker processes during warm-up (~300 ms before ready); off by
+# default, the pool starts on the first sign-up instead
+BCRYPT_WARMUP = os.getenv("BCRYPT_WARMUP", "0").strip().lower() in {"1", "true", "yes"}
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {"ready": False, "steps": {}, "error": None}
+
+def _timed(steps: Dict[str, float], name: str, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    steps[name] = round((time.perf_counter() - started) * 1000, 2)
+
+def _create_all() -> None:
+    from app import models, models_fitness  # noqa: F401  (register tables)
+    Base.metadata.create_all(bind=get_engine())
+
+def _warm_pool() -> None:
+    engine = get_engine()
+    size = getattr(engine.pool, "size", None)
+    n = min(DB_WARMUP_CONNECTIONS, size()) if callable(size) else DB_WARMUP_CONNECTIONS
+    conns = []
+    try:
+        # held together so each checkout opens its own connection
+        for _ in range(max(n, 1)):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+def _preload_catalogs() -> None:
+    from app.services.meal_index import get_meal_index
+    from app.services.program_catalog import get_program_catalog
+
+    with SessionLocal() as db:
+        get_program_catalog(db)
+        get_meal_index(db)
+
+def _start_password_pool() -> None:
+    from app.services.passwords import start_password_pool
+    start_password_pool()
+
+def warm_up() -> Dict[str, Any]:
+    """Run the (sync) warm-up steps once; safe to call again after a failure."""
+    with _lock:
+        if _state["ready"]:
+            return dict(_state)
+        steps: Dict[str, float] = {}
+        started = time.perf_counter()
+        try:
+            # before any DB connection is open, so the hashing processes never see one
+            if BCRYPT_WARMUP:
+                _timed(steps, "bcrypt_pool", _start_password_pool)
+            if DB_CREATE_ALL:
+                _timed(steps, "create_all", _create_all)
+            _timed(steps, "db_pool", _warm_pool)
+            if PRELOAD_CATALOGS:
+                _timed(steps, "catalogs", _preload_catalogs)
+        except Exception as exc:
+            _state.update(error=f"{type(exc).__name__}: {exc}", steps=steps)
+            log.warning("warm-up failed after %s: %s", list(steps), exc)
+            return dict(_state)
+        steps["total"] = round((time.perf_counter() - started) * 1000, 2)
+        _state.update(ready=True, error=None, steps=steps)
+        log.info("warm-up done in %.1f ms: %s", steps["total"], steps)
+        return dict(_state)
+
+async def warm_up_async_engine() -> None:
+    """DB_ASYNC=1: open the async engine's connections too (requests use that pool)."""
+    if not ASYNC_DB:
+        return
+    engine = get_async_engine()
+    conns = []
+    try:
+        for _ in range(max(DB_WARMUP_CONNECTIONS, 1)):
+            conn = await engine.connect()
+            conns.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            await conn.close()
+
+def readiness() -> Tuple[bool, Dict[str, Any]]:
+    """(ready, warm-up state): warmed up and the database answers."""
+    state = warm_up()
+    if not state["ready"]:
+        return False, state
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as exc:
+        return False, {**state, "error": f"{type(exc).__name__}: {exc}"}
+    return True, state
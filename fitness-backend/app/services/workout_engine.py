@@ -1,14 +1,12 @@
 # app/services/workout_engine.py
 from __future__ import annotations
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional
 from sqlalchemy.orm import Session
 
-from app.models_fitness import (
-    ProgramTemplate,
-    ProgramDayTemplate,
-    ProgramWeekTemplate,
-    RestDayTemplate,
-)
+from app.services.program_catalog import ProgramCatalog, get_program_catalog
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 DOW = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]  # 1..7 -> mon..sun
 
@@ -35,78 +33,95 @@ def _ensure_7_days(week_workouts: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[s
         out[k] = week_workouts.get(k) or rest
     return out
 
-def _pick_program(db: Session, goal: str, level: str) -> Optional[ProgramTemplate]:
-    prog = (
-        db.query(ProgramTemplate)
-        .filter(
-            ProgramTemplate.goal == goal,
-            ProgramTemplate.level == level,
-            ProgramTemplate.is_active.is_(True),
-        )
-        .order_by(ProgramTemplate.id.asc())
-        .first()
-    )
-    if prog:
-        return prog
-
-    prog = (
-        db.query(ProgramTemplate)
-        .filter(
-            ProgramTemplate.goal == goal,
-            ProgramTemplate.is_active.is_(True),
-        )
-        .order_by(ProgramTemplate.id.asc())
-        .first()
-    )
-    return prog
+def _pick_program(catalog: ProgramCatalog, goal: str, level: str) -> Optional[Dict[str, Any]]:
+    active = [p for p in catalog.programs.values() if p["goal"] == goal and p["is_active"]]
+    active.sort(key=lambda p: p["id"])
+    for prog in active:
+        if prog["level"] == level:
+            return prog
+    return active[0] if active else None
 
 def build_week_workouts(db: Session, goal: Optional[str], experience: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    return compose_week_workouts(get_program_catalog(db), goal, experience)
+
+async def build_week_workouts_async(db: AsyncSession, goal: Optional[str], experience: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    return compose_week_workouts(await db.run_sync(get_program_catalog), goal, experience)
+
+REST_FALLBACK = {"focus": "Rest", "details": [], "coachNote": "Recovery / light mobility."}
+
+def compose_week_workouts(catalog: ProgramCatalog, goal: Optional[str], experience: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Pure variant of `build_week_workouts` over a loaded program catalog."""
+    return hydrate_week_workouts(compile_week_workouts(catalog, goal, experience), catalog)
+
+def _blocks_ref(program_slug: Optional[str], weekday: int) -> Dict[str, Any]:
+    # resolved against ProgramCatalog.blocks on read (see plan_builder.day_blocks)
+    return {"program": program_slug, "weekday": weekday}
+
+def compile_week_workouts(catalog: ProgramCatalog, goal: Optional[str], experience: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """The week as stored on WeeklyPlan: training days as `{program, day}` references, rest days inline.
+
+    Every day also carries `blocks`, a `{program, weekday}` reference to the warmup/cooldown/rest
+    blocks of the program `_pick_program` chose; like meal IDs, it is hydrated from the catalog on read.
+    """
     g = _normalize_goal(goal)
     e = _normalize_experience(experience)
 
-    prog = _pick_program(db, g, e)
+    prog = _pick_program(catalog, g, e)
     if not prog:
-        return _ensure_7_days({})
+        rest = _ensure_7_days({})
+        return {k: {**rest[k], "blocks": _blocks_ref(None, idx)} for idx, k in enumerate(DOW, start=1)}
 
-    week_rows = (
-        db.query(ProgramWeekTemplate)
-        .filter(ProgramWeekTemplate.program_id == prog.id)
-        .all()
-    )
-    by_weekday = {w.weekday: w for w in week_rows}
+    by_weekday = catalog.week.get(prog["id"], {})
 
     out: Dict[str, Dict[str, Any]] = {}
 
     for idx, key in enumerate(DOW, start=1):
         w = by_weekday.get(idx)
+        blocks = _blocks_ref(prog["slug"], idx)
         if not w:
-            out[key] = {"focus": "Rest", "details": [], "coachNote": "Recovery / light mobility."}
+            out[key] = {**REST_FALLBACK, "blocks": blocks}
             continue
 
-        if getattr(w, "is_rest", False):
-            out[key] = {"focus": "Rest", "details": [], "coachNote": "Active recovery or easy walk."}
+        if w["is_rest"]:
+            out[key] = {"focus": "Rest", "details": [], "coachNote": "Active recovery or easy walk.", "blocks": blocks}
             continue
 
-        day: Optional[ProgramDayTemplate] = (
-            db.query(ProgramDayTemplate)
-            .filter(
-                ProgramDayTemplate.program_id == prog.id,
-                ProgramDayTemplate.day_number == w.day_number,
-            )
-            .one_or_none()
-        )
+        if (prog["id"], w["day_number"]) not in catalog.days:
+            out[key] = {**REST_FALLBACK, "blocks": blocks}
+            continue
 
-        if not day:
-            out[key] = {"focus": "Rest", "details": [], "coachNote": "Recovery / light mobility."}
+        # program slug, not id: slugs survive a reseed
+        out[key] = {"program": prog["slug"], "day": w["day_number"], "blocks": blocks}
+
+    return out
+
+def workout_card(slot: Dict[str, Any]) -> Dict[str, Any]:
+    """A stored day without its `blocks` (those are returned separately, for today only)."""
+    if "blocks" not in slot:
+        return slot
+    return {k: v for k, v in slot.items() if k != "blocks"}
+
+def hydrate_week_workouts(week: Dict[str, Dict[str, Any]], catalog: ProgramCatalog) -> Dict[str, Dict[str, Any]]:
+    """Workout cards for a stored week.
+
+    `{program, day}` references are resolved against the catalog; inline days (rest days,
+    and every day of plans that stored compiled cards) pass through without their blocks.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    for key, slot in week.items():
+        if "program" not in slot:
+            out[key] = workout_card(slot)
             continue
 
-        details = getattr(day, "details_json", []) or []
-        coach_note = getattr(day, "coach_note", "") or ""
+        prog = catalog.programs.get(slot["program"])
+        day = catalog.days.get((prog["id"], slot["day"])) if prog else None
+        if not day:
+            out[key] = dict(REST_FALLBACK)
+            continue
 
         out[key] = {
-            "focus": day.name or "Training",
-            "details": details,
-            "coachNote": coach_note,
+            "focus": day["name"] or "Training",
+            "details": day["details"],
+            "coachNote": day["coach_note"] or "",
         }
-
-    return _ensure_7_days(out)
+    return out
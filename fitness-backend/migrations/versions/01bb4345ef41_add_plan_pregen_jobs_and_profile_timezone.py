@@ -0,0 +1,42 @@
+"""add plan_pregen_jobs and user_profile.timezone
+
+Revision ID: 01bb4345ef41
+Revises: d7b48f280ad5
+Create Date: 2026-10-18 10:41:05.553190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '01bb4345ef41'
+down_revision: Union[str, Sequence[str], None] = 'd7b48f280ad5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_profile', sa.Column('timezone', sa.Text(), nullable=True))
+    op.create_table('plan_pregen_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('week_start_date', sa.Date(), nullable=False),
+    sa.Column('tz_bucket', sa.Text(), nullable=False),
+    sa.Column('status', sa.Text(), nullable=False),
+    sa.Column('cursor_user_id', sa.UUID(as_uuid=False), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('week_start_date', 'tz_bucket', name='uq_pregen_week_tz')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('plan_pregen_jobs')
+    op.drop_column('user_profile', 'timezone')
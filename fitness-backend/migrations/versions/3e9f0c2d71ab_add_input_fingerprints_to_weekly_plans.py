@@ -0,0 +1,29 @@
+"""add input_fingerprints to weekly_plans
+
+Revision ID: 3e9f0c2d71ab
+Revises: 01bb4345ef41
+Create Date: 2026-10-18 13:41:09.562310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9f0c2d71ab'
+down_revision: Union[str, Sequence[str], None] = '01bb4345ef41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing rows stay NULL; they keep the goal-only check until rebuilt
+    op.add_column('weekly_plans', sa.Column('input_fingerprints', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('weekly_plans', 'input_fingerprints')
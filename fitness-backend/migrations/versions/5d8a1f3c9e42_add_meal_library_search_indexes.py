@@ -0,0 +1,59 @@
+"""add meal_library search indexes
+
+Revision ID: 5d8a1f3c9e42
+Revises: c41e7b9d2f58
+Create Date: 2026-10-18 18:24:51.307645
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8a1f3c9e42'
+down_revision: Union[str, Sequence[str], None] = 'c41e7b9d2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # btree indexes only (declared on the model); GIN/trigram need PostgreSQL
+        op.create_index('ix_meal_library_category_diet', 'meal_library', ['category', 'diet_type', 'name'])
+        op.create_index('ix_meal_library_name_id', 'meal_library', ['name', 'id'])
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY keeps the table writable while a large library is indexed
+    with op.get_context().autocommit_block():
+        op.create_index('ix_meal_library_category_diet', 'meal_library', ['category', 'diet_type', 'name'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_meal_library_name_id', 'meal_library', ['name', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        # goal_flags @> '["fat_loss"]'
+        op.create_index('ix_meal_library_goal_flags', 'meal_library', ['goal_flags'],
+                        postgresql_using='gin', postgresql_ops={'goal_flags': 'jsonb_path_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        # name ILIKE '%egg%'
+        op.create_index('ix_meal_library_name_trgm', 'meal_library', ['name'],
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        # CAST(ingredients AS TEXT) ILIKE '%oats%'
+        op.create_index('ix_meal_library_ingredients_trgm', 'meal_library', [sa.text('(ingredients::text) gin_trgm_ops')],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index('ix_meal_library_name_id', table_name='meal_library')
+        op.drop_index('ix_meal_library_category_diet', table_name='meal_library')
+        return
+
+    with op.get_context().autocommit_block():
+        for name in ('ix_meal_library_ingredients_trgm', 'ix_meal_library_name_trgm', 'ix_meal_library_goal_flags',
+                     'ix_meal_library_name_id', 'ix_meal_library_category_diet'):
+            op.drop_index(name, table_name='meal_library', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,192 @@
+"""store weekly plan meals and workouts as catalog references
+
+Revision ID: 9a4d2e61c0f7
+Revises: 3e9f0c2d71ab
+Create Date: 2026-10-18 14:26:51.304877
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d2e61c0f7'
+down_revision: Union[str, Sequence[str], None] = '3e9f0c2d71ab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 500
+
+weekly_plans = sa.table(
+    'weekly_plans',
+    sa.column('id', postgresql.UUID(as_uuid=False)),
+    sa.column('goal', sa.String()),
+    sa.column('daily_targets', sa.JSON()),
+    sa.column('week_meals', sa.JSON()),
+    sa.column('week_workouts', sa.JSON()),
+    sa.column('grocery_list', sa.JSON()),
+    sa.column('content_hash', sa.String()),
+)
+meal_library = sa.table(
+    'meal_library',
+    sa.column('id', postgresql.UUID(as_uuid=False)),
+    sa.column('name', sa.Text()),
+    sa.column('category', sa.Text()),
+    sa.column('ingredients', sa.JSON()),
+    sa.column('instructions', sa.Text()),
+    sa.column('macros', sa.JSON()),
+    sa.column('tags', sa.JSON()),
+)
+program_template = sa.table(
+    'program_template',
+    sa.column('id', sa.Integer()),
+    sa.column('slug', sa.String()),
+    sa.column('goal', sa.String()),
+)
+program_day_template = sa.table(
+    'program_day_template',
+    sa.column('program_id', sa.Integer()),
+    sa.column('day_number', sa.Integer()),
+    sa.column('name', sa.String()),
+    sa.column('coach_note', sa.Text()),
+    sa.column('details_json', sa.JSON()),
+)
+
+
+def _key(obj) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def _content_hash(row: dict) -> str:
+    # same as app.services.plan_builder.plan_content_hash, frozen here
+    cols = ['daily_targets', 'week_meals', 'week_workouts', 'grocery_list', 'goal']
+    return hashlib.sha256(_key({k: row[k] for k in cols}).encode('utf-8')).hexdigest()
+
+
+def _catalogs(conn):
+    """Meals and workout cards exactly as the app serialized them inline, keyed both ways."""
+    meals = {}
+    for m in conn.execute(sa.select(meal_library)).mappings():
+        meals[str(m['id'])] = {
+            'name': m['name'],
+            'category': m['category'],
+            'ingredients': m['ingredients'] or [],
+            'instructions': m['instructions'] or '',
+            'macros': m['macros'] or {},
+            'tags': m['tags'] or [],
+        }
+
+    cards = {}
+    goals = {}
+    q = sa.select(program_template.c.slug, program_template.c.goal, program_day_template).join(
+        program_day_template, program_day_template.c.program_id == program_template.c.id
+    ).order_by(program_template.c.id, program_day_template.c.day_number)
+    for d in conn.execute(q).mappings():
+        cards[(d['slug'], d['day_number'])] = {
+            'focus': d['name'] or 'Training',
+            'details': d['details_json'] or [],
+            'coachNote': d['coach_note'] or '',
+        }
+        goals[d['slug']] = d['goal']
+    return meals, cards, goals
+
+
+def _rewrite(conn, convert) -> None:
+    last = None
+    while True:
+        q = sa.select(weekly_plans).order_by(weekly_plans.c.id).limit(BATCH)
+        if last is not None:
+            q = q.where(weekly_plans.c.id > last)
+        rows = [dict(r) for r in conn.execute(q).mappings()]
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            row['week_meals'] = convert['meals'](row['week_meals'] or {})
+            row['week_workouts'] = convert['workouts'](row['week_workouts'] or {}, row['goal'])
+            updates.append({
+                '_id': row['id'],
+                'week_meals': row['week_meals'],
+                'week_workouts': row['week_workouts'],
+                'content_hash': _content_hash(row),
+            })
+        conn.execute(
+            weekly_plans.update().where(weekly_plans.c.id == sa.bindparam('_id')).values(
+                week_meals=sa.bindparam('week_meals'),
+                week_workouts=sa.bindparam('week_workouts'),
+                content_hash=sa.bindparam('content_hash'),
+            ),
+            updates,
+        )
+        last = rows[-1]['id']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    meals, cards, goals = _catalogs(conn)
+
+    # a slot becomes a reference only if hydrating it reproduces the stored JSON
+    meal_ids = {}
+    for meal_id, meal in meals.items():
+        meal_ids.setdefault(_key(meal), meal_id)
+    card_refs = {}
+    for ref, card in cards.items():
+        card_refs.setdefault(_key(card), []).append(ref)
+
+    def meals_to_refs(week):
+        out = {}
+        for dow, slots in week.items():
+            out[dow] = []
+            for slot in slots:
+                meal = slot.get('meal')
+                if meal == {}:
+                    out[dow].append({'label': slot['label'], 'meal_id': None})
+                elif meal is not None and _key(meal) in meal_ids:
+                    out[dow].append({'label': slot['label'], 'meal_id': meal_ids[_key(meal)]})
+                else:
+                    out[dow].append(slot)
+        return out
+
+    def workouts_to_refs(week, goal):
+        out = {}
+        for dow, day in week.items():
+            refs = card_refs.get(_key(day)) if day.get('focus') != 'Rest' else None
+            if not refs:
+                out[dow] = day
+                continue
+            # identical cards can exist in several programs; prefer one for the plan's goal
+            slug, number = next((r for r in refs if goals.get(r[0]) == goal), refs[0])
+            out[dow] = {'program': slug, 'day': number}
+        return out
+
+    _rewrite(conn, {'meals': meals_to_refs, 'workouts': workouts_to_refs})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    meals, cards, _ = _catalogs(conn)
+    rest = {'focus': 'Rest', 'details': [], 'coachNote': 'Recovery / light mobility.'}
+
+    def meals_inline(week):
+        return {
+            dow: [
+                slot if 'meal' in slot else {'label': slot['label'], 'meal': meals.get(slot.get('meal_id'), {})}
+                for slot in slots
+            ]
+            for dow, slots in week.items()
+        }
+
+    def workouts_inline(week, goal):
+        return {
+            dow: cards.get((day['program'], day['day']), rest) if 'program' in day else day
+            for dow, day in week.items()
+        }
+
+    _rewrite(conn, {'meals': meals_inline, 'workouts': workouts_inline})
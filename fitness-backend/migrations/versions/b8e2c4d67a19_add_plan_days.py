@@ -0,0 +1,41 @@
+"""add plan_days for per-day plan reads
+
+Revision ID: b8e2c4d67a19
+Revises: e6b3f5a81d07
+Create Date: 2026-10-18 20:03:37.915204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2c4d67a19'
+down_revision: Union[str, Sequence[str], None] = 'e6b3f5a81d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # filled as plans are built (PLAN_DAY_ROWS=1); GET /plan/today falls back to weekly_plans
+    op.create_table('plan_days',
+    sa.Column('user_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('week_start_date', sa.Date(), nullable=False),
+    sa.Column('daily_targets', sa.JSON(), nullable=False),
+    sa.Column('meals', sa.JSON(), nullable=False),
+    sa.Column('workout', sa.JSON(), nullable=False),
+    sa.Column('program_slug', sa.Text(), nullable=False),
+    sa.Column('plan_hash', sa.String(length=64), nullable=False),
+    sa.Column('input_fingerprints', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('plan_days')
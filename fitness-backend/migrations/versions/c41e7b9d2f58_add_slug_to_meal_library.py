@@ -0,0 +1,86 @@
+"""add slug to meal_library
+
+Revision ID: c41e7b9d2f58
+Revises: 9a4d2e61c0f7
+Create Date: 2026-10-18 17:02:44.180926
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7b9d2f58'
+down_revision: Union[str, Sequence[str], None] = '9a4d2e61c0f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 500
+
+meal_library = sa.table(
+    'meal_library',
+    sa.column('id', postgresql.UUID(as_uuid=False)),
+    sa.column('slug', sa.Text()),
+    sa.column('name', sa.Text()),
+    sa.column('category', sa.Text()),
+    sa.column('diet_type', sa.Text()),
+)
+
+
+def _meal_slug(name, category, diet_type):
+    # frozen copy of app.services.catalog_import.meal_slug as of this revision
+    return re.sub(r"[^a-z0-9]+", "-", f"{name} {category} {diet_type}".lower()).strip("-")
+
+
+def _backfill_slugs(conn):
+    """Give every existing meal the slug a catalog import would, so re-importing the
+    same meal updates the row instead of inserting a duplicate. Meals that share a
+    slug keep it on the first row by id; the rest get -2, -3, ... suffixes."""
+    taken = set()
+    last = None
+    while True:
+        q = sa.select(
+            meal_library.c.id, meal_library.c.name, meal_library.c.category, meal_library.c.diet_type,
+        ).order_by(meal_library.c.id).limit(BATCH)
+        if last is not None:
+            q = q.where(meal_library.c.id > last)
+        rows = conn.execute(q).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            base = slug = _meal_slug(row.name, row.category, row.diet_type)
+            n = 2
+            while slug in taken:
+                slug = f"{base}-{n}"
+                n += 1
+            taken.add(slug)
+            updates.append({'_id': row.id, 'slug': slug})
+        conn.execute(
+            meal_library.update().where(meal_library.c.id == sa.bindparam('_id')).values(
+                slug=sa.bindparam('slug'),
+            ),
+            updates,
+        )
+        last = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('meal_library') as batch:
+        batch.add_column(sa.Column('slug', sa.Text(), nullable=True))
+    _backfill_slugs(op.get_bind())
+    # stays nullable: meals added outside the importer have no natural key
+    with op.batch_alter_table('meal_library') as batch:
+        batch.create_unique_constraint('uq_meal_library_slug', ['slug'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('meal_library') as batch:
+        batch.drop_constraint('uq_meal_library_slug', type_='unique')
+        batch.drop_column('slug')
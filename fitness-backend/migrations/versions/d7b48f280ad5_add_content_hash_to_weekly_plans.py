@@ -0,0 +1,29 @@
+"""add content_hash to weekly_plans
+
+Revision ID: d7b48f280ad5
+Revises: 6c7697f1733f
+Create Date: 2026-10-18 10:02:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b48f280ad5'
+down_revision: Union[str, Sequence[str], None] = '6c7697f1733f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing rows stay NULL; the API hashes them on read until they are rebuilt
+    op.add_column('weekly_plans', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('weekly_plans', 'content_hash')
@@ -0,0 +1,89 @@
+"""add plan_archetypes shared by weekly plans
+
+Revision ID: e6b3f5a81d07
+Revises: 5d8a1f3c9e42
+Create Date: 2026-10-18 19:11:06.482190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b3f5a81d07'
+down_revision: Union[str, Sequence[str], None] = '5d8a1f3c9e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SECTION_COLUMNS = ['week_meals', 'week_workouts', 'grocery_list']
+
+weekly_plans = sa.table(
+    'weekly_plans',
+    sa.column('id', postgresql.UUID(as_uuid=False)),
+    sa.column('week_meals', sa.JSON()),
+    sa.column('week_workouts', sa.JSON()),
+    sa.column('grocery_list', sa.JSON()),
+    sa.column('content_hash', sa.String()),
+    sa.column('meals_archetype_id', sa.Integer()),
+    sa.column('workouts_archetype_id', sa.Integer()),
+)
+plan_archetypes = sa.table(
+    'plan_archetypes',
+    sa.column('id', sa.Integer()),
+    sa.column('content', sa.JSON()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'plan_archetypes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('week_start_date', sa.Date(), nullable=False),
+        sa.Column('section', sa.Text(), nullable=False),
+        sa.Column('key', sa.String(length=16), nullable=False),
+        sa.Column('content', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('week_start_date', 'section', 'key', name='uq_plan_archetype'),
+    )
+    # existing plans keep their inline sections; rebuilt ones point at archetypes instead
+    with op.batch_alter_table('weekly_plans') as batch:
+        batch.add_column(sa.Column('meals_archetype_id', sa.Integer(), nullable=True))
+        batch.add_column(sa.Column('workouts_archetype_id', sa.Integer(), nullable=True))
+        batch.create_foreign_key('fk_weekly_plans_meals_archetype', 'plan_archetypes',
+                                 ['meals_archetype_id'], ['id'])
+        batch.create_foreign_key('fk_weekly_plans_workouts_archetype', 'plan_archetypes',
+                                 ['workouts_archetype_id'], ['id'])
+        for column in SECTION_COLUMNS:
+            batch.alter_column(column, existing_type=sa.JSON(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # copy archetype sections back into the plans that refer to them
+    conn = op.get_bind()
+    content = dict(conn.execute(sa.select(plan_archetypes.c.id, plan_archetypes.c.content)).all())
+    rows = conn.execute(
+        sa.select(weekly_plans.c.id, weekly_plans.c.meals_archetype_id, weekly_plans.c.workouts_archetype_id)
+        .where(sa.or_(weekly_plans.c.meals_archetype_id.isnot(None),
+                      weekly_plans.c.workouts_archetype_id.isnot(None)))
+    ).all()
+    for plan_id, meals_id, workouts_id in rows:
+        values = {'content_hash': None}   # recomputed from the inline columns on read
+        for archetype_id in (meals_id, workouts_id):
+            if archetype_id is not None:
+                values.update(content[archetype_id])
+        conn.execute(weekly_plans.update().where(weekly_plans.c.id == plan_id).values(**values))
+
+    with op.batch_alter_table('weekly_plans') as batch:
+        for column in SECTION_COLUMNS:
+            batch.alter_column(column, existing_type=sa.JSON(), nullable=False)
+        batch.drop_constraint('fk_weekly_plans_workouts_archetype', type_='foreignkey')
+        batch.drop_constraint('fk_weekly_plans_meals_archetype', type_='foreignkey')
+        batch.drop_column('workouts_archetype_id')
+        batch.drop_column('meals_archetype_id')
+    op.drop_table('plan_archetypes')
@@ -0,0 +1,256 @@
+# scripts/bench_api.py
+# End-to-end API benchmark, fully offline. Seeds the program catalog (app/seed_fitness.py)
+# and a meal library (app/templates.py MEAL_TEMPLATES plus synthetic meals), then drives
+#   POST /auth/signup -> POST /auth/profile/setup -> POST /plan/generate-week -> GET /plan/current
+# for a synthetic user population and prints throughput and p50/p95/p99 per phase as JSON:
+#   python -m scripts.bench_api --users 200 --concurrency 16 --out bench.json
+#   python -m scripts.bench_api --database-url postgresql://localhost/fitness_bench --reset
+#   python -m scripts.bench_api --base-url http://127.0.0.1:8000   # a running server on the same DB
+# By default requests go in-process through httpx's ASGI transport (sync handlers still
+# run on the threadpool). Password hashing uses BCRYPT_ROUNDS as configured; keep it the
+# same between runs you compare.
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+GOALS = ["Build Muscle", "Lose Fat", "Maintain"]
+ACTIVITY = ["Sedentary", "Light", "Moderate", "Intense"]
+CATEGORY_BY_LABEL = {"breakfast": "breakfast", "lunch": "lunch", "dinner": "dinner", "post-workout": "snack"}
+
+def _configure_database(url: Optional[str]) -> str:
+    """Point app.db at the benchmark database before anything imports it."""
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.gettempdir(), "fitness_bench.db")
+    os.environ["DATABASE_URL"] = url
+    if url.startswith("sqlite"):
+        # the models use PostgreSQL JSONB; SQLite stores the same documents as JSON
+        from sqlalchemy.dialects.postgresql import JSONB
+        from sqlalchemy.ext.compiler import compiles
+
+        @compiles(JSONB, "sqlite")
+        def _jsonb_sqlite(element, compiler, **kw):
+            return "JSON"
+    return url
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+# ----- seeding
+
+def seed_catalogs(extra_meals: int, seed: int) -> Dict[str, int]:
+    from app import seed_fitness
+    from app.db import SessionLocal
+    from app.models import MealLibrary
+    from app.templates import MEAL_TEMPLATES
+
+    seed_fitness.run()
+
+    rng = random.Random(seed)
+    rows: List[Dict[str, Any]] = []
+    for (goal, diet), days in MEAL_TEMPLATES.items():
+        for day in days.values():
+            for meal in day:
+                category = CATEGORY_BY_LABEL.get(meal["label"].lower(), "snack")
+                rows.append({"name": meal["text"], "category": category, "diet_type": diet,
+                             "goal_flags": [goal], "ingredients": [p.strip() for p in meal["text"].split("+")]})
+
+    # synthetic meals so every (category, diet, goal) bucket has choices
+    for i in range(extra_meals):
+        category = ["breakfast", "lunch", "snack", "dinner"][i % 4]
+        name = f"{'Egg ' if category == 'breakfast' else ''}{category.title()} bench {i}"
+        rows.append({
+            "name": name, "category": category, "diet_type": rng.choice(["veg", "nonveg"]),
+            "goal_flags": rng.sample(["muscle_gain", "fat_loss", "recomp", "performance"], 3),
+            "ingredients": [f"{rng.randint(40, 250)} g item {rng.randint(0, 300)}" for _ in range(rng.randint(3, 8))],
+        })
+
+    with SessionLocal() as db:
+        if db.query(MealLibrary.id).first() is None:
+            for r in rows:
+                kcal = rng.randint(150, 900)
+                db.add(MealLibrary(
+                    instructions="Cook and serve.", tags=["bench"],
+                    macros={"calories": kcal, "protein": kcal // 16, "carbs": kcal // 8, "fat": kcal // 36},
+                    **r,
+                ))
+            db.commit()   # the flush bumps the meal catalog stamp
+        return {"meals": db.query(MealLibrary).count()}
+
+def synthetic_users(n: int, seed: int, run_id: str) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    users = []
+    for i in range(n):
+        users.append({
+            "signup": {"first_name": "Bench", "last_name": f"User{i}",
+                       "email": f"bench-{run_id}-{i}@example.com", "password": f"pw-{i}-{run_id}"},
+            "profile": {
+                "age": rng.randint(18, 65), "sex": rng.choice(["male", "female"]),
+                "height_cm": round(rng.uniform(150, 200), 1), "weight_kg": round(rng.uniform(48, 120), 1),
+                "activity_level": rng.choice(ACTIVITY), "goal": rng.choice(GOALS),
+                "diet_type": rng.choice(["veg", "nonveg"]), "experience_level": "beginner",
+                "timezone": rng.choice(["UTC", "Europe/London", "America/New_York", "Asia/Kolkata"]),
+            },
+        })
+    return users
+
+# ----- driving
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values), math.ceil(p / 100 * len(sorted_values))) - 1)
+    return sorted_values[k]
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    lat = sorted(latencies)
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "requests": len(lat) + errors,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(len(lat) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(lat) / len(lat)) if lat else 0.0,
+            "p50": ms(percentile(lat, 50)),
+            "p95": ms(percentile(lat, 95)),
+            "p99": ms(percentile(lat, 99)),
+            "max": ms(lat[-1]) if lat else 0.0,
+        },
+    }
+
+async def run_phase(client, concurrency: int, calls: List[Tuple[str, str, Dict[str, Any]]]) -> Tuple[Dict[str, Any], List[Any]]:
+    """Issue (method, path, kwargs) calls with at most `concurrency` in flight."""
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    results: List[Any] = [None] * len(calls)
+    errors = 0
+
+    async def one(i: int, method: str, path: str, kwargs: Dict[str, Any]) -> None:
+        nonlocal errors
+        async with sem:
+            started = time.perf_counter()
+            try:
+                r = await client.request(method, path, **kwargs)
+            except Exception:
+                errors += 1
+                return
+            elapsed = time.perf_counter() - started
+        if r.status_code >= 400:
+            errors += 1
+            return
+        latencies.append(elapsed)
+        results[i] = r.json()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, *c) for i, c in enumerate(calls)))
+    return summarize(latencies, errors, time.perf_counter() - started), results
+
+async def drive(client, users: List[Dict[str, Any]], concurrency: int, reads: int) -> Dict[str, Any]:
+    phases: Dict[str, Any] = {}
+
+    phases["signup"], signed = await run_phase(
+        client, concurrency, [("POST", "/auth/signup", {"json": u["signup"]}) for u in users])
+    ids = [r["userId"] for r in signed if r]
+
+    phases["profile_setup"], _ = await run_phase(
+        client, concurrency,
+        [("POST", "/auth/profile/setup", {"json": {"user_id": uid, **u["profile"]}}) for uid, u in zip(ids, users)])
+
+    phases["generate_week"], _ = await run_phase(
+        client, concurrency, [("POST", "/plan/generate-week", {"params": {"userId": uid}}) for uid in ids])
+
+    calls = [("GET", "/plan/current", {"params": {"userId": uid}}) for uid in ids for _ in range(reads)]
+    random.Random(0).shuffle(calls)
+    phases["current"], _ = await run_phase(client, concurrency, calls)
+    return phases
+
+async def _main_async(args, users) -> Dict[str, Any]:
+    import httpx
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            return await drive(client, users, args.concurrency, args.reads)
+
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        return await drive(client, users, args.concurrency, args.reads)
+
+def main():
+    ap = argparse.ArgumentParser(description="Load/latency benchmark for the fitness API.")
+    ap.add_argument("--database-url", default=None,
+                    help="SQLite or local PostgreSQL URL (default: a fresh SQLite file in the temp dir)")
+    ap.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    ap.add_argument("--base-url", default=None, help="benchmark a running server (same database) instead of in-process")
+    ap.add_argument("--users", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--reads", type=int, default=5, help="GET /plan/current calls per user")
+    ap.add_argument("--meals", type=int, default=200, help="synthetic meals added to the template meals")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", default=None, help="also write the JSON result to this file")
+    args = ap.parse_args()
+
+    default_sqlite = args.database_url is None
+    url = _configure_database(args.database_url)
+    if default_sqlite:
+        path = url.split("///", 1)[1]
+        if os.path.exists(path):
+            os.remove(path)
+
+    from app.db import Base, engine
+    import app.models, app.models_fitness  # noqa: F401  (register tables)
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    seeded = seed_catalogs(args.meals, args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    users = synthetic_users(args.users, args.seed, run_id)
+
+    started = time.perf_counter()
+    phases = asyncio.run(_main_async(args, users))
+
+    result = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": engine.dialect.name,
+            "target": args.base_url or "in-process",
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "reads_per_user": args.reads,
+            "meals": seeded["meals"],
+            "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", "12")),
+            "seed": args.seed,
+            "total_seconds": round(time.perf_counter() - started, 3),
+        },
+        "phases": phases,
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    if any(p["errors"] for p in phases.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
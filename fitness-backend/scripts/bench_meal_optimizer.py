@@ -0,0 +1,125 @@
+# scripts/bench_meal_optimizer.py
+# Default picker vs macro optimizer over a synthetic meal library, fully offline:
+#   python -m scripts.bench_meal_optimizer --meals 5000 --plans 200
+# Reports per-plan CPU time and how far each day's totals land from the targets.
+from __future__ import annotations
+import argparse
+import json
+import random
+import time
+
+from app.services.calculations import compute_daily_targets
+from app.services.meal_engine import _normalize_diet, _normalize_goal, _slot_pools, compose_week_meal_refs
+from app.services.meal_index import MealIndex
+from app.services.meal_optimizer import PORTIONS, TARGET_KEYS, _pool, optimize_week_meals
+
+CATEGORIES = {
+    # category: (kcal range, protein share of kcal)
+    "breakfast": ((300, 650), 0.25),
+    "lunch": ((450, 900), 0.30),
+    "snack": ((120, 400), 0.20),
+    "dinner": ((450, 950), 0.30),
+}
+GOALS = ["muscle_gain", "fat_loss", "recomp"]
+
+def synthetic_library(n: int, seed: int) -> MealIndex:
+    rng = random.Random(seed)
+    index = MealIndex(version=1)
+    cats = list(CATEGORIES)
+    for i in range(n):
+        cat = cats[i % len(cats)]
+        (lo, hi), p_share = CATEGORIES[cat]
+        kcal = rng.uniform(lo, hi)
+        p = kcal * rng.uniform(p_share * 0.5, p_share * 1.5) / 4
+        f = kcal * rng.uniform(0.15, 0.40) / 9
+        c = max(kcal - p * 4 - f * 9, 0) / 4
+        meal = {
+            "name": f"{'Egg ' if cat == 'breakfast' and i % 3 == 0 else ''}{cat.title()} {i}",
+            "category": cat,
+            "ingredients": [f"{rng.randint(50, 250)} g item-{rng.randint(0, 400)}" for _ in range(6)],
+            "instructions": "",
+            "macros": {"calories": round(kcal), "protein": round(p), "carbs": round(c), "fat": round(f)},
+            "tags": [],
+        }
+        index.add(f"m{i}", meal, rng.choice(["veg", "nonveg"]), rng.sample(GOALS, 2))
+    return index
+
+def deviation(index: MealIndex, week, targets) -> float:
+    """Mean absolute relative error per day and macro, in percent."""
+    errs = []
+    for slots in week.values():
+        if not slots:
+            continue
+        totals = [0.0] * 4
+        for slot in slots:
+            vec = index.macros.get(slot.get("meal_id"), (0.0,) * 4)
+            for k in range(4):
+                totals[k] += vec[k] * slot.get("portion", 1.0)
+        for k, key in enumerate(TARGET_KEYS):
+            errs.append(abs(totals[k] - targets[key]) / targets[key])
+    return round(100 * sum(errs) / max(len(errs), 1), 2)
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the macro-fitting meal optimizer.")
+    ap.add_argument("--meals", type=int, default=5000)
+    ap.add_argument("--plans", type=int, default=200)
+    ap.add_argument("--budget-ms", type=float, default=25.0)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    index = synthetic_library(args.meals, args.seed)
+    rng = random.Random(args.seed + 1)
+    profiles = []
+    for _ in range(args.plans):
+        goal = rng.choice(["Build Muscle", "Lose Fat", "Maintain"])
+        profiles.append({
+            "goal": goal,
+            "diet": rng.choice(["veg", "nonveg"]),
+            "targets": compute_daily_targets(
+                sex=rng.choice(["male", "female"]), age=rng.randint(18, 60),
+                height_cm=rng.uniform(155, 195), weight_kg=rng.uniform(50, 110),
+                activity=rng.choice(["Sedentary", "Light", "Moderate", "Intense"]), goal=goal,
+            ),
+        })
+
+    # candidate arrays are built once per meal index load; time that separately
+    started = time.process_time()
+    for g in GOALS:
+        for d in ("veg", "nonveg"):
+            for key in _slot_pools(g, d).values():
+                _pool(index, key)
+    warm_ms = (time.process_time() - started) * 1000
+
+    default_s = optimized_s = 0.0
+    default_dev = optimized_dev = 0.0
+    cut_days = 0
+    for prof in profiles:
+        t0 = time.process_time()
+        week = compose_week_meal_refs(index, prof["goal"], prof["diet"])
+        t1 = time.process_time()
+        pools = _slot_pools(_normalize_goal(prof["goal"]), _normalize_diet(prof["diet"]))
+        fitted = optimize_week_meals(index, week, pools, prof["targets"], budget_ms=args.budget_ms)
+        t2 = time.process_time()
+        default_s += t1 - t0
+        optimized_s += t2 - t1
+        default_dev += deviation(index, week, prof["targets"])
+        optimized_dev += deviation(index, fitted, prof["targets"])
+        cut_days += sum(1 for slots in fitted.values() if slots and "portion" not in slots[0])
+
+    n = len(profiles)
+    print(json.dumps({
+        "meals": args.meals,
+        "plans": n,
+        "portions": list(PORTIONS),
+        "budget_ms": args.budget_ms,
+        "pool_build_ms": round(warm_ms, 1),
+        "default": {"ms_per_plan": round(default_s / n * 1000, 3), "mean_abs_error_pct": round(default_dev / n, 2)},
+        "optimized": {
+            "ms_per_plan": round(optimized_s / n * 1000, 3),
+            "mean_abs_error_pct": round(optimized_dev / n, 2),
+            "days_left_on_default": cut_days,
+        },
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
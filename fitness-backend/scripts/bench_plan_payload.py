@@ -0,0 +1,109 @@
+# scripts/bench_plan_payload.py
+# CPU and wire-size comparison for the /plan/current body, fully offline:
+#   python -m scripts.bench_plan_payload --iterations 2000
+# "before" is FastAPI's default path (jsonable_encoder + JSONResponse),
+# "after" is FastJSONResponse; both are also measured gzipped.
+from __future__ import annotations
+import argparse
+import gzip
+import json
+import time
+from datetime import date
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import FastJSONResponse, orjson
+from app.router.plan import _current_payload
+from app.services.meal_index import MealIndex
+from app.services.plan_builder import compose_week_plan, day_blocks, hydrate_plan
+from app.services.program_catalog import ProgramCatalog
+from app.templates import WORKOUT_TEMPLATES
+
+def synthetic_catalogs() -> tuple[ProgramCatalog, MealIndex]:
+    catalog = ProgramCatalog(version=1)
+    catalog.programs["muscle_gain_beginner"] = {
+        "id": 1, "slug": "muscle_gain_beginner", "name": "Muscle Gain – Beginner",
+        "goal": "muscle_gain", "level": "beginner", "is_active": True,
+    }
+    training = [t for t in WORKOUT_TEMPLATES if t["details"]]
+    warmup = {"title": "Warm-up (≈8 min)", "steps": [{"name": "Bike", "time_sec": 180}] * 4}
+    for weekday in range(1, 8):
+        rest = weekday in (3, 7)
+        catalog.week.setdefault(1, {})[weekday] = {
+            "weekday": weekday, "day_number": None if rest else weekday, "is_rest": rest, "rest_slug": None,
+        }
+        if not rest:
+            t = training[weekday % len(training)]
+            catalog.days[(1, weekday)] = {
+                "name": t["day_type"], "focus": t["focus"], "coach_note": t["coachNote"],
+                "details": t["details"], "warmup": warmup, "cooldown": warmup,
+            }
+            catalog.blocks[("muscle_gain_beginner", weekday)] = {
+                "is_rest": False, "title": t["day_type"], "focus": t["focus"],
+                "warmup": warmup, "cooldown": warmup, "rest": None,
+            }
+
+    index = MealIndex(version=1)
+    for cat in ("breakfast", "lunch", "snack", "dinner"):
+        for i in range(6):
+            meal = {
+                "name": f"{'Egg ' if cat == 'breakfast' else ''}{cat.title()} bowl {i}",
+                "category": cat,
+                "ingredients": [f"{q} g ingredient {cat}-{i}-{k}" for k, q in enumerate(range(50, 450, 50))],
+                "instructions": "Prep the ingredients, cook on medium heat, season to taste and serve. " * 3,
+                "macros": {"calories": 520 + i, "protein": 38, "carbs": 55, "fat": 16},
+                "tags": ["high-protein", "meal-prep"],
+            }
+            index.add(f"{cat}-{i}", meal, "nonveg", ["muscle_gain"])
+    return catalog, index
+
+def bench(fn, iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1e6
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark /plan/current serialization.")
+    ap.add_argument("--iterations", type=int, default=2000)
+    ap.add_argument("--gzip-level", type=int, default=6)
+    args = ap.parse_args()
+
+    catalog, index = synthetic_catalogs()
+    inputs = {
+        "user_id": "bench", "sex": "male", "age": 30, "height_cm": 180.0, "weight_kg": 80.0,
+        "activity_level": "Moderate", "goal": "Build Muscle", "diet_type": "nonveg",
+        "fav_protein": None, "experience_level": "beginner",
+    }
+    today = date(2026, 10, 19)
+    stored = type("Plan", (), compose_week_plan(inputs, today, catalog, index))
+    plan = hydrate_plan(stored, catalog, index)
+    payload = _current_payload(plan, today, day_blocks(plan.week_blocks["mon"], catalog, "muscle_gain_beginner", 1))
+
+    before = lambda: JSONResponse(jsonable_encoder(payload)).body
+    after = lambda: FastJSONResponse(payload).body
+    before_body, after_body = before(), after()
+    assert json.loads(before_body) == json.loads(after_body)
+
+    gz = lambda body: gzip.compress(body, compresslevel=args.gzip_level)
+    result = {
+        "encoder": "orjson" if orjson is not None else "pydantic_core",
+        "iterations": args.iterations,
+        "before": {
+            "encode_us": round(bench(before, args.iterations), 1),
+            "encode_gzip_us": round(bench(lambda: gz(before()), args.iterations), 1),
+            "bytes": len(before_body),
+            "bytes_gzip": len(gz(before_body)),
+        },
+        "after": {
+            "encode_us": round(bench(after, args.iterations), 1),
+            "encode_gzip_us": round(bench(lambda: gz(after()), args.iterations), 1),
+            "bytes": len(after_body),
+            "bytes_gzip": len(gz(after_body)),
+        },
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# scripts/bench_startup.py
+# Cold-start breakdown of an API worker, printed as JSON:
+#   python -m scripts.bench_startup                       # import time only (no database needed)
+#   python -m scripts.bench_startup --database-url postgresql://localhost/fitness_db
+# Import time comes from a fresh interpreter run with `python -X importtime -c "import app.main"`,
+# grouped by top-level package (self time) plus the slowest individual modules. With a database
+# URL it also runs the app's lifespan startup in-process and reports the warm-up steps.
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict
+
+def _run(code: str, env: Dict[str, str], importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+
+def _wall(code: str, env: Dict[str, str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _run(code, env)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def import_breakdown(env: Dict[str, str], top: int) -> Dict[str, Any]:
+    """Parse `-X importtime` output (microseconds: self | cumulative | module)."""
+    err = _run("import app.main", env, importtime=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+
+    by_package: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        pkg = name.split(".")[0]
+        by_package[pkg] = by_package.get(pkg, 0) + self_us
+
+    ms = lambda us: round(us / 1000, 2)
+    total = sum(by_package.values())
+    return {
+        "total_ms": ms(total),
+        "modules": len(rows),
+        "by_package_ms": {k: ms(v) for k, v in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]},
+        "app_cumulative_ms": {n: ms(c) for n, _, c in rows if n.startswith("app.")},
+        "slowest_modules_ms": {n: ms(s) for n, s, _ in sorted(rows, key=lambda r: -r[1])[:top]},
+    }
+
+def lifespan_breakdown() -> Dict[str, Any]:
+    from app.main import app
+    from app.services.warmup import readiness
+
+    async def startup() -> float:
+        started = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            elapsed = time.perf_counter() - started
+        return elapsed
+
+    seconds = asyncio.run(startup())
+    ok, state = readiness()
+    return {"startup_ms": round(seconds * 1000, 2), "ready": ok, "steps_ms": state["steps"], "error": state["error"]}
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time and warm-up breakdown of an API worker.")
+    ap.add_argument("--database-url", default=None, help="also run the lifespan warm-up against this database")
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--repeat", type=int, default=3, help="wall-clock runs per measurement (best is kept)")
+    args = ap.parse_args()
+
+    env = dict(os.environ)
+    env.pop("DATABASE_URL", None)   # importing the app must not need a database
+    baseline = _wall("pass", env, args.repeat)
+    wall = _wall("import app.main", env, args.repeat)
+
+    result: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "interpreter_ms": round(baseline * 1000, 2),
+        "import_app_wall_ms": round((wall - baseline) * 1000, 2),
+        "import": import_breakdown(env, args.top),
+    }
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        result["lifespan"] = lifespan_breakdown()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
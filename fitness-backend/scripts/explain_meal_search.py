@@ -0,0 +1,64 @@
+# scripts/explain_meal_search.py
+# Check that GET /meals/search queries can use the meal_library indexes (migration 5d8a1f3c9e42)
+# on a local PostgreSQL. Runs EXPLAIN for each filter shape with sequential scans disabled,
+# so the answer does not depend on how many meals the database holds:
+#   DATABASE_URL=postgresql://localhost/fitness_db python -m scripts.explain_meal_search
+# Prints {case: {"indexes": expected, "ok": bool, "plan": [...]}} as JSON; exits 1 if any case
+# plans without its indexes. tests/test_meal_search_indexes.py runs the same check when
+# TEST_POSTGRES_URL is set.
+from __future__ import annotations
+import argparse
+import json
+import sys
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.services.meal_search import meal_search_query
+
+# case -> (search_meals arguments, indexes the plan must mention, filter-only)
+# Filter-only cases also disable plain index scans: otherwise walking ix_meal_library_name_id
+# in ORDER BY order and filtering is always an alternative, and the check is whether the
+# GIN/trigram indexes can answer the filter itself.
+CASES = {
+    "text": ({"q": "egg"}, ["ix_meal_library_name_trgm", "ix_meal_library_ingredients_trgm"], True),
+    "goal": ({"goal": "fat_loss"}, ["ix_meal_library_goal_flags"], True),
+    "category_diet": ({"category": "breakfast", "diet_type": "veg"}, ["ix_meal_library_category_diet"], False),
+    "browse": ({}, ["ix_meal_library_name_id"], False),
+}
+
+def _search_sql(db, params) -> str:
+    """The SELECT search_meals runs, parameters inlined (percent signs escaped for the driver)."""
+    query = meal_search_query(db, **params)
+    return str(query.statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+
+def explain_search_indexes(db: Session) -> Dict[str, Dict[str, Any]]:
+    """{case: {"indexes", "ok", "plan"}} for every CASES entry; `db` must be PostgreSQL
+    migrated past 5d8a1f3c9e42. Rolls back after each case (SET LOCAL)."""
+    results = {}
+    for case, (params, indexes, filter_only) in CASES.items():
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        db.execute(text(f"SET LOCAL enable_indexscan = {'off' if filter_only else 'on'}"))
+        plan = [r[0] for r in db.connection().exec_driver_sql("EXPLAIN " + _search_sql(db, params))]
+        ok = all(any(index in line for line in plan) for index in indexes)
+        results[case] = {"indexes": indexes, "ok": ok, "plan": plan}
+        db.rollback()
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description="EXPLAIN /meals/search queries on PostgreSQL.")
+    ap.parse_args()
+
+    with SessionLocal() as db:
+        if db.get_bind().dialect.name != "postgresql":
+            sys.exit("needs a PostgreSQL DATABASE_URL")
+        results = explain_search_indexes(db)
+
+    print(json.dumps(results, indent=2))
+    if not all(r["ok"] for r in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
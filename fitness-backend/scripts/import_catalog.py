@@ -0,0 +1,32 @@
+# scripts/import_catalog.py
+# Bulk-load program/meal catalog files (JSON, JSON Lines, CSV, YAML) with set-based upserts:
+#   python -m scripts.import_catalog catalog/meals.csv catalog/programs.yaml
+#   python -m scripts.import_catalog export.jsonl --kind meals --batch-size 2000
+#   python -m scripts.import_catalog catalog/*.json --dry-run     # validate and write, then roll back
+# CSV/JSONL files hold one kind, named by --kind or the file name (meals.csv, program_days.jsonl).
+# JSON/YAML may hold several: {"programs": [...], "program_days": [...], ...}.
+# Prints per-kind rows/s as JSON; exits 1 if any row was rejected.
+from __future__ import annotations
+import argparse
+import json
+import sys
+
+from app.db import SessionLocal
+from app.services.catalog_import import BATCH_SIZE, ORDER, import_catalogs
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk import catalog files.")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--kind", choices=ORDER, default=None, help="catalog kind of every file (default: from file name)")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    ap.add_argument("--dry-run", action="store_true", help="roll back every batch")
+    args = ap.parse_args()
+
+    report = import_catalogs(SessionLocal, [(p, args.kind) for p in args.paths],
+                             batch_size=args.batch_size, dry_run=args.dry_run)
+    print(json.dumps(report.as_dict(), indent=2))
+    if report.errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# scripts/pregenerate_plans.py
+# Standalone worker that pre-builds next week's plans during each timezone's off-peak window:
+#   python -m scripts.pregenerate_plans            # poll forever
+#   python -m scripts.pregenerate_plans --once     # one pass, then exit (cron)
+from __future__ import annotations
+import argparse
+import logging
+import signal
+import threading
+from datetime import datetime, timezone
+
+from app.db import SessionLocal
+from app.models import PlanPregenJob
+from app.services.plan_pregen import run_forever, run_once
+
+def main():
+    ap = argparse.ArgumentParser(description="Pre-generate upcoming weekly plans off-peak.")
+    ap.add_argument("--once", action="store_true", help="run one scheduling/processing pass and exit")
+    ap.add_argument("--now", type=datetime.fromisoformat, default=None,
+                    help="pretend the current UTC time is this ISO timestamp (with --once)")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.once:
+        now = args.now.replace(tzinfo=args.now.tzinfo or timezone.utc) if args.now else None
+        written = run_once(SessionLocal, now_utc=now)
+        with SessionLocal() as db:
+            for job in db.query(PlanPregenJob).order_by(PlanPregenJob.id.desc()).limit(20):
+                print(f"  {job.week_start_date} {job.tz_bucket:<24} {job.status:<8} {job.processed}")
+        print(f"✅ Pre-generated {written} plans")
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    run_forever(SessionLocal, stop)
+
+if __name__ == "__main__":
+    main()
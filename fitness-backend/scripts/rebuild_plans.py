@@ -0,0 +1,146 @@
+# scripts/rebuild_plans.py
+# Rebuild WeeklyPlan rows in bulk, e.g. after a catalog change:
+#   python -m scripts.rebuild_plans --week 2026-10-19 --workers 8
+#   python -m scripts.rebuild_plans --goal "Build Muscle" --dry-run
+from __future__ import annotations
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.db import SessionLocal
+from app.models import UserProfile
+from app.services.meal_index import MealIndex, load_meal_index
+from app.services.plan_builder import (
+    _monday, compose_week_plan, daily_targets_batch, profile_inputs, program_slug_for, resolve_archetypes, store_plan_days,
+)
+from app.services.plan_store import PLAN_DAY_ROWS, upsert_weekly_plans
+from app.services.program_catalog import ProgramCatalog, load_program_catalog
+
+# Catalog snapshot handed to each worker once, instead of pickling it per task.
+_snapshot: Dict[str, Any] = {}
+
+def _init_worker(week_start: date, catalog: ProgramCatalog, meal_index: MealIndex) -> None:
+    _snapshot["week_start"] = week_start
+    _snapshot["catalog"] = catalog
+    _snapshot["meal_index"] = meal_index
+
+def _compose_chunk(jobs: List[Tuple[Dict[str, Any], Dict[str, int], Dict[str, int]]]) -> List[Dict[str, Any]]:
+    return [
+        compose_week_plan(i, _snapshot["week_start"], _snapshot["catalog"], _snapshot["meal_index"],
+                          archetype_ids=a, targets=t)
+        for i, a, t in jobs
+    ]
+
+def iter_profile_chunks(
+    chunk_size: int,
+    user_ids: Optional[List[str]] = None,
+    goal: Optional[str] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Keyset-paginate user_profile by user_id so every chunk is one indexed read."""
+    last_id: Optional[str] = None
+    while True:
+        with SessionLocal() as db:
+            q = db.query(UserProfile).order_by(UserProfile.user_id.asc())
+            if user_ids:
+                q = q.filter(UserProfile.user_id.in_(user_ids))
+            if goal:
+                q = q.filter(UserProfile.goal == goal)
+            if last_id is not None:
+                q = q.filter(UserProfile.user_id > last_id)
+            rows = [profile_inputs(p) for p in q.limit(chunk_size).all()]
+        if not rows:
+            return
+        last_id = rows[-1]["user_id"]
+        yield rows
+
+def rebuild(
+    week_start: date,
+    user_ids: Optional[List[str]] = None,
+    goal: Optional[str] = None,
+    chunk_size: int = 500,
+    workers: int = 0,
+    max_rate: float = 0.0,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    with SessionLocal() as db:
+        catalog = load_program_catalog(db)
+        meal_index = load_meal_index(db)
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    done = 0
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(week_start, catalog, meal_index),
+    ) as pool:
+        # split each DB chunk into per-worker slices so one read feeds the whole pool
+        def slices(chunk: List[Any]) -> List[List[Any]]:
+            step = max(1, -(-len(chunk) // workers))
+            return [chunk[i:i + step] for i in range(0, len(chunk), step)]
+
+        for chunk in iter_profile_chunks(chunk_size, user_ids, goal):
+            with SessionLocal() as db:
+                # shared meals/workouts are composed here once per distinct archetype and
+                # targets in one columnar pass, so the workers only compose what stays per
+                # user (optimized meals) and hash
+                archetype_ids = resolve_archetypes(db, week_start, chunk, catalog, meal_index)
+                jobs = list(zip(chunk, archetype_ids, daily_targets_batch(chunk)))
+                plans = [p for part in pool.map(_compose_chunk, slices(jobs)) for p in part]
+                if not dry_run:
+                    upsert_weekly_plans(db, plans)
+                    if PLAN_DAY_ROWS:
+                        store_plan_days(db, [(p, program_slug_for(i["goal"], i["experience_level"]))
+                                             for p, i in zip(plans, chunk)])
+                    db.commit()
+            done += len(plans)
+
+            elapsed = time.perf_counter() - started
+            print(f"  {done} users  {done / elapsed:.1f} users/s")
+
+            # throttle so a rebuild does not starve the API of DB capacity
+            if max_rate > 0:
+                ahead = done / max_rate - elapsed
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "week_start": str(week_start),
+        "users": done,
+        "seconds": round(elapsed, 3),
+        "users_per_second": round(done / elapsed, 1) if elapsed else 0.0,
+        "dry_run": dry_run,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild weekly plans for many users.")
+    ap.add_argument("--week", type=date.fromisoformat, default=date.today(),
+                    help="any date in the target week (default: this week)")
+    ap.add_argument("--user-ids", default="", help="comma-separated user ids (default: all)")
+    ap.add_argument("--goal", default=None, help="only users whose profile goal matches exactly")
+    ap.add_argument("--chunk-size", type=int, default=500)
+    ap.add_argument("--workers", type=int, default=0, help="process pool size (default: CPU count)")
+    ap.add_argument("--max-rate", type=float, default=0.0, help="users/s ceiling, 0 = unlimited")
+    ap.add_argument("--dry-run", action="store_true", help="compute plans but do not write them")
+    args = ap.parse_args()
+
+    user_ids = [u.strip() for u in args.user_ids.split(",") if u.strip()] or None
+    result = rebuild(
+        _monday(args.week),
+        user_ids=user_ids,
+        goal=args.goal,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_rate=args.max_rate,
+        dry_run=args.dry_run,
+    )
+    print(f"✅ Rebuilt {result['users']} plans for week {result['week_start']} "
+          f"in {result['seconds']}s ({result['users_per_second']} users/s)")
+
+if __name__ == "__main__":
+    main()
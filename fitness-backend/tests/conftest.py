@@ -0,0 +1,63 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# before anything imports app.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(element, compiler, **kw):
+    return "JSON"
+
+@pytest.fixture(scope="session")
+def client():
+    from app import models, models_fitness  # noqa: F401  (register tables)
+    from app.db import Base, get_engine
+    from app.main import app
+    from app import seed_fitness
+
+    Base.metadata.create_all(bind=get_engine())
+    seed_fitness.run()
+    return TestClient(app)
+
+@pytest.fixture
+def make_user(client):
+    """make_user(**profile_fields) -> id of a new user with a complete profile."""
+    from app.db import SessionLocal
+    from app.models import MealLibrary, User, UserProfile
+
+    def make(**profile):
+        with SessionLocal() as db:
+            if not db.query(MealLibrary).count():
+                db.add_all(
+                    MealLibrary(
+                        name=f"{category} {diet} {i}", category=category, diet_type=diet,
+                        goal_flags=["muscle_gain", "fat_loss", "recomp"], ingredients=["100 g rice", "2 eggs"],
+                        instructions="cook", macros={"calories": 400, "protein": 30, "carbs": 40, "fat": 10}, tags=[],
+                    )
+                    for category in ("breakfast", "lunch", "snack", "dinner")
+                    for diet in ("veg", "nonveg")
+                    for i in range(2)
+                )
+            user = User(first_name="Test", last_name="User", email=f"{os.urandom(6).hex()}@example.com",
+                        password_hash="x")
+            db.add(user)
+            db.flush()
+            db.add(UserProfile(**{
+                "user_id": user.id, "age": 30, "sex": "male", "height_cm": 180, "weight_kg": 80,
+                "activity_level": "Moderate", "goal": "Build Muscle", "diet_type": "nonveg",
+                "experience_level": "beginner", **profile,
+            }))
+            db.commit()
+            return user.id
+
+    return make
+
+@pytest.fixture
+def user_id(make_user):
+    return make_user()
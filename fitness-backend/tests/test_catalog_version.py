@@ -0,0 +1,36 @@
+# tests/test_catalog_version.py
+from app.db import SessionLocal
+from app.models import MealLibrary
+from app.services import catalog_version
+from app.services.catalog_version import MEAL_CATALOG, read_catalog_version
+from app.services.meal_index import get_meal_index
+
+def _meal(name):
+    return MealLibrary(name=name, category="lunch", diet_type="veg", goal_flags=["recomp"], ingredients=[],
+                       macros={"calories": 500}, tags=[])
+
+def test_orm_meal_writes_reach_the_cached_index(client, monkeypatch):
+    monkeypatch.setattr(catalog_version, "VERSION_CHECK_SECONDS", 0)
+    with SessionLocal() as db:
+        version = read_catalog_version(db, MEAL_CATALOG)
+        get_meal_index(db)
+
+        meal = _meal("Stamp Test Bowl")
+        db.add(meal)
+        db.commit()
+        assert read_catalog_version(db, MEAL_CATALOG) == version + 1
+        assert get_meal_index(db).records[meal.id]["name"] == "Stamp Test Bowl"
+
+        meal.macros = {"calories": 650}
+        db.commit()
+        assert read_catalog_version(db, MEAL_CATALOG) == version + 2
+        assert get_meal_index(db).records[meal.id]["macros"] == {"calories": 650}
+
+        meal.name = meal.name   # no net change: no bump
+        db.commit()
+        assert read_catalog_version(db, MEAL_CATALOG) == version + 2
+
+        db.delete(meal)
+        db.commit()
+        assert read_catalog_version(db, MEAL_CATALOG) == version + 3
+        assert meal.id not in get_meal_index(db).records
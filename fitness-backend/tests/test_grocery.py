@@ -0,0 +1,25 @@
+# tests/test_grocery.py
+from app.services.grocery import aggregate_grocery, parse_ingredient, parse_ingredients
+
+def test_comma_inside_parentheses_keeps_item_name():
+    ing = parse_ingredient("Chicken burrito bowl (beans, rice, salsa)")
+    assert ing.item == "chicken burrito bowl"
+    assert ing.quantity is None
+
+def test_preparation_note_after_comma_is_dropped():
+    ing = parse_ingredient("150 g chicken breast, diced")
+    assert (ing.item, ing.quantity, ing.unit) == ("chicken breast", 150.0, "g")
+
+def test_unbalanced_parentheses_keep_whole_line():
+    assert parse_ingredient("rice bowl (beans, salsa").item == "rice bowl (beans, salsa"
+
+def test_irregular_count_unit_plurals():
+    ing = parse_ingredient("3 leaves basil")
+    assert (ing.item, ing.quantity, ing.unit) == ("basil", 3.0, "leaf")
+    assert parse_ingredient("2 pinches salt").unit == "pinch"
+
+def test_count_units_pluralised_in_text():
+    rows = aggregate_grocery([
+        (parse_ingredients(["1 pinch salt", "1 bunch cilantro", "1 leaf basil", "1 slice bread"]), 2, 2.0),
+    ])
+    assert [r["text"] for r in rows] == ["2 leaves basil", "2 slices bread", "2 bunches cilantro", "2 pinches salt"]
@@ -0,0 +1,42 @@
+# tests/test_meal_optimizer.py
+import pytest
+
+from app.services.calculations import compute_daily_targets
+from app.services.meal_engine import _normalize_diet, _normalize_goal, _slot_pools, compose_week_meal_refs
+from app.services.meal_optimizer import optimize_week_meals
+from scripts.bench_meal_optimizer import deviation, synthetic_library
+
+pytest.importorskip("numpy")
+
+PROFILES = [
+    (goal, diet, sex, weight)
+    for goal in ("Build Muscle", "Lose Fat", "Maintain")
+    for diet in ("veg", "nonveg")
+    for sex, weight in (("male", 90), ("female", 55))
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return synthetic_library(2000, seed=7)
+
+def _week(index, goal, diet, sex, weight, budget_ms=10_000):
+    targets = compute_daily_targets(sex=sex, age=30, height_cm=175, weight_kg=weight, activity="Moderate", goal=goal)
+    default = compose_week_meal_refs(index, goal, diet)
+    pools = _slot_pools(_normalize_goal(goal), _normalize_diet(diet))
+    return targets, default, optimize_week_meals(index, default, pools, targets, budget_ms=budget_ms)
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_optimized_week_lands_closer_to_targets(index, profile):
+    targets, default, fitted = _week(index, *profile)
+    assert all(slot["portion"] for slots in fitted.values() for slot in slots)
+    assert deviation(index, fitted, targets) < deviation(index, default, targets) / 1.5
+
+def test_optimizer_is_deterministic(index):
+    for profile in PROFILES:
+        assert _week(index, *profile)[2] == _week(index, *profile)[2]
+        # a fresh index (cold candidate pools) picks the same meals
+        assert _week(synthetic_library(2000, seed=7), *profile)[2] == _week(index, *profile)[2]
+
+def test_exhausted_budget_keeps_the_default_week(index):
+    _, default, fitted = _week(index, *PROFILES[0], budget_ms=0)
+    assert fitted == default
@@ -0,0 +1,25 @@
+# tests/test_meal_search_indexes.py
+# Needs a PostgreSQL database migrated to head (alembic upgrade head), e.g.
+#   TEST_POSTGRES_URL=postgresql://localhost/fitness_test python -m pytest tests/test_meal_search_indexes.py
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+
+def test_meal_search_plans_use_the_indexes():
+    from scripts.explain_meal_search import explain_search_indexes
+
+    engine = create_engine(TEST_POSTGRES_URL)
+    try:
+        with Session(engine) as db:
+            results = explain_search_indexes(db)
+    finally:
+        engine.dispose()
+    # the text case needs both trigram indexes, the ingredients::text expression index included
+    failed = {case: r["plan"] for case, r in results.items() if not r["ok"]}
+    assert not failed, failed
@@ -0,0 +1,31 @@
+# tests/test_metrics.py
+import re
+
+from app.services.metrics import CONTENT_TYPE
+
+def _sample(text, name, labels):
+    """Value of the one sample `name{labels}` in a Prometheus text page, or 0."""
+    m = re.search(rf"^{re.escape(name + '{' + labels + '}')} (\S+)$", text, re.M)
+    return float(m.group(1)) if m else 0.0
+
+def test_metrics_count_plan_current(client, user_id):
+    route = 'method="GET",route="/plan/current"'
+    assert client.get("/plan/current", params={"userId": user_id}).status_code == 200
+    before = client.get("/metrics").text
+
+    assert client.get("/plan/current", params={"userId": user_id}).status_code == 200
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == CONTENT_TYPE
+    text = r.text
+
+    assert "# TYPE http_requests_total counter" in text
+    assert _sample(text, "http_requests_total", route + ',status="200"') == \
+        _sample(before, "http_requests_total", route + ',status="200"') + 1
+
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    count = _sample(text, "http_request_duration_seconds_count", route)
+    assert count == _sample(before, "http_request_duration_seconds_count", route) + 1
+    assert _sample(text, "http_request_duration_seconds_bucket", route + ',le="+Inf"') == count
+    assert _sample(text, "http_request_duration_seconds_sum", route) > 0
+    assert _sample(text, "http_request_db_queries_count", route) == count
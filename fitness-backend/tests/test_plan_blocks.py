@@ -0,0 +1,40 @@
+# tests/test_plan_blocks.py
+from datetime import date
+
+from app.db import SessionLocal
+from app.models import WeeklyPlan
+from app.services.plan_archetypes import load_archetypes
+from app.services.plan_builder import day_blocks, plan_sections
+from app.services.program_catalog import EMPTY_BLOCKS, get_program_catalog
+
+def _week_workouts(user_id):
+    with SessionLocal() as db:
+        plan = db.query(WeeklyPlan).filter_by(user_id=user_id).one()
+        ids = [i for i in (plan.meals_archetype_id, plan.workouts_archetype_id) if i is not None]
+        return plan_sections(plan, load_archetypes(db, ids) if ids else {})["week_workouts"]
+
+def test_week_stores_block_references_of_the_picked_program(client, make_user):
+    # no intermediate muscle-gain program is seeded, so the beginner one is picked
+    user_id = make_user(experience_level="intermediate")
+    r = client.get("/plan/current", params={"userId": user_id})
+    assert r.status_code == 200
+
+    week = _week_workouts(user_id)
+    for weekday, slot in enumerate(week.values(), start=1):
+        assert slot["blocks"] == {"program": "muscle_gain_beginner", "weekday": weekday}
+
+    with SessionLocal() as db:
+        expected = get_program_catalog(db).today_blocks("muscle_gain_beginner", date.today().isoweekday())
+    assert expected["title"]
+    body = r.json()
+    assert (body["workout_title"], body["warmup"], body["cooldown"]) == (
+        expected["title"], expected["warmup"], expected["cooldown"])
+
+def test_day_blocks_reads_older_layouts(client):
+    with SessionLocal() as db:
+        catalog = get_program_catalog(db)
+    compiled = catalog.today_blocks("fat_loss_beginner", 1)
+    assert day_blocks(compiled, catalog, "muscle_gain_beginner", 2) is compiled
+    assert day_blocks(None, catalog, "fat_loss_beginner", 1) == compiled
+    assert day_blocks({"program": "fat_loss_beginner", "weekday": 1}, catalog, "other", 2) == compiled
+    assert day_blocks({"program": None, "weekday": 1}, catalog, "fat_loss_beginner", 1) == EMPTY_BLOCKS
@@ -0,0 +1,34 @@
+# tests/test_plan_cache.py
+import pytest
+
+from app.db import SessionLocal
+from app.models import UserProfile
+from app.router import plan as plan_router
+from app.services.response_cache import ResponseCache
+
+@pytest.fixture
+def worker_cache(monkeypatch):
+    """This process's plan cache, local tier only (as on a worker without PLAN_CACHE_SHARED)."""
+    cache = ResponseCache(enabled=True, ttl=600, max_bytes=1 << 20)
+    monkeypatch.setattr(plan_router, "plan_cache", cache)
+    return cache
+
+def test_repeat_request_is_served_from_the_cache(client, user_id, worker_cache, monkeypatch):
+    first = client.get("/plan/current", params={"userId": user_id})
+
+    monkeypatch.setattr(plan_router, "_hydrate", lambda *a: pytest.fail("rendered again"))
+    second = client.get("/plan/current", params={"userId": user_id})
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+
+def test_profile_change_from_another_worker_is_never_served_stale(client, user_id, worker_cache):
+    before = client.get("/plan/current", params={"userId": user_id})
+
+    # another worker (or rebuild_plans) writes the profile; nothing reaches this process's cache
+    with SessionLocal() as db:
+        db.query(UserProfile).filter_by(user_id=user_id).update({"weight_kg": 95})
+        db.commit()
+
+    after = client.get("/plan/current", params={"userId": user_id})
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.json()["daily_targets"] != before.json()["daily_targets"]
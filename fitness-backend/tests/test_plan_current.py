@@ -0,0 +1,9 @@
+# tests/test_plan_current.py
+from app.services.query_budget import query_budget
+
+def test_warm_current_plan_is_one_read(client, user_id):
+    assert client.get("/plan/current", params={"userId": user_id}).status_code == 200   # builds the week
+
+    with query_budget(2, label="warm /plan/current", all_threads=True):
+        r = client.get("/plan/current", params={"userId": user_id})
+    assert r.status_code == 200
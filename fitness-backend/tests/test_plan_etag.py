@@ -0,0 +1,44 @@
+# tests/test_plan_etag.py
+from app.db import SessionLocal
+from app.models import UserProfile
+from app.services import catalog_version
+from app.services.catalog_version import MEAL_CATALOG, PROGRAM_CATALOG, bump_catalog_version
+
+def _get(client, user_id, path="/plan/current", etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(path, params={"userId": user_id}, headers=headers)
+
+def test_matching_etag_gets_304(client, user_id):
+    for path in ("/plan/current", "/plan/today"):
+        first = _get(client, user_id, path)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        again = _get(client, user_id, path, etag)
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+        assert _get(client, user_id, path, f'W/{etag}, "other"').status_code == 304
+        assert _get(client, user_id, path, '"other"').status_code == 200
+
+def test_etag_changes_after_a_catalog_bump(client, user_id, monkeypatch):
+    monkeypatch.setattr(catalog_version, "VERSION_CHECK_SECONDS", 0)
+    for catalog in (MEAL_CATALOG, PROGRAM_CATALOG):
+        etag = _get(client, user_id).headers["etag"]
+        with SessionLocal() as db:
+            bump_catalog_version(db, catalog)
+            db.commit()
+
+        r = _get(client, user_id, etag=etag)
+        assert r.status_code == 200
+        assert r.headers["etag"] != etag
+
+def test_etag_changes_after_a_plan_rebuild(client, user_id):
+    etag = _get(client, user_id).headers["etag"]
+    with SessionLocal() as db:
+        db.query(UserProfile).filter_by(user_id=user_id).update({"activity_level": "Intense"})
+        db.commit()
+
+    r = _get(client, user_id, etag=etag)
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
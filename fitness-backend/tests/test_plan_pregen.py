@@ -0,0 +1,93 @@
+# tests/test_plan_pregen.py
+# Default schedule: PREGEN_WINDOW=01:00-05:00 local on sat,sun.
+from datetime import date, datetime, timezone
+
+from app.db import SessionLocal
+from app.models import PlanPregenJob, WeeklyPlan
+from app.services import plan_pregen
+from app.services.plan_pregen import (
+    RateLimiter, _claim_job, in_off_peak, local_now, process_batch, run_once, schedule_jobs, upcoming_week,
+)
+
+WEEK = date(2031, 1, 6)
+# Sat 2031-01-04 02:00 in Auckland (UTC+13); Friday evening everywhere west of it
+AUCKLAND_OFF_PEAK = datetime(2031, 1, 3, 13, 0, tzinfo=timezone.utc)
+# Sat 2031-01-04 02:00 in Tokyo (UTC+9); 06:00 in Auckland, past its window
+TOKYO_OFF_PEAK = datetime(2031, 1, 3, 17, 0, tzinfo=timezone.utc)
+
+def _job(bucket):
+    with SessionLocal() as db:
+        return db.query(PlanPregenJob).filter_by(week_start_date=WEEK, tz_bucket=bucket).one_or_none()
+
+def _plans(user_ids):
+    with SessionLocal() as db:
+        return db.query(WeeklyPlan.user_id).filter(
+            WeeklyPlan.user_id.in_(user_ids), WeeklyPlan.week_start_date == WEEK).all()
+
+def test_buckets_follow_local_time():
+    local = local_now("Pacific/Auckland", AUCKLAND_OFF_PEAK)
+    assert (local.weekday(), local.hour) == (5, 2)
+    assert in_off_peak(local)
+    assert upcoming_week(local) == WEEK
+    assert not in_off_peak(local_now("UTC", AUCKLAND_OFF_PEAK))           # Friday
+    assert not in_off_peak(local_now("Pacific/Auckland", TOKYO_OFF_PEAK))  # 06:00
+    assert local_now("Not/AZone", AUCKLAND_OFF_PEAK).utcoffset().total_seconds() == 0
+
+def test_job_is_claimed_run_in_batches_and_completed(make_user, monkeypatch):
+    users = [make_user(timezone="Pacific/Auckland") for _ in range(3)]
+    monkeypatch.setattr(plan_pregen, "PREGEN_BATCH", 2)
+
+    assert run_once(SessionLocal, now_utc=AUCKLAND_OFF_PEAK, limiter=RateLimiter(0)) == 3
+    assert len(_plans(users)) == 3
+    job = _job("Pacific/Auckland")
+    assert (job.status, job.processed, job.cursor_user_id) == ("done", 3, max(users))
+    assert _job("UTC") is None   # not in its window
+
+    # done jobs are neither claimed nor scheduled again
+    assert run_once(SessionLocal, now_utc=AUCKLAND_OFF_PEAK, limiter=RateLimiter(0)) == 0
+    with SessionLocal() as db:
+        assert db.query(PlanPregenJob).filter_by(tz_bucket="Pacific/Auckland").count() == 1
+
+def test_double_claim_on_sqlite_writes_each_plan_once(make_user):
+    # SQLite has no FOR UPDATE SKIP LOCKED, so two workers can hold the same job;
+    # the batch skips users that already have a plan and the upsert is idempotent
+    users = [make_user(timezone="Asia/Tokyo") for _ in range(3)]
+    with SessionLocal() as db:
+        schedule_jobs(db, TOKYO_OFF_PEAK)
+
+    with SessionLocal() as a, SessionLocal() as b:
+        job_a, job_b = _claim_job(a, TOKYO_OFF_PEAK), _claim_job(b, TOKYO_OFF_PEAK)
+        assert job_a.id == job_b.id
+
+        assert process_batch(a, job_a, 10) == 3
+        a.commit()
+        assert process_batch(b, job_b, 10) == 0
+        b.commit()
+
+    assert sorted(u for (u,) in _plans(users)) == sorted(users)
+    assert _job("Asia/Tokyo").status == "done"
+
+def test_rate_limiter_sleeps_for_missing_tokens(monkeypatch):
+    clock = {"now": 100.0, "slept": 0.0}
+
+    class FakeTime:
+        @staticmethod
+        def monotonic():
+            return clock["now"]
+
+        @staticmethod
+        def sleep(seconds):
+            clock["slept"] += seconds
+            clock["now"] += seconds
+
+    monkeypatch.setattr(plan_pregen, "time", FakeTime)
+    limiter = RateLimiter(rate=10, burst=20)
+    limiter.acquire(20)                  # the initial burst is free
+    assert clock["slept"] == 0
+    limiter.acquire(5)
+    assert clock["slept"] == 0.5
+    limiter.acquire(50)                  # larger than the bucket: waits for a full bucket
+    assert clock["slept"] == 2.5
+
+    RateLimiter(0).acquire(10**6)        # rate 0: unlimited
+    assert clock["slept"] == 2.5
@@ -0,0 +1,61 @@
+# tests/test_plan_sections.py
+from datetime import date
+
+import pytest
+
+from app.db import SessionLocal
+from app.models import UserProfile, WeeklyPlan
+from app.services import plan_builder
+from app.services.meal_index import get_meal_index
+from app.services.meal_optimizer import MEAL_OPTIMIZER
+from app.services.plan_builder import compose_week_plan, profile_inputs, stale_sections
+from app.services.program_catalog import get_program_catalog
+
+WEEK = date(2026, 10, 12)
+
+def _profile(**changes):
+    fields = dict(user_id="u-sections", age=30, sex="male", height_cm=180, weight_kg=80, activity_level="Moderate",
+                  goal="Build Muscle", diet_type="nonveg", fav_protein=None, experience_level="beginner")
+    return UserProfile(**{**fields, **changes})
+
+@pytest.fixture
+def catalogs(client, user_id):
+    with SessionLocal() as db:
+        return get_program_catalog(db), get_meal_index(db)
+
+@pytest.fixture
+def rebuilt(catalogs, monkeypatch):
+    """rebuild(profile) -> (stale sections, sections recomputed) against a plan built from
+    _profile(); sections not recomputed must come back unchanged."""
+    catalog, meal_index = catalogs
+    built = compose_week_plan(profile_inputs(_profile()), WEEK, catalog, meal_index)
+    stored = WeeklyPlan(**built)
+
+    def rebuild(profile):
+        calls = []
+        targets, section = plan_builder.compute_daily_targets, plan_builder.compose_section
+        with monkeypatch.context() as m:
+            m.setattr(plan_builder, "compute_daily_targets", lambda **kw: calls.append("targets") or targets(**kw))
+            m.setattr(plan_builder, "compose_section",
+                      lambda name, *a, **kw: calls.append(name) or section(name, *a, **kw))
+            values = compose_week_plan(profile_inputs(profile), WEEK, catalog, meal_index,
+                                       previous=plan_builder.plan_values(stored))
+        for s in set(plan_builder.SECTIONS) - set(calls):
+            for column in plan_builder.SECTION_COLUMNS[s]:
+                assert values[column] == built[column], column
+        return stale_sections(stored, profile), calls
+
+    return rebuild
+
+def test_unchanged_profile_rebuilds_nothing(rebuilt):
+    assert rebuilt(_profile()) == ([], [])
+
+def test_weight_change_rebuilds_targets_only(rebuilt):
+    expected = ["targets", "meals"] if MEAL_OPTIMIZER else ["targets"]
+    assert rebuilt(_profile(weight_kg=95)) == (expected, expected)
+
+def test_experience_change_rebuilds_workouts_only(rebuilt):
+    assert rebuilt(_profile(experience_level="intermediate")) == (["workouts"], ["workouts"])
+
+def test_diet_change_rebuilds_meals_only(rebuilt):
+    assert rebuilt(_profile(diet_type="veg")) == (["meals"], ["meals"])
@@ -0,0 +1,35 @@
+# tests/test_plan_single_flight.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db import SessionLocal
+from app.models import WeeklyPlan
+from app.services import plan_builder
+
+def test_concurrent_first_requests_build_once(client, user_id, monkeypatch):
+    builds = []
+    build = plan_builder.build_week_using_engines
+
+    def slow_build(*args, **kwargs):
+        builds.append(args[1])
+        time.sleep(0.2)   # keep the others waiting on the same user/week
+        return build(*args, **kwargs)
+
+    monkeypatch.setattr(plan_builder, "build_week_using_engines", slow_build)
+
+    n = 8
+    start = threading.Barrier(n)
+
+    def fetch(_):
+        start.wait()
+        return client.get("/plan/current", params={"userId": user_id})
+
+    with ThreadPoolExecutor(n) as pool:
+        responses = list(pool.map(fetch, range(n)))
+
+    assert [r.status_code for r in responses] == [200] * n
+    assert len({r.headers["etag"] for r in responses}) == 1
+    assert builds == [user_id]
+    with SessionLocal() as db:
+        assert db.query(WeeklyPlan).filter_by(user_id=user_id).count() == 1
@@ -0,0 +1,34 @@
+# tests/test_plan_store.py
+import sqlite3
+from datetime import date, timedelta
+
+from app.db import SessionLocal
+from app.models import PlanDay
+from app.services.plan_store import upsert_plan_days
+
+def _rows(user_id, n, plan_hash):
+    start = date(2020, 1, 6)
+    return [
+        {
+            "user_id": user_id, "day": start + timedelta(days=i), "week_start_date": start + timedelta(days=i - i % 7),
+            "daily_targets": {}, "meals": [], "workout": {}, "program_slug": "p", "plan_hash": plan_hash,
+            "input_fingerprints": {},
+        }
+        for i in range(n)
+    ]
+
+def test_upsert_past_the_bind_parameter_limit(client, user_id):
+    n = 500   # 9 columns: 4500 parameters if sent as one VALUES clause
+    with SessionLocal() as db:
+        raw = db.connection().connection.dbapi_connection
+        limit = raw.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)   # the old SQLite default
+        try:
+            assert upsert_plan_days(db, _rows(user_id, n, "a")) == n
+            assert upsert_plan_days(db, _rows(user_id, n, "b")) == n
+            db.commit()
+        finally:
+            raw.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+
+        rows = db.query(PlanDay.plan_hash).filter(PlanDay.user_id == user_id).all()
+        assert len(rows) == n
+        assert {r.plan_hash for r in rows} == {"b"}
@@ -0,0 +1,50 @@
+# tests/test_plan_today.py
+from datetime import date
+
+import pytest
+
+from app.db import SessionLocal
+from app.models import PlanDay, UserProfile, WeeklyPlan
+from app.services import plan_builder
+from app.services.query_budget import query_budget
+
+@pytest.fixture
+def day_rows(monkeypatch):
+    monkeypatch.setattr(plan_builder, "PLAN_DAY_ROWS", True)
+
+def _stored(user_id):
+    with SessionLocal() as db:
+        plan = db.query(WeeklyPlan).filter_by(user_id=user_id).one()
+        days = db.query(PlanDay).filter_by(user_id=user_id).order_by(PlanDay.day).all()
+        return plan, days
+
+def test_today_is_read_from_plan_days(client, user_id, day_rows, monkeypatch):
+    first = client.get("/plan/today", params={"userId": user_id})   # builds the week and its rows
+    assert first.status_code == 200
+    plan, days = _stored(user_id)
+    assert len(days) == 7
+    assert {d.plan_hash for d in days} == {plan.content_hash}
+
+    monkeypatch.setattr(plan_builder, "_current_week", lambda *a: pytest.fail("read the weekly plan"))
+    with query_budget(1, label="warm /plan/today", all_threads=True):
+        second = client.get("/plan/today", params={"userId": user_id})
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.json()["date"] == str(date.today())
+
+def test_plan_days_are_rewritten_with_the_week(client, user_id, day_rows):
+    before = client.get("/plan/today", params={"userId": user_id}).json()
+    old_plan, _ = _stored(user_id)
+
+    with SessionLocal() as db:
+        db.query(UserProfile).filter_by(user_id=user_id).update({"weight_kg": 95})
+        db.commit()
+    assert client.get("/plan/current", params={"userId": user_id}).status_code == 200   # rebuilds the week
+
+    plan, days = _stored(user_id)
+    assert plan.content_hash != old_plan.content_hash
+    assert {d.plan_hash for d in days} == {plan.content_hash}
+    assert all(d.daily_targets == plan.daily_targets for d in days)
+
+    after = client.get("/plan/today", params={"userId": user_id}).json()
+    assert after["daily_targets"] == plan.daily_targets != before["daily_targets"]
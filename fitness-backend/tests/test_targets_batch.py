@@ -0,0 +1,41 @@
+# tests/test_targets_batch.py
+from itertools import product
+
+import pytest
+
+from app.services import calculations, macros
+
+pytest.importorskip("numpy")
+
+SEXES = ["male", "female", "M", None]
+AGES = [18, 90]
+HEIGHTS = [140.0, 210.5]
+WEIGHTS = [40.0, 200.0]
+
+def _grid(activities, goals, sexes=SEXES, ages=AGES, heights=HEIGHTS, weights=WEIGHTS):
+    return list(product(sexes, ages, heights, weights, activities, goals))
+
+def _rows(columns):
+    return [dict(zip(columns, map(int, row))) for row in zip(*columns.values())]
+
+def _check(module, grid):
+    batch = _rows(module.compute_daily_targets_batch(*map(list, zip(*grid))))
+    scalar = [module.compute_daily_targets(*row) for row in grid]
+    mismatches = [(row, b, s) for row, b, s in zip(grid, batch, scalar) if b != s]
+    assert not mismatches, mismatches[:5]
+
+def test_calculations_batch_matches_scalar():
+    activities = [*calculations.ACTIVITY_MULT, "Unknown", None]
+    goals = ["Lose Fat", "Build Muscle", "Maintain", "muscle_gain", None]
+    _check(calculations, _grid(activities, goals))
+
+def test_calculations_batch_matches_scalar_on_missing_inputs():
+    # the 1700 kcal fallback and the 70 kg default weight
+    _check(calculations, _grid(["Moderate"], ["Lose Fat", "Build Muscle"], ages=[None, 30], heights=[None, 170.0],
+                               weights=[None, 0, 80.0]))
+
+def test_macros_batch_matches_scalar():
+    activities = ["Sedentary", "light", "MODERATE", "Intense", "unknown"]
+    goals = ["Build Muscle", "muscle_gain", "bulk", "Lose Fat", "fat_loss", "cut", "performance", "athletic",
+             "Maintain", ""]
+    _check(macros, _grid(activities, goals, sexes=["male", "female", "m", ""]))